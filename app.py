@@ -3,41 +3,322 @@ FedEx DCA System - Flask Backend API
 Serves data to the dashboard via RESTful endpoints
 """
 
-from flask import Flask, jsonify, request
+import time
+_import_started = time.perf_counter()
+
+from flask import Flask, Response, jsonify, request
 from flask_cors import CORS
-import pandas as pd
-import pickle
-from datetime import datetime, timedelta
+import os
+import threading
+import traceback
+from datetime import date, datetime, timedelta
 import random
 
+import profiling
+from coalescing import SingleFlight, coalesced
+from instrumentation import StageTimer, flush_background, init_app, instrument_model
+
 app = Flask(__name__)
 CORS(app)  # Enable CORS for dashboard to access API
+init_app(app)  # Per-route latency / hot-path metrics on /metrics
+profiling.init_app(app)  # Opt-in per-request profiling (admin token required)
+
+# pandas and the model artifacts are imported / loaded by load_state() so the
+# server can bind its port and answer health checks before they are ready.
+# Set DCA_DEFERRED_LOAD=0 to load everything synchronously at import
+DEFERRED_LOAD = os.environ.get("DCA_DEFERRED_LOAD", "1") != "0"
+
+# Time from import to serving "/" (cold-start budget for container rollouts)
+STARTUP_TARGET_MS = 500
+
+# Endpoints that answer while models and data are still loading
+WARMUP_ENDPOINTS = {"home", "health", "ready", "metrics", "static"}
+
+recovery_model = None
+dca_matcher = None
+
+# CaseStore backend (DataFrame or SQLite, see case_store.py / $DCA_CASE_STORE).
+# Its version is bumped on every write; derived views are cached against it.
+case_store = None
+
+# Case change events and the views they keep current (see derived_views.py)
+event_bus = None
+live_views = None
+
+# Append-only recovery event log with daily rollups (see recovery_history.py)
+recovery_history = None
+
+# Pushes dashboard diffs to /api/stream clients (see live_updates.py)
+live_updates = None
+
+# Candidate recovery model scored next to the primary one (see shadow_scoring.py)
+shadow_scorer = None
+
+# Identical concurrent dashboard reads share one computation (see coalescing.py)
+single_flight = SingleFlight()
+
+_ready = threading.Event()      # set once load_state() succeeded
+_load_done = threading.Event()  # set once load_state() finished, either way
+load_error = None               # why load_state() failed, if it did
+_profile_lock = threading.Lock()
+_write_lock = threading.Lock()  # keeps events in store-version order
+startup_timings = {}
+
+
+def load_state():
+    """
+    Load models and data (runs in a background thread in deferred mode).
+    A failure is recorded in load_error and reported by /health and /ready
+    instead of leaving the API "warming up" forever.
+    """
+    
+    global load_error
+    
+    try:
+        _load_state()
+    except Exception as e:
+        load_error = f"{type(e).__name__}: {e}"
+        startup_timings["failed_ms"] = round((time.perf_counter() - _import_started) * 1000, 1)
+        print(f"   ❌ Startup failed: {load_error}")
+        traceback.print_exc()
+        if not DEFERRED_LOAD:
+            raise
+    finally:
+        _load_done.set()
+
+
+def _load_state():
+    """load_state() body"""
+    
+    global recovery_model, dca_matcher, recovery_history, shadow_scorer
+    
+    started = time.perf_counter()
+    
+    # Load models and data
+    print("🚀 Loading models and data...")
+    
+    import atexit
+    from case_store import DataFrameCaseStore, open_store
+    from recovery_history import RecoveryHistory, backfill
+    
+    model = load_model_version("recovery_model", "Recovery model")
+    matcher = load_model_version("dca_matcher", "DCA matcher")
+    
+    # Shadow A/B: score live traffic with a second artifact version too
+    shadow = None
+    shadow_version = os.environ.get("DCA_SHADOW_MODEL_VERSION")
+    if shadow_version and model is not None:
+        from shadow_scoring import ShadowScorer
+        candidate = load_model_version("recovery_model", "Shadow model", shadow_version)
+        if candidate is not None:
+            shadow = ShadowScorer(model, candidate)
+    
+    try:
+        store = open_store()
+        print(f"   ✅ Loaded {len(store)} cases ({type(store).__name__})")
+    except (OSError, ValueError) as e:
+        print(f"   ⚠️  Dataset not found - run generate_data.py first ({e})")
+        store = DataFrameCaseStore()
+    
+    history = RecoveryHistory()
+    # Checked again under the history's lock: the debug reloader runs this twice
+    backfilled = backfill(history, store) if len(history) == 0 and not store.is_empty() else None
+    if backfilled is not None:
+        print(f"   ✅ Recovery history backfilled ({backfilled} recoveries)")
+    else:
+        print(f"   ✅ Recovery history loaded ({len(history)} recoveries)")
+    atexit.register(history.flush)
+    
+    # Count and time model calls
+    recovery_model = instrument_model(model, "recovery_model")
+    dca_matcher = instrument_model(matcher, "dca_matcher")
+    recovery_history = history
+    shadow_scorer = shadow
+    use_store(store)
+    
+    if dca_matcher is not None and not store.is_empty():
+        print("   ✅ DCA profiles computed from case history")
+    
+    flush_background()
+    
+    startup_timings["load_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    startup_timings["ready_ms"] = round((time.perf_counter() - _import_started) * 1000, 1)
+    _ready.set()
+
+
+def load_model_version(name, label, version=None):
+    """
+    Load a model artifact (version, else $DCA_<NAME>_VERSION, else the
+    CURRENT one); None if it is missing or fails validation
+    """
+    
+    from model_artifacts import ArtifactError, load_model
+    
+    version = version or os.environ.get(f"DCA_{name.upper()}_VERSION")
+    try:
+        model = load_model(name, version)
+    except FileNotFoundError:
+        print(f"   ⚠️  {label} not found - run train_model.py first")
+        return None
+    except ArtifactError as e:
+        print(f"   ⚠️  {label} rejected: {e}")
+        return None
+    
+    print(f"   ✅ {label} loaded ({model.model_version})")
+    return model
+
+
+def use_store(store, history=None):
+    """
+    Switch the API to a different case store (and, if given, the recovery
+    history that goes with it) and rebuild its derived views
+    """
+    
+    global case_store, event_bus, live_views, live_updates, recovery_history
+    
+    if history is not None:
+        recovery_history = history
+    
+    from derived_views import LiveViews
+    from events import EventBus
+    from live_updates import Broadcaster
+    
+    bus = EventBus()
+    views = LiveViews(store, bus, recovery_model)
+    bus.subscribe(lambda event: on_case_updated(event.old, event.new, event.version))
+    if recovery_history is not None:
+        bus.subscribe(recovery_history.on_case_event)
+    
+    # Registered after the views so diffs see the state the event produced
+    def case_payload(row):
+        return format_case(row, views.scores.score(row)) if views.scores is not None else row
+    
+    broadcaster = Broadcaster(views, lambda: compute_metrics(views), case_payload)
+    bus.subscribe(broadcaster.on_case_event)
+    bus.subscribe(lambda event: flush_background())  # model calls made by subscribers -> /metrics
+    
+    if live_updates is not None:
+        live_updates.close()  # open streams reconnect to the new store
+    
+    case_store, event_bus, live_views, live_updates = store, bus, views, broadcaster
+    refresh_profiles()
+
+
+def refresh_profiles():
+    """Rebuild DCA profiles if the store has changed since they were computed"""
+    
+    if dca_matcher is None or case_store is None:
+        return
+    
+    version = case_store.version
+    if getattr(dca_matcher, "data_version", None) != version:
+        # Let queued case events fold in incrementally before falling back to a rebuild
+        event_bus.flush(0.5)
+    if getattr(dca_matcher, "data_version", None) != version:
+        with _profile_lock:
+            if getattr(dca_matcher, "data_version", None) != version:
+                dca_matcher.load_profile_cells(case_store.profile_cells(), version)
+
+
+def on_case_updated(old_row, new_row, version):
+    """Fold a single case write into the cached DCA profiles"""
+    
+    if dca_matcher is None:
+        return
+    
+    with _profile_lock:
+        # Only incremental if the profiles were current just before this write;
+        # otherwise refresh_profiles() rebuilds them on the next read
+        if getattr(dca_matcher, "data_version", None) == version - 1:
+            dca_matcher.apply_case_update(old_row, new_row, version)
+
+
+def no_cases():
+    """True until there is a non-empty case store to serve from"""
+    return case_store is None or case_store.is_empty()
+
+
+def is_ready():
+    """True once models and data have finished loading"""
+    return _ready.is_set()
+
+
+def wait_until_ready(timeout=None):
+    """
+    Block until load_state() has finished; returns False on timeout and
+    raises RuntimeError if loading failed
+    """
+    
+    if not _load_done.wait(timeout):
+        return False
+    if load_error is not None:
+        raise RuntimeError(f"Startup failed: {load_error}")
+    return True
+
+
+def startup_failed():
+    """503 response for a process whose load_state() failed"""
+    
+    return jsonify({"status": "failed", "error": load_error, "startup": startup_timings}), 503
+
+
+def data_version():
+    """Current case store version (part of the request coalescing key)"""
+    return case_store.version if case_store is not None else None
+
 
-# Load models and data
-print("🚀 Loading models and data...")
-
-try:
-    with open("models/recovery_model.pkl", "rb") as f:
-        recovery_model = pickle.load(f)
-    print("   ✅ Recovery model loaded")
-except:
-    print("   ⚠️  Recovery model not found - run train_model.py first")
-    recovery_model = None
-
-try:
-    with open("models/dca_matcher.pkl", "rb") as f:
-        dca_matcher = pickle.load(f)
-    print("   ✅ DCA matcher loaded")
-except:
-    print("   ⚠️  DCA matcher not found - run train_model.py first")
-    dca_matcher = None
-
-try:
-    df_cases = pd.read_csv("data/cases_1000.csv")
-    print(f"   ✅ Loaded {len(df_cases)} cases")
-except:
-    print("   ⚠️  Dataset not found - run generate_data.py first")
-    df_cases = pd.DataFrame()
+@app.before_request
+def _require_warm():
+    """Answer API calls with 503 "warming up" until the data is loaded"""
+    
+    if _ready.is_set() or request.endpoint is None or request.endpoint in WARMUP_ENDPOINTS:
+        return None
+    
+    if load_error is not None:
+        return startup_failed()
+    
+    response = jsonify({
+        "status": "warming up",
+        "error": "Models and data are still loading, retry shortly"
+    })
+    response.status_code = 503
+    response.headers["Retry-After"] = "1"
+    return response
+
+
+@app.route('/health')
+def health():
+    """Liveness probe - the process is up and serving (503 if startup failed, so it gets restarted)"""
+    
+    if load_error is not None:
+        return startup_failed()
+    
+    return jsonify({"status": "ok"})
+
+
+@app.route('/ready')
+def ready():
+    """Readiness probe - 200 once models and data are loaded, 503 while warming up or if loading failed"""
+    
+    if load_error is not None:
+        return startup_failed()
+    
+    if not _ready.is_set():
+        return jsonify({"status": "warming up", "startup": startup_timings}), 503
+    
+    return jsonify({
+        "status": "ready",
+        "store": type(case_store).__name__,
+        "recovery_model": getattr(recovery_model, "model_version", recovery_model is not None),
+        "dca_matcher": getattr(dca_matcher, "model_version", dca_matcher is not None),
+        "data_version": case_store.version,
+        "live_views": live_views.stats(),
+        "partitions": case_store.stats() if hasattr(case_store, "stats") else None,
+        "coalescing": single_flight.stats(),
+        "stream": live_updates.stats(),
+        "shadow": shadow_scorer.stats() if shadow_scorer is not None else None,
+        "startup": startup_timings
+    })
 
 
 @app.route('/')
@@ -46,7 +327,7 @@ def home():
     return jsonify({
         "service": "FedEx DCA Management API",
         "version": "1.0.0",
-        "status": "running",
+        "status": "running" if _ready.is_set() else "failed" if load_error is not None else "warming up",
         "endpoints": [
             "/api/metrics",
             "/api/cases",
@@ -54,30 +335,59 @@ def home():
             "/api/dcas",
             "/api/charts/distribution",
             "/api/charts/recovery-trend",
-            "/api/case/<case_id>"
+            "/api/case/<case_id>",
+            "POST /api/cases",
+            "PUT /api/case/<case_id>/status",
+            "POST /api/case/<case_id>/contact",
+            "/api/stream",
+            "/api/shadow",
+            "/metrics",
+            "/health",
+            "/ready"
         ]
     })
 
 
 @app.route('/api/metrics')
+@coalesced(single_flight, data_version)
 def get_metrics():
     """Get top-level dashboard metrics"""
     
-    if df_cases.empty:
+    if no_cases():
         return jsonify({"error": "No data available"}), 500
     
-    # Calculate key metrics
-    total_outstanding = df_cases['amount'].sum()
-    critical_cases = len(df_cases[
-        (df_cases['amount'] > 50000) & 
-        (df_cases['days_overdue'] > 80)
-    ])
+    timer = StageTimer()
+    
+    # Calculate key metrics (kept current by case events)
+    live_views.sync()
+    metrics = compute_metrics(live_views)
+    timer.mark("filtering")
+    
+    response = jsonify(metrics)
+    timer.mark("serialization")
+    
+    return response
+
+
+def compute_metrics(views):
+    """The /api/metrics payload from the live aggregates and recovery history"""
+    
+    summary = views.aggregates.summary()
+    total_outstanding = summary['total_amount']
+    critical_cases = summary['critical_cases']
     
-    # This month recovery (simulated)
-    this_month_recovery = df_cases[df_cases['recovered'] == 1]['amount'].sum() * 0.35
+    # This month recovery (month to date vs the equally long period before it)
+    today = date.today()
+    recovery = recovery_history.period_over_period(today.replace(day=1), today)
+    this_month_recovery = recovery['amount']
+    
+    # Outstanding / critical / recovery rate now vs the last snapshot before this month
+    recovery_history.record_portfolio(today, total_outstanding, critical_cases, summary['recovery_rate'])
+    portfolio = recovery_history.portfolio_change(today.replace(day=1), today)
+    critical_change = portfolio['critical_change']
     
     # Recovery rate
-    recovery_rate = (df_cases['recovered'].mean() * 100)
+    recovery_rate = summary['recovery_rate'] * 100
     
     metrics = {
         "total_outstanding": round(total_outstanding, 2),
@@ -86,20 +396,37 @@ def get_metrics():
         "this_month_recovery": round(this_month_recovery, 2),
         "this_month_recovery_formatted": f"${this_month_recovery/1000000:.1f}M",
         "recovery_rate": round(recovery_rate, 1),
-        "recovery_rate_change": "+14%",
-        "outstanding_change": "-8.2%",
-        "recovery_change": "+34.5%",
-        "critical_change": "+12"
+        "recovery_rate_change": _format_points(portfolio['recovery_rate_change']),
+        "outstanding_change": _format_change(portfolio['outstanding_change_pct']),
+        "recovery_change": _format_change(recovery['amount_change_pct']),
+        "critical_change": f"{critical_change:+d}" if critical_change is not None else "n/a"
     }
     
-    return jsonify(metrics)
+    return metrics
+
+
+def _format_change(pct):
+    """Percentage change as a signed string for the dashboard"""
+    
+    if pct is None:
+        return "n/a"
+    return f"{pct:+.1f}%"
+
+
+def _format_points(points):
+    """Change of a percentage, in percentage points, as a signed string for the dashboard"""
+    
+    if points is None:
+        return "n/a"
+    return f"{points:+.1f} pts"
 
 
 @app.route('/api/cases')
+@coalesced(single_flight, data_version)
 def get_cases():
     """Get all cases with predictions"""
     
-    if df_cases.empty or recovery_model is None:
+    if no_cases() or recovery_model is None:
         return jsonify({"error": "Data or model not available"}), 500
     
     # Get query parameters
@@ -107,104 +434,105 @@ def get_cases():
     status_filter = request.args.get('status', None)
     priority_filter = request.args.get('priority', None)
     search = request.args.get('search', None)
+    dca_filter = request.args.get('dca', None)
+    state_filter = request.args.get('state', None)
+    
+    timer = StageTimer()
     
-    # Apply filters
-    df_filtered = df_cases.copy()
+    # Apply filters (pushed down into the store; a partitioned store only
+    # queries the partitions a dca / state filter can match)
+    filters = []
     
     if status_filter:
-        df_filtered = df_filtered[df_filtered['status'].str.lower() == status_filter.lower()]
+        filters.append(('status', 'ieq', status_filter))
     
-    if search:
-        df_filtered = df_filtered[
-            df_filtered['customer_name'].str.contains(search, case=False, na=False) |
-            df_filtered['case_id'].str.contains(search, case=False, na=False) |
-            df_filtered['assigned_dca'].str.contains(search, case=False, na=False)
-        ]
+    if dca_filter:
+        filters.append(('assigned_dca', 'ieq', dca_filter))
+    
+    if state_filter:
+        filters.append(('state', 'ieq', state_filter))
+    
+    rows = case_store.find_cases(filters, search=search, limit=limit)
+    
+    timer.mark("filtering")
     
     # Add predictions to each case
     cases_list = []
+    scored = []
     
-    for idx, row in df_filtered.head(limit).iterrows():
-        # Get ML predictions
-        recovery_prob = recovery_model.predict_recovery_probability(
-            row['amount'],
-            row['days_overdue'],
-            row['customer_avg_days_late'],
-            row['assigned_dca']
-        )
-        
-        days_to_recovery = recovery_model.predict_days_to_recovery(
-            row['amount'],
-            row['days_overdue'],
-            recovery_prob
-        )
-        
-        priority_score = recovery_model.get_priority_score(
-            row['amount'],
-            row['days_overdue'],
-            recovery_prob
-        )
-        
-        # Determine priority level
-        if priority_score >= 7:
-            priority = "high"
-        elif priority_score >= 4:
-            priority = "medium"
-        else:
-            priority = "low"
+    for row in rows:
+        # Get ML predictions (rescored by case events when a case changes)
+        scores = live_views.scores.score(row)
+        scored.append((row, scores))
         
         # Apply priority filter if specified
-        if priority_filter and priority != priority_filter.lower():
+        if priority_filter and scores['priority'] != priority_filter.lower():
             continue
         
-        case = {
-            "case_id": row['case_id'],
-            "customer_name": row['customer_name'],
-            "amount": round(row['amount'], 2),
-            "amount_formatted": f"${row['amount']:,.0f}",
-            "days_overdue": int(row['days_overdue']),
-            "invoice_date": row['invoice_date'],
-            "industry": row['industry'],
-            "state": row['state'],
-            "assigned_dca": row['assigned_dca'],
-            "status": row['status'],
-            "last_contact_days_ago": int(row['last_contact_days_ago']),
-            "last_contact": f"{int(row['last_contact_days_ago'])} days ago",
-            "contact_attempts": int(row['contact_attempts']),
-            "recovery_probability": recovery_prob,
-            "expected_days_to_recovery": days_to_recovery,
-            "priority": priority,
-            "priority_score": priority_score,
-            "customer_history": {
-                "avg_days_late": row['customer_avg_days_late'],
-                "late_count_24m": int(row['customer_late_count_24m'])
-            }
-        }
-        
-        cases_list.append(case)
+        cases_list.append(format_case(row, scores))
     
-    return jsonify({
+    timer.mark("scoring")
+    
+    # Hand the same rows to the candidate model (scored off the request path)
+    if shadow_scorer is not None:
+        shadow_scorer.submit(scored)
+        timer.mark("shadow")
+    
+    response = jsonify({
         "total": len(cases_list),
         "cases": cases_list
     })
+    timer.mark("serialization")
+    
+    return response
+
+
+def format_case(row, scores):
+    """One /api/cases entry (also pushed to /api/stream clients)"""
+    
+    return {
+        "case_id": row['case_id'],
+        "customer_name": row['customer_name'],
+        "amount": round(row['amount'], 2),
+        "amount_formatted": f"${row['amount']:,.0f}",
+        "days_overdue": int(row['days_overdue']),
+        "invoice_date": row['invoice_date'],
+        "industry": row['industry'],
+        "state": row['state'],
+        "assigned_dca": row['assigned_dca'],
+        "status": row['status'],
+        "last_contact_days_ago": int(row['last_contact_days_ago']),
+        "last_contact": f"{int(row['last_contact_days_ago'])} days ago",
+        "contact_attempts": int(row['contact_attempts']),
+        "recovery_probability": scores['recovery_probability'],
+        "expected_days_to_recovery": scores['expected_days_to_recovery'],
+        "priority": scores['priority'],
+        "priority_score": scores['priority_score'],
+        "customer_history": {
+            "avg_days_late": row['customer_avg_days_late'],
+            "late_count_24m": int(row['customer_late_count_24m'])
+        }
+    }
 
 
 @app.route('/api/alerts')
+@coalesced(single_flight, data_version)
 def get_alerts():
     """Generate critical alerts based on case analysis"""
     
-    if df_cases.empty:
+    if no_cases():
         return jsonify({"error": "No data available"}), 500
     
+    timer = StageTimer()
     alerts = []
     
+    # Rule matches are re-evaluated per changed case by the event pipeline
+    live_views.sync()
+    
     # Alert 1: High-value stalled cases
-    stalled_high_value = df_cases[
-        (df_cases['status'] == 'Stalled') &
-        (df_cases['amount'] > 75000)
-    ].sort_values('amount', ascending=False).head(3)
+    stalled_high_value = live_views.alerts.rows('stalled_high_value')
     
-    for idx, row in stalled_high_value.iterrows():
+    for row in stalled_high_value:
         alerts.append({
             "priority": "high",
             "title": "High-Value Case Stalled",
@@ -214,13 +542,9 @@ def get_alerts():
         })
     
     # Alert 2: Approaching 90-day threshold
-    approaching_threshold = df_cases[
-        (df_cases['days_overdue'] >= 85) &
-        (df_cases['days_overdue'] < 95) &
-        (df_cases['status'] != 'Stalled')
-    ].head(2)
+    approaching_threshold = live_views.alerts.rows('approaching_threshold')
     
-    for idx, row in approaching_threshold.iterrows():
+    for row in approaching_threshold:
         alerts.append({
             "priority": "high",
             "title": "SLA Breach Imminent",
@@ -230,12 +554,9 @@ def get_alerts():
         })
     
     # Alert 3: Missed payment promises
-    promised_cases = df_cases[
-        (df_cases['status'] == 'Promised') &
-        (df_cases['last_contact_days_ago'] > 5)
-    ].head(2)
+    promised_cases = live_views.alerts.rows('promise_overdue')
     
-    for idx, row in promised_cases.iterrows():
+    for row in promised_cases:
         alerts.append({
             "priority": "medium",
             "title": "Payment Promise Overdue",
@@ -245,18 +566,28 @@ def get_alerts():
         })
     
     # Alert 4: DCA performance issues
-    dca_stats = df_cases.groupby('assigned_dca').agg({
-        'recovered': 'mean',
-        'case_id': 'count'
-    }).reset_index()
+    if dca_matcher is not None:
+        refresh_profiles()
+        dca_success = {
+            dca: profile["success_rate"]
+            for dca, profile in dca_matcher.dca_profiles.items()
+            if profile.get("total_cases")
+        }
+    else:
+        dca_success = {}
+        for dca, band, bucket, cases, recovered, *_ in case_store.profile_cells():
+            totals = dca_success.setdefault(dca, [0, 0])
+            totals[0] += cases
+            totals[1] += recovered
+        dca_success = {dca: recovered / cases for dca, (cases, recovered) in dca_success.items()}
     
-    low_performers = dca_stats[dca_stats['recovered'] < 0.6]
+    low_performers = [(dca, rate) for dca, rate in dca_success.items() if rate < 0.6]
     
-    for idx, row in low_performers.iterrows():
+    for dca, rate in low_performers:
         alerts.append({
             "priority": "medium",
             "title": "DCA Performance Drop",
-            "details": f"{row['assigned_dca']} recovery rate at {row['recovered']*100:.0f}% (target: 65%+)",
+            "details": f"{dca} recovery rate at {rate*100:.0f}% (target: 65%+)",
             "time": f"{random.randint(120, 300)} mins ago",
             "case_id": None
         })
@@ -264,65 +595,74 @@ def get_alerts():
     # Sort by priority
     priority_order = {"high": 0, "medium": 1, "low": 2}
     alerts.sort(key=lambda x: priority_order[x["priority"]])
+    timer.mark("filtering")
     
-    return jsonify({
+    response = jsonify({
         "total": len(alerts),
         "alerts": alerts[:10]  # Return top 10
     })
+    timer.mark("serialization")
+    
+    return response
 
 
 @app.route('/api/dcas')
+@coalesced(single_flight, data_version)
 def get_dcas():
     """Get DCA performance rankings"""
     
-    if df_cases.empty or dca_matcher is None:
+    if no_cases() or dca_matcher is None:
         return jsonify({"error": "Data or model not available"}), 500
     
-    # Get rankings from model
-    rankings = dca_matcher.get_dca_rankings()
+    timer = StageTimer()
     
-    # Enhance with actual case stats
-    dca_stats = df_cases.groupby('assigned_dca').agg({
-        'case_id': 'count',
-        'amount': 'sum',
-        'recovered': 'mean',
-        'days_to_recovery': 'mean'
-    }).reset_index()
+    # Profiles are computed from case history and cached per data version
+    refresh_profiles()
+    rankings = dca_matcher.get_dca_rankings()
     
     enhanced_rankings = []
     
-    for i, dca_info in enumerate(rankings, 1):
-        dca_name = dca_info['dca_name']
-        stats = dca_stats[dca_stats['assigned_dca'] == dca_name].iloc[0] if len(dca_stats[dca_stats['assigned_dca'] == dca_name]) > 0 else None
+    for dca_info in rankings:
+        if not dca_info['total_cases']:
+            continue
+        
+        recovered_amount = dca_info['recovered_amount']
         
-        if stats is not None:
-            enhanced_rankings.append({
-                "rank": i,
-                "name": dca_name,
-                "score": f"{dca_info['success_rate']:.0f}%",
-                "success_rate": dca_info['success_rate'],
-                "avg_days": dca_info['avg_days'],
-                "total_cases": int(stats['case_id']),
-                "total_recovered": round(stats['amount'] * stats['recovered'], 2),
-                "total_recovered_formatted": f"${stats['amount'] * stats['recovered'] / 1000000:.1f}M",
-                "stats": f"{int(stats['case_id'])} cases • Avg {dca_info['avg_days']} days • ${stats['amount'] * stats['recovered'] / 1000000:.1f}M recovered",
-                "strengths": dca_info['strengths']
-            })
+        enhanced_rankings.append({
+            "rank": len(enhanced_rankings) + 1,
+            "name": dca_info['dca_name'],
+            "score": f"{dca_info['success_rate']:.0f}%",
+            "success_rate": dca_info['success_rate'],
+            "avg_days": dca_info['avg_days'],
+            "total_cases": dca_info['total_cases'],
+            "total_recovered": recovered_amount,
+            "total_recovered_formatted": f"${recovered_amount / 1000000:.1f}M",
+            "stats": f"{dca_info['total_cases']} cases • Avg {dca_info['avg_days']} days • ${recovered_amount / 1000000:.1f}M recovered",
+            "strengths": dca_info['strengths'],
+            "segments": dca_info['segments']
+        })
     
-    return jsonify({
+    timer.mark("scoring")
+    
+    response = jsonify({
         "total": len(enhanced_rankings),
         "dcas": enhanced_rankings
     })
+    timer.mark("serialization")
+    
+    return response
 
 
 @app.route('/api/charts/distribution')
+@coalesced(single_flight, data_version)
 def get_case_distribution():
     """Get case distribution by status for chart"""
     
-    if df_cases.empty:
+    if no_cases():
         return jsonify({"error": "No data available"}), 500
     
-    distribution = df_cases['status'].value_counts().to_dict()
+    live_views.sync()
+    distribution = live_views.aggregates.status_counts()
     
     return jsonify({
         "labels": list(distribution.keys()),
@@ -331,51 +671,107 @@ def get_case_distribution():
 
 
 @app.route('/api/charts/recovery-trend')
+@coalesced(single_flight, data_version)
 def get_recovery_trend():
-    """Get 30-day recovery trend for chart"""
+    """
+    Get recovery trend for chart (default: last 4 weeks, weekly buckets).
+    Query params: start / end (YYYY-MM-DD), granularity (day|week), dca, status
+    """
+    
+    if recovery_history is None:
+        return jsonify({"error": "No data available"}), 500
+    
+    granularity = request.args.get('granularity', 'week')
+    if granularity not in ('day', 'week'):
+        return jsonify({"error": "granularity must be 'day' or 'week'"}), 400
+    
+    try:
+        end = datetime.strptime(request.args['end'], "%Y-%m-%d").date() if 'end' in request.args else date.today()
+        start = (datetime.strptime(request.args['start'], "%Y-%m-%d").date()
+                 if 'start' in request.args else end - timedelta(days=27))
+    except ValueError:
+        return jsonify({"error": "start / end must be YYYY-MM-DD"}), 400
+    
+    if start > end:
+        return jsonify({"error": "start must not be after end"}), 400
+    
+    dca = request.args.get('dca')
+    status = request.args.get('status')
+    
+    buckets = recovery_history.trend(start, end, granularity, dca, status)
+    change = recovery_history.period_over_period(start, end, dca, status)
     
-    # Simulated weekly trend data
     trend = {
-        "labels": ["Week 1", "Week 2", "Week 3", "Week 4"],
-        "data": [0.5, 0.8, 1.2, 2.8]  # Millions
+        "labels": [bucket['start'] for bucket in buckets],
+        "data": [round(bucket['amount'] / 1000000, 2) for bucket in buckets],  # Millions
+        "counts": [bucket['count'] for bucket in buckets],
+        "total": round(change['amount'], 2),
+        "previous_total": round(change['previous_amount'], 2),
+        "change": _format_change(change['amount_change_pct'])
     }
     
     return jsonify(trend)
 
 
+@app.route('/api/stream')
+def stream_updates():
+    """Server-Sent Events: a snapshot on connect, then diffs whenever the data changes"""
+    
+    if no_cases():
+        return jsonify({"error": "No data available"}), 500
+    
+    # EventSource sends Last-Event-ID when it reconnects
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        last_version = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_version = None
+    
+    # Every open stream holds a server thread
+    if not live_updates.accepting():
+        response = jsonify({"error": "Too many open streams, retry shortly"})
+        response.status_code = 503
+        response.headers["Retry-After"] = "30"
+        return response
+    
+    return Response(
+        live_updates.stream(last_version),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.route('/api/shadow')
+def get_shadow_stats():
+    """Primary vs candidate model disagreement and scoring latency (shadow A/B)"""
+    
+    if shadow_scorer is None:
+        return jsonify({"error": "Shadow scoring is off - set DCA_SHADOW_MODEL_VERSION"}), 404
+    
+    return jsonify(shadow_scorer.stats())
+
+
 @app.route('/api/case/<case_id>')
 def get_case_detail(case_id):
     """Get detailed information for a specific case"""
     
-    if df_cases.empty or recovery_model is None:
+    if no_cases() or recovery_model is None:
         return jsonify({"error": "Data or model not available"}), 500
     
-    case_row = df_cases[df_cases['case_id'] == case_id]
+    timer = StageTimer()
     
-    if len(case_row) == 0:
+    row = case_store.get_case(case_id)
+    
+    if row is None:
         return jsonify({"error": "Case not found"}), 404
     
-    row = case_row.iloc[0]
+    timer.mark("filtering")
     
     # Get predictions
-    recovery_prob = recovery_model.predict_recovery_probability(
-        row['amount'],
-        row['days_overdue'],
-        row['customer_avg_days_late'],
-        row['assigned_dca']
-    )
-    
-    days_to_recovery = recovery_model.predict_days_to_recovery(
-        row['amount'],
-        row['days_overdue'],
-        recovery_prob
-    )
-    
-    priority_score = recovery_model.get_priority_score(
-        row['amount'],
-        row['days_overdue'],
-        recovery_prob
-    )
+    scores = live_views.scores.score(row)
+    recovery_prob = scores['recovery_probability']
+    days_to_recovery = scores['expected_days_to_recovery']
+    priority_score = scores['priority_score']
     
     # Get recommended DCA
     recommended_dca = dca_matcher.recommend_dca(
@@ -411,8 +807,110 @@ def get_case_detail(case_id):
             "reason": f"High priority case with {recovery_prob}% recovery probability"
         }
     }
+    timer.mark("scoring")
+    
+    if shadow_scorer is not None:
+        shadow_scorer.submit([(row, scores)])
+        timer.mark("shadow")
+    
+    response = jsonify(case_detail)
+    timer.mark("serialization")
+    
+    return response
+
+
+
+def _apply_case_update(case_id, changes, increments=None):
+    """Write a case change through the store and publish it to the event pipeline"""
+    
+    from case_store import CaseNotFound
+    from events import CaseEvent
+    
+    if no_cases():
+        return jsonify({"error": "No data available"}), 500
+    
+    try:
+        with _write_lock:
+            old_row, new_row, version = case_store.update_case(case_id, changes, increments)
+            event_bus.publish(CaseEvent("update", case_id, old_row, new_row, version))
+    except CaseNotFound:
+        return jsonify({"error": "Case not found"}), 404
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    return jsonify({
+        "case": new_row,
+        "data_version": version
+    })
+
+
+@app.route('/api/cases', methods=['POST'])
+def create_case():
+    """Insert a new case and publish it to the event pipeline"""
+    
+    from case_store import DuplicateCase
+    from events import CaseEvent
+    
+    if case_store is None:
+        return jsonify({"error": "Data not available"}), 500
+    
+    body = request.get_json(silent=True) or {}
+    
+    try:
+        with _write_lock:
+            new_row, version = case_store.insert_case(body)
+            event_bus.publish(CaseEvent("insert", new_row['case_id'], None, new_row, version))
+    except DuplicateCase:
+        return jsonify({"error": "Case already exists"}), 409
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    return jsonify({
+        "case": new_row,
+        "data_version": version
+    }), 201
+
+
+@app.route('/api/case/<case_id>/status', methods=['PUT', 'PATCH'])
+def update_case_status(case_id):
+    """Update a case's status (optionally marking it recovered)"""
+    
+    body = request.get_json(silent=True) or {}
     
-    return jsonify(case_detail)
+    if 'status' not in body:
+        return jsonify({"error": "Missing 'status'"}), 400
+    
+    changes = {"status": body['status']}
+    
+    # Values are type-checked by the store (400 on anything that doesn't fit)
+    if 'recovered' in body:
+        changes['recovered'] = body['recovered']
+    if 'days_to_recovery' in body:
+        changes['days_to_recovery'] = body['days_to_recovery']
+    
+    return _apply_case_update(case_id, changes)
+
+
+@app.route('/api/case/<case_id>/contact', methods=['POST'])
+def record_case_contact(case_id):
+    """Log a DCA contact: resets last contact and bumps the attempt count"""
+    
+    body = request.get_json(silent=True) or {}
+    
+    changes = {"last_contact_days_ago": 0}
+    if 'status' in body:
+        changes['status'] = body['status']
+    
+    return _apply_case_update(case_id, changes, {"contact_attempts": 1})
+
+
+# Start loading as soon as the module is imported; routes answer "warming up" until done
+if DEFERRED_LOAD:
+    threading.Thread(target=load_state, name="dca-loader", daemon=True).start()
+else:
+    load_state()
+
+startup_timings["serving_ms"] = round((time.perf_counter() - _import_started) * 1000, 1)
 
 
 if __name__ == '__main__':
@@ -427,6 +925,13 @@ if __name__ == '__main__':
     print("   • http://localhost:5000/api/charts/distribution")
     print("   • http://localhost:5000/api/charts/recovery-trend")
     print("   • http://localhost:5000/api/case/<case_id>")
+    print("   • http://localhost:5000/api/stream (Server-Sent Events)")
+    print("   • http://localhost:5000/api/shadow")
+    print("   • POST http://localhost:5000/api/cases")
+    print("   • PUT  http://localhost:5000/api/case/<case_id>/status")
+    print("   • POST http://localhost:5000/api/case/<case_id>/contact")
+    print("   • http://localhost:5000/metrics")
+    print("   • http://localhost:5000/ready")
     print("\n🌐 Open dashboard.html in browser to view UI")
     print("="*60 + "\n")
     
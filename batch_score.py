@@ -0,0 +1,266 @@
+"""
+FedEx DCA System - Batch Scoring
+Scores a whole case file (recovery probability, expected days, priority and
+recommended DCA) across a pool of worker processes, for the nightly
+full-portfolio rescore
+
+The case file is read in chunks. Each chunk is scored in a worker process
+with the RecoveryPredictor / DCAMatcher artifacts (model_artifacts.py;
+array data is memory-mapped, so workers share its pages), and the results are
+streamed to a columnar output in input order, so memory use stays bounded
+by (workers x chunk size) whatever the size of the portfolio:
+    .parquet  one row group per chunk (needs pyarrow)
+    <dir>/    part-NNNNN.npz columnar chunks (numpy only)
+
+Usage:
+    python batch_score.py data/cases_1000.csv
+    python batch_score.py data/bench/cases_10000000.csv --workers 32 --output data/scores.parquet
+    python batch_score.py data/cases_1000.csv --format npz --output data/scores
+"""
+
+import argparse
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from derived_views import priority_level
+from model_artifacts import MODEL_DIR, ArtifactError, load_model
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional: fall back to .npz chunks
+    pa = pq = None
+
+DEFAULT_CHUNKSIZE = 100000
+
+# Case columns the models read
+INPUT_COLUMNS = ["case_id", "amount", "days_overdue", "customer_avg_days_late", "assigned_dca"]
+
+# Output columns, in file order
+SCORE_COLUMNS = [
+    "case_id", "recovery_probability", "expected_days_to_recovery",
+    "priority_score", "priority", "recommended_dca"
+]
+
+# Models loaded once per worker process by _load_models
+_models = {}
+
+
+def _load_models(root, recovery_model_version, dca_matcher_version):
+    """Worker initializer: load the model artifacts into this process"""
+
+    _models["recovery_model"] = load_model("recovery_model", recovery_model_version, root)
+    _models["dca_matcher"] = load_model("dca_matcher", dca_matcher_version, root)
+
+
+def score_frame(recovery_model, dca_matcher, chunk):
+    """Score every case in a DataFrame chunk; returns {column: numpy array}"""
+
+    size = len(chunk)
+    probability = np.empty(size, dtype=np.float64)
+    days = np.empty(size, dtype=np.float64)
+    priority_score = np.empty(size, dtype=np.float64)
+    priority = []
+    recommended = []
+
+    rows = zip(
+        chunk["amount"].tolist(),
+        chunk["days_overdue"].tolist(),
+        chunk["customer_avg_days_late"].tolist(),
+        chunk["assigned_dca"].tolist()
+    )
+
+    for i, (amount, days_overdue, avg_days_late, dca) in enumerate(rows):
+        prob = recovery_model.predict_recovery_probability(amount, days_overdue, avg_days_late, dca)
+        score = recovery_model.get_priority_score(amount, days_overdue, prob)
+
+        probability[i] = prob
+        days[i] = recovery_model.predict_days_to_recovery(amount, days_overdue, prob)
+        priority_score[i] = score
+        priority.append(priority_level(score))
+        recommended.append(dca_matcher.recommend_dca(amount, days_overdue, avg_days_late))
+
+    return {
+        "case_id": chunk["case_id"].to_numpy(dtype=str),
+        "recovery_probability": probability,
+        "expected_days_to_recovery": days,
+        "priority_score": priority_score,
+        "priority": np.array(priority, dtype=str),
+        "recommended_dca": np.array(recommended, dtype=str)
+    }
+
+
+def _score_chunk(chunk):
+    """Worker task: score one chunk with this process's models"""
+
+    scores = score_frame(_models["recovery_model"], _models["dca_matcher"], chunk)
+
+    # Accuracy counters (>60% predicted probability = predicted recovery)
+    if "recovered" in chunk:
+        actual = chunk["recovered"].to_numpy()
+        scores["_correct"] = int(((scores["recovery_probability"] > 60) == (actual == 1)).sum())
+
+    return scores
+
+
+class ParquetSink:
+    """Streams scored chunks into one Parquet file, one row group per chunk"""
+
+    def __init__(self, path):
+        self.path = path
+        self._writer = None
+
+    def write(self, scores):
+        table = pa.table({column: scores[column] for column in SCORE_COLUMNS})
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.path, table.schema, compression="snappy")
+        self._writer.write_table(table)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+class NpzSink:
+    """Streams scored chunks into <dir>/part-NNNNN.npz columnar files"""
+
+    def __init__(self, path):
+        self.path = path
+        self.parts = 0
+        os.makedirs(path, exist_ok=True)
+        for name in os.listdir(path):
+            if name.startswith("part-") and name.endswith(".npz"):
+                os.remove(os.path.join(path, name))
+
+    def write(self, scores):
+        self.parts += 1
+        np.savez_compressed(
+            os.path.join(self.path, f"part-{self.parts:05d}.npz"),
+            **{column: scores[column] for column in SCORE_COLUMNS}
+        )
+
+    def close(self):
+        pass
+
+
+def open_sink(path, fmt):
+    """
+    Output writer for the requested format. "auto" follows the output path's
+    extension, or picks parquet when pyarrow is installed and no path is given
+    """
+
+    if fmt == "auto":
+        if path:
+            fmt = "parquet" if path.endswith(".parquet") else "npz"
+        else:
+            fmt = "parquet" if pq is not None else "npz"
+
+    if fmt == "parquet":
+        if pq is None:
+            raise SystemExit("❌ Parquet output needs pyarrow (pip install pyarrow) - use --format npz")
+        path = path or "data/scores.parquet"
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        return ParquetSink(path)
+
+    return NpzSink(path or "data/scores")
+
+
+def run(input_path, output=None, fmt="auto", workers=None, chunksize=DEFAULT_CHUNKSIZE,
+        model_dir=MODEL_DIR, recovery_model_version=None, dca_matcher_version=None):
+    """Score input_path into output; returns run statistics"""
+
+    workers = workers or os.cpu_count() or 1
+
+    # Fail fast in this process rather than in every worker
+    for name, version in (("recovery_model", recovery_model_version), ("dca_matcher", dca_matcher_version)):
+        load_model(name, version, model_dir)
+
+    sink = open_sink(output, fmt)
+
+    header = pd.read_csv(input_path, nrows=0).columns
+    columns = INPUT_COLUMNS + (["recovered"] if "recovered" in header else [])
+
+    started = time.perf_counter()
+    rows = correct = chunks = 0
+    pending = deque()
+
+    def drain():
+        # Write the oldest chunk first so output keeps input order
+        nonlocal rows, correct, chunks
+        scores = pending.popleft().result()
+        sink.write(scores)
+        rows += len(scores["case_id"])
+        correct += scores.get("_correct", 0)
+        chunks += 1
+        if chunks % 10 == 0:
+            elapsed = time.perf_counter() - started
+            print(f"   ⏳ {rows:,} rows | {rows / elapsed:,.0f} rows/s")
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_load_models,
+                             initargs=(model_dir, recovery_model_version, dca_matcher_version)) as pool:
+        try:
+            for chunk in pd.read_csv(input_path, usecols=columns, chunksize=chunksize):
+                # At most two chunks per worker in flight bounds memory
+                if len(pending) >= workers * 2:
+                    drain()
+                pending.append(pool.submit(_score_chunk, chunk))
+
+            while pending:
+                drain()
+        finally:
+            sink.close()
+
+    elapsed = time.perf_counter() - started
+    stats = {
+        "rows": rows,
+        "chunks": chunks,
+        "workers": workers,
+        "seconds": round(elapsed, 2),
+        "rows_per_second": round(rows / elapsed) if elapsed else None,
+        "output": sink.path
+    }
+    if "recovered" in columns and rows:
+        stats["accuracy"] = round(correct / rows, 4)
+
+    return stats
+
+
+def main():
+    """CLI entry point"""
+
+    parser = argparse.ArgumentParser(description="Score a FedEx DCA case file across worker processes")
+    parser.add_argument("input", nargs="?", default="data/cases_1000.csv", help="case CSV to score")
+    parser.add_argument("--output", default=None,
+                        help="output path (default: data/scores.parquet or data/scores/)")
+    parser.add_argument("--format", choices=["auto", "parquet", "npz"], default="auto",
+                        help="auto = from the --output extension, else parquet when pyarrow is installed")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE, help="rows per chunk")
+    parser.add_argument("--model-dir", default=MODEL_DIR, help="model artifact directory")
+    parser.add_argument("--recovery-model-version", default=None, help="artifact version (default: CURRENT)")
+    parser.add_argument("--dca-matcher-version", default=None, help="artifact version (default: CURRENT)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        raise SystemExit(f"❌ {args.input} not found - run generate_data.py first")
+
+    print(f"🧮 Scoring {args.input} ({args.workers or os.cpu_count()} workers, {args.chunksize:,} rows/chunk)...")
+    try:
+        stats = run(args.input, args.output, args.format, args.workers, args.chunksize,
+                    args.model_dir, args.recovery_model_version, args.dca_matcher_version)
+    except (FileNotFoundError, ArtifactError) as e:
+        raise SystemExit(f"❌ Models not available ({e}) - run train_model.py first")
+
+    print(f"   ✅ Scored {stats['rows']:,} cases in {stats['seconds']:.1f}s "
+          f"({stats['rows_per_second']:,} rows/s) -> {stats['output']}")
+    if "accuracy" in stats:
+        print(f"   Model Accuracy: {stats['accuracy']*100:.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,498 @@
+"""
+FedEx DCA System - Benchmark Suite
+Times every API endpoint and model function against generated datasets
+and writes machine-readable JSON so runs can be compared across commits
+
+Usage:
+    python benchmark.py                          # 1k and 100k cases
+    python benchmark.py --sizes 1000 1000000 10000000
+    python benchmark.py --output bench.json --compare previous.json
+"""
+
+import argparse
+import atexit
+import gc
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+DEFAULT_SIZES = [1000, 100000]
+ALL_SIZES = [1000, 100000, 1000000, 10000000]
+DATASET_DIR = "data/bench"
+
+# Seconds to wait for app.py's background load before giving up
+READY_TIMEOUT = 300
+
+# Request recording may add at most this share of the /health p50
+REQUEST_OVERHEAD_TARGET_PCT = 1.0
+
+# Routes exercised through the Flask test client ({case_id} is filled in per dataset)
+ROUTES = [
+    "/",
+    "/api/metrics",
+    "/api/cases",
+    "/api/cases?limit=20&priority=high",
+    "/api/cases?status=Stalled&search=Corp",
+    "/api/alerts",
+    "/api/dcas",
+    "/api/charts/distribution",
+    "/api/charts/recovery-trend",
+    "/api/case/{case_id}"
+]
+
+
+def dataset_path(num_cases):
+    """Path of a cached benchmark dataset, generating it with generate_data if needed"""
+
+    import generate_data
+
+    os.makedirs(DATASET_DIR, exist_ok=True)
+    path = os.path.join(DATASET_DIR, f"cases_{num_cases}.csv")
+
+    if not os.path.exists(path):
+        print(f"   🔄 Generating {num_cases:,} cases -> {path}")
+        # Re-seed so every size is reproducible on its own
+        np.random.seed(42)
+        generate_data.random.seed(42)
+        generate_data.generate_cases(num_cases).to_csv(path, index=False)
+
+    return path
+
+
+def summarise(samples):
+    """Latency percentiles (ms) and throughput for a list of durations in seconds"""
+
+    ms = np.array(samples) * 1000
+    total = float(np.sum(samples))
+
+    return {
+        "count": len(samples),
+        "mean_ms": round(float(ms.mean()), 4),
+        "p50_ms": round(float(np.percentile(ms, 50)), 4),
+        "p90_ms": round(float(np.percentile(ms, 90)), 4),
+        "p99_ms": round(float(np.percentile(ms, 99)), 4),
+        "max_ms": round(float(ms.max()), 4),
+        "throughput_per_s": round(len(samples) / total, 2) if total else None
+    }
+
+
+def time_calls(fn, iterations, warmup=2):
+    """Call fn repeatedly and return per-call durations in seconds"""
+
+    for _ in range(warmup):
+        fn()
+
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+
+    return samples
+
+
+# Run in a fresh interpreter: import app, then wait for the background load
+_STARTUP_SCRIPT = """
+import json, time
+t0 = time.perf_counter()
+import app
+serving = time.perf_counter() - t0
+try:
+    ready = app.wait_until_ready(%(timeout)s)
+except RuntimeError as e:
+    print(json.dumps({"error": str(e)}))
+else:
+    if ready:
+        print(json.dumps({"serving": serving, "ready": time.perf_counter() - t0}))
+    else:
+        print(json.dumps({"error": "not ready after %(timeout)s s"}))
+"""
+
+
+def measure_startup(repeats=3):
+    """Import-to-serving and import-to-ready times for app.py in fresh interpreters"""
+
+    serving, ready = [], []
+    error = "app.py failed to import"
+    for _ in range(repeats):
+        output = subprocess.run(
+            [sys.executable, "-c", _STARTUP_SCRIPT % {"timeout": READY_TIMEOUT}],
+            capture_output=True, text=True, check=False
+        ).stdout.strip().splitlines()
+        if not output:
+            continue
+        timings = json.loads(output[-1])
+        if "error" in timings:
+            error = timings["error"]
+            continue
+        serving.append(timings["serving"])
+        ready.append(timings["ready"])
+
+    if not serving:
+        return {"error": error}
+
+    import app
+    stats = {"serving": summarise(serving), "ready": summarise(ready)}
+    stats["target_ms"] = app.STARTUP_TARGET_MS
+    stats["target_met"] = stats["serving"]["p50_ms"] <= app.STARTUP_TARGET_MS
+
+    return stats
+
+
+def install_dataset(app_module, df, partition_key=None):
+    """Point the running app at a benchmark dataset, with its own recovery history"""
+
+    from case_store import DataFrameCaseStore, PartitionedCaseStore
+    from recovery_history import RecoveryHistory, backfill
+
+    try:
+        ready = app_module.wait_until_ready(READY_TIMEOUT)
+    except RuntimeError as e:
+        raise SystemExit(f"❌ {e}")
+    if not ready:
+        raise SystemExit(f"❌ app.py not ready after {READY_TIMEOUT} s")
+
+    if partition_key:
+        store = PartitionedCaseStore.from_dataframe(df, partition_key)
+    else:
+        store = DataFrameCaseStore(df)
+
+    # Recovery trends should describe this dataset, and benchmark writes must
+    # stay out of the real history
+    directory = tempfile.mkdtemp(prefix="dca-bench-history-")
+    atexit.register(shutil.rmtree, directory, ignore_errors=True)
+    history = RecoveryHistory(directory)
+    backfill(history, store)
+
+    app_module.use_store(store, history)
+
+
+def bench_routes(client, df, iterations):
+    """Latency percentiles and throughput for every API route"""
+
+    case_id = df["case_id"].iloc[len(df) // 2]
+    results = {}
+
+    for route in ROUTES:
+        url = route.format(case_id=case_id)
+        status = {}
+
+        def call():
+            response = client.get(url)
+            status[response.status_code] = status.get(response.status_code, 0) + 1
+
+        stats = summarise(time_calls(call, iterations))
+        stats["status_codes"] = {str(code): count for code, count in status.items()}
+        results[route] = stats
+        print(f"      {route:<40} p50 {stats['p50_ms']:>9.2f} ms | p99 {stats['p99_ms']:>9.2f} ms")
+
+    return results
+
+
+def bench_models(recovery_model, dca_matcher, df, iterations, batch_rows):
+    """Per-call and batch timings for RecoveryPredictor and DCAMatcher"""
+
+    results = {}
+    row = df.iloc[len(df) // 2]
+    batch = df.head(batch_rows)
+
+    amount = row["amount"]
+    days = row["days_overdue"]
+    avg_late = row["customer_avg_days_late"]
+    dca = row["assigned_dca"]
+
+    if recovery_model is not None:
+        prob = recovery_model.predict_recovery_probability(amount, days, avg_late, dca)
+
+        per_call = {
+            "predict_recovery_probability": lambda: recovery_model.predict_recovery_probability(amount, days, avg_late, dca),
+            "predict_days_to_recovery": lambda: recovery_model.predict_days_to_recovery(amount, days, prob),
+            "get_priority_score": lambda: recovery_model.get_priority_score(amount, days, prob)
+        }
+        for name, fn in per_call.items():
+            results[f"RecoveryPredictor.{name}"] = summarise(time_calls(fn, iterations * 100))
+
+        def score_batch():
+            for amt, d, late, assigned in zip(batch["amount"], batch["days_overdue"],
+                                              batch["customer_avg_days_late"], batch["assigned_dca"]):
+                p = recovery_model.predict_recovery_probability(amt, d, late, assigned)
+                recovery_model.predict_days_to_recovery(amt, d, p)
+                recovery_model.get_priority_score(amt, d, p)
+
+        stats = summarise(time_calls(score_batch, 3, warmup=1))
+        stats["rows"] = len(batch)
+        stats["rows_per_s"] = round(len(batch) / (stats["mean_ms"] / 1000), 1) if stats["mean_ms"] else None
+        results["RecoveryPredictor.batch_score"] = stats
+
+    if dca_matcher is not None:
+        results["DCAMatcher.recommend_dca"] = summarise(
+            time_calls(lambda: dca_matcher.recommend_dca(amount, days, avg_late), iterations * 100)
+        )
+        results["DCAMatcher.get_dca_rankings"] = summarise(
+            time_calls(dca_matcher.get_dca_rankings, iterations * 100)
+        )
+        results["DCAMatcher.fit_profiles"] = summarise(
+            time_calls(lambda: dca_matcher.fit_profiles(df), 3, warmup=1)
+        )
+
+        def match_batch():
+            for amt, d, late in zip(batch["amount"], batch["days_overdue"], batch["customer_avg_days_late"]):
+                dca_matcher.recommend_dca(amt, d, late)
+
+        stats = summarise(time_calls(match_batch, 3, warmup=1))
+        stats["rows"] = len(batch)
+        stats["rows_per_s"] = round(len(batch) / (stats["mean_ms"] / 1000), 1) if stats["mean_ms"] else None
+        results["DCAMatcher.batch_recommend"] = stats
+
+    for name, stats in results.items():
+        print(f"      {name:<40} mean {stats['mean_ms']:>9.4f} ms")
+
+    return results
+
+
+def bench_instrumentation(client, recovery_model, df, batch_rows, iterations, rounds=5):
+    """
+    Cost of the /metrics instrumentation: InstrumentedModel per model call
+    (vs the raw model) and request recording per request (vs a bare Flask app)
+    """
+
+    from flask import Flask
+
+    import instrumentation
+
+    results = {}
+
+    if recovery_model is not None:
+        batch = df.head(batch_rows)
+        rows = list(zip(batch["amount"].tolist(), batch["days_overdue"].tolist(),
+                        batch["customer_avg_days_late"].tolist(), batch["assigned_dca"].tolist()))
+
+        def score_rows(model):
+            def run():
+                for amount, days, late, dca in rows:
+                    prob = model.predict_recovery_probability(amount, days, late, dca)
+                    model.predict_days_to_recovery(amount, days, prob)
+                    model.get_priority_score(amount, days, prob)
+            return run
+
+        raw = instrumentation.uninstrumented(recovery_model)
+        wrapped = instrumentation.instrument_model(raw, "recovery_model")
+        raw_s, wrapped_s = [], []
+        for _ in range(rounds):
+            raw_s += time_calls(score_rows(raw), 3, warmup=1)
+            wrapped_s += time_calls(score_rows(wrapped), 3, warmup=1)
+        instrumentation.flush_background()
+
+        calls = len(rows) * 3
+        raw_us = min(raw_s) / calls * 1e6
+        wrapped_us = min(wrapped_s) / calls * 1e6
+        results["model_call"] = {
+            "calls": calls,
+            "raw_us": round(raw_us, 4),
+            "instrumented_us": round(wrapped_us, 4),
+            "overhead_us": round(wrapped_us - raw_us, 4),
+            "overhead_pct": round((wrapped_us / raw_us - 1) * 100, 1)
+        }
+
+    def ping_client(instrumented):
+        bench_app = Flask("instrumentation_bench")
+        if instrumented:
+            instrumentation.init_app(bench_app)
+
+        @bench_app.route("/ping")
+        def ping():
+            return "ok"
+
+        return bench_app.test_client()
+
+    # Alternate the two apps request by request so drift hits both equally
+    bare, instrumented = ping_client(False), ping_client(True)
+    samples = {"bare": [], "instrumented": []}
+    for _ in range(20):
+        bare.get("/ping")
+        instrumented.get("/ping")
+    for _ in range(iterations * 100):
+        for name, ping_app in (("bare", bare), ("instrumented", instrumented)):
+            start = time.perf_counter()
+            ping_app.get("/ping")
+            samples[name].append(time.perf_counter() - start)
+
+    bare_ms = summarise(samples["bare"])["p50_ms"]
+    instrumented_ms = summarise(samples["instrumented"])["p50_ms"]
+    health_ms = summarise(time_calls(lambda: client.get("/health"), iterations * 20, warmup=20))["p50_ms"]
+    overhead_ms = instrumented_ms - bare_ms
+    overhead_pct = round(overhead_ms / health_ms * 100, 2) if health_ms else None
+    results["request"] = {
+        "bare_p50_ms": bare_ms,
+        "instrumented_p50_ms": instrumented_ms,
+        "overhead_us": round(overhead_ms * 1000, 2),
+        "health_p50_ms": health_ms,
+        "overhead_pct_of_health": overhead_pct,
+        "meets_target": overhead_pct is not None and overhead_pct < REQUEST_OVERHEAD_TARGET_PCT
+    }
+
+    return results
+
+
+def bench_memory(num_cases):
+    """Memory footprint of loading a dataset"""
+
+    path = dataset_path(num_cases)
+
+    gc.collect()
+    tracemalloc.start()
+    df = pd.read_csv(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return df, {
+        "dataframe_bytes": int(df.memory_usage(deep=True).sum()),
+        "load_peak_bytes": int(peak)
+    }
+
+
+def git_commit():
+    """Current commit hash, if running inside the git checkout"""
+
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, previous_path, threshold=0.10):
+    """Print timings that regressed by more than threshold vs a previous run"""
+
+    with open(previous_path) as f:
+        previous = json.load(f)
+
+    print(f"\n🔍 Comparing against {previous_path} (commit {previous.get('commit')})")
+    regressions = 0
+
+    for size, result in current["datasets"].items():
+        before = previous.get("datasets", {}).get(size)
+        if before is None:
+            continue
+        for section in ("routes", "models"):
+            for name, stats in result[section].items():
+                old = before.get(section, {}).get(name)
+                if not old or not old.get("p50_ms"):
+                    continue
+                change = (stats["p50_ms"] - old["p50_ms"]) / old["p50_ms"]
+                if change > threshold:
+                    regressions += 1
+                    print(f"   ⚠️  [{size}] {name}: p50 {old['p50_ms']:.3f} -> {stats['p50_ms']:.3f} ms (+{change*100:.0f}%)")
+
+    if regressions == 0:
+        print("   ✅ No regressions above threshold")
+
+    return regressions
+
+
+def main():
+    """Run the benchmark suite"""
+
+    parser = argparse.ArgumentParser(description="Benchmark the FedEx DCA API and models")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help=f"dataset sizes to run (full suite: {' '.join(map(str, ALL_SIZES))})")
+    parser.add_argument("--iterations", type=int, default=20, help="requests per route")
+    parser.add_argument("--batch-rows", type=int, default=10000, help="rows per model batch timing")
+    parser.add_argument("--output", default="bench_results.json", help="JSON results file")
+    parser.add_argument("--compare", default=None, help="previous results file to diff against")
+    parser.add_argument("--partition-key", default=None,
+                        help="serve each dataset from a PartitionedCaseStore split on this column")
+    args = parser.parse_args()
+
+    print("⏱️  FedEx DCA Benchmark Suite")
+    print("=" * 60)
+
+    results = {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "iterations": args.iterations,
+        "partition_key": args.partition_key,
+        "datasets": {}
+    }
+
+    print("\n🚀 Startup time (import app.py)...")
+    results["startup"] = startup = measure_startup()
+    if "error" in startup:
+        print(f"   ❌ {startup['error']}")
+    else:
+        status = "✅" if startup["target_met"] else "⚠️ "
+        print(f"   {status} serving p50 {startup['serving']['p50_ms']:.0f} ms "
+              f"(target {startup['target_ms']} ms) | ready p50 {startup['ready']['p50_ms']:.0f} ms")
+
+    import app as app_module
+    from instrumentation import uninstrumented
+    client = app_module.app.test_client()
+
+    for size in args.sizes:
+        print(f"\n📊 Dataset: {size:,} cases")
+        df, memory = bench_memory(size)
+        install_dataset(app_module, df, args.partition_key)
+
+        print("   🌐 Routes")
+        routes = bench_routes(client, df, args.iterations)
+
+        print("   🤖 Models")
+        # Time the models themselves, not the /metrics proxy around them
+        models = bench_models(
+            uninstrumented(app_module.recovery_model), uninstrumented(app_module.dca_matcher), df,
+            args.iterations, min(args.batch_rows, len(df))
+        )
+
+        results["datasets"][str(size)] = {
+            "memory": memory,
+            "routes": routes,
+            "models": models
+        }
+
+    print("\n📏 Instrumentation overhead (/metrics)")
+    results["instrumentation"] = overhead = bench_instrumentation(
+        client, app_module.recovery_model, df, min(args.batch_rows, len(df)), args.iterations
+    )
+    if "model_call" in overhead:
+        model_call = overhead["model_call"]
+        print(f"   model call: {model_call['raw_us']:.3f} -> {model_call['instrumented_us']:.3f} us "
+              f"(+{model_call['overhead_us']:.3f} us, {model_call['overhead_pct']:+.1f}% per call, score cache misses only)")
+    request_cost = overhead["request"]
+    marker = "✅" if request_cost["meets_target"] else "⚠️ "
+    print(f"   request:    +{request_cost['overhead_us']:.1f} us "
+          f"({request_cost['overhead_pct_of_health']}% of /health p50 {request_cost['health_p50_ms']:.3f} ms) "
+          f"{marker} target < {REQUEST_OVERHEAD_TARGET_PCT:g}%")
+
+    if resource is not None:
+        results["max_rss_kb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\n💾 Results written to {args.output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
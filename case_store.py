@@ -0,0 +1,1232 @@
+"""
+FedEx DCA System - Case Store
+Pluggable storage backends for the case table:
+- DataFrameCaseStore: in-memory pandas DataFrame (the original behaviour)
+- SQLiteCaseStore: on-disk SQLite database (WAL mode, bounded connection
+  pool, indexed columns) so the dataset can outgrow RAM
+- PartitionedCaseStore: one child store per partition key value, queried in
+  parallel with the results merged
+
+Both backends share one query interface, so filters, lookups and aggregates
+are pushed down into SQL when SQLite is used.
+
+Build a SQLite store from a CSV:
+    python case_store.py import data/cases_1000.csv data/cases.db
+"""
+
+import heapq
+import json
+import math
+import numbers
+import os
+import queue
+import re
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import date
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+
+from train_model import AGE_BUCKETS, AMOUNT_BANDS, profile_cells
+
+# Column name -> SQLite type
+CASE_COLUMNS = {
+    "case_id": "TEXT PRIMARY KEY",
+    "customer_name": "TEXT",
+    "amount": "REAL",
+    "days_overdue": "INTEGER",
+    "invoice_date": "TEXT",
+    "industry": "TEXT",
+    "state": "TEXT",
+    "customer_avg_days_late": "REAL",
+    "customer_late_count_24m": "INTEGER",
+    "assigned_dca": "TEXT",
+    "status": "TEXT",
+    "last_contact_days_ago": "INTEGER",
+    "contact_attempts": "INTEGER",
+    "recovered": "INTEGER",
+    "days_to_recovery": "REAL"
+}
+
+INDEXED_COLUMNS = ["status", "assigned_dca", "days_overdue", "amount"]
+
+# Columns the API filters case-insensitively ("ieq"); they get a COLLATE NOCASE
+# index as well, so those filters are index lookups rather than table scans
+NOCASE_COLUMNS = ["status", "assigned_dca", "state"]
+
+# SQLite connections per store, how long a caller waits for a free one (s)
+# and each connection's page cache (KB)
+POOL_SIZE = 8
+POOL_TIMEOUT = 30
+CACHE_KB = 16384
+
+# Columns matched by the free-text search
+SEARCH_COLUMNS = ["customer_name", "case_id", "assigned_dca"]
+
+# Columns that may be changed through update_case
+UPDATABLE_COLUMNS = {
+    "status", "assigned_dca", "last_contact_days_ago", "contact_attempts",
+    "recovered", "days_to_recovery"
+}
+
+VALID_STATUSES = ["Active", "Promised", "Stalled", "Disputed"]
+
+# Columns a write may leave empty, and TEXT columns holding YYYY-MM-DD dates
+NULLABLE_COLUMNS = {"days_to_recovery"}
+DATE_COLUMNS = {"invoice_date"}
+
+# Filter operators: (column, op, value)
+FILTER_OPS = {"==", "!=", ">", ">=", "<", "<=", "ieq"}
+
+# Thresholds used by the dashboard metrics
+CRITICAL_AMOUNT = 50000
+CRITICAL_DAYS = 80
+
+
+class CaseNotFound(KeyError):
+    """Raised when an update targets a case_id that does not exist"""
+
+
+class DuplicateCase(ValueError):
+    """Raised when an insert reuses an existing case_id"""
+
+
+class CaseStore:
+    """
+    Interface shared by all case storage backends.
+    Rows are returned as plain dicts keyed by CASE_COLUMNS.
+    """
+
+    def __len__(self):
+        raise NotImplementedError
+
+    @property
+    def version(self):
+        """Data version; bumped on every write so derived views can be cached against it"""
+        raise NotImplementedError
+
+    def snapshot(self):
+        """
+        Context manager yielding the current version; reads made inside it
+        see the store as of that version (no write lands in between)
+        """
+        raise NotImplementedError
+
+    def is_empty(self):
+        """True if the store holds no cases (cheap, unlike len() on SQL stores)"""
+        raise NotImplementedError
+
+    def find_cases(self, filters=(), search=None, order_by=None, descending=False, limit=None):
+        """Cases matching every (column, op, value) filter and the search text"""
+        raise NotImplementedError
+
+    def iter_cases(self, filters=(), batch_size=10000):
+        """
+        Cases matching every filter, as lists of up to batch_size rows read
+        as they are consumed (for offline jobs that must not load the table)
+        """
+        raise NotImplementedError
+
+    def get_case(self, case_id):
+        """One case as a dict, or None"""
+        raise NotImplementedError
+
+    def case_ids(self):
+        """Every case_id, in insertion order"""
+        raise NotImplementedError
+
+    def update_case(self, case_id, changes=None, increments=None):
+        """
+        Set and/or increment columns of one case.
+        Returns (old_row, new_row, version) where version is the store version
+        the write produced; raises CaseNotFound / ValueError.
+        """
+        raise NotImplementedError
+
+    def insert_case(self, row):
+        """
+        Add a new case. Returns (new_row, version); raises DuplicateCase / ValueError.
+        """
+        raise NotImplementedError
+
+    def summary(self):
+        """Portfolio totals used by /api/metrics"""
+        raise NotImplementedError
+
+    def status_counts(self):
+        """{status: count}, largest first"""
+        raise NotImplementedError
+
+    def profile_cells(self):
+        """(dca, band, bucket, *totals) cells for DCAMatcher.load_profile_cells"""
+        raise NotImplementedError
+
+    def to_dataframe(self):
+        """The whole table as a DataFrame (for offline jobs; avoid on large stores)"""
+        raise NotImplementedError
+
+
+def coerce_value(column, value):
+    """
+    value converted to the column's type (numeric strings are accepted);
+    raises ValueError naming the column if it does not fit
+    """
+
+    sql_type = CASE_COLUMNS[column].split()[0]
+
+    if value is None:
+        if column in NULLABLE_COLUMNS:
+            return None
+        raise ValueError(f"'{column}' is required")
+
+    if sql_type == "TEXT":
+        if not isinstance(value, str) or not value.strip():
+            raise ValueError(f"'{column}' must be a non-empty string, got {value!r}")
+        if column in DATE_COLUMNS:
+            try:
+                date.fromisoformat(value)
+            except ValueError:
+                raise ValueError(f"'{column}' must be a YYYY-MM-DD date, got {value!r}") from None
+        if column == "status" and value not in VALID_STATUSES:
+            raise ValueError(f"Invalid status '{value}' (expected one of {', '.join(VALID_STATUSES)})")
+        return value
+
+    if column == "recovered":
+        if isinstance(value, numbers.Real) and value in (0, 1):
+            return int(value)
+        raise ValueError(f"'recovered' must be true/false or 0/1, got {value!r}")
+
+    if isinstance(value, bool) or not isinstance(value, (numbers.Real, str)):
+        raise ValueError(f"'{column}' must be a number, got {value!r}")
+    try:
+        number = float(value)
+    except ValueError:
+        raise ValueError(f"'{column}' must be a number, got {value!r}") from None
+    if not math.isfinite(number) or number < 0:
+        raise ValueError(f"'{column}' must be a non-negative number, got {value!r}")
+
+    if sql_type == "INTEGER":
+        if not number.is_integer():
+            raise ValueError(f"'{column}' must be a whole number, got {value!r}")
+        return int(number)
+    return number
+
+
+def _check_update(changes, increments):
+    """Validate the columns an update touches and coerce the new values"""
+
+    changes = dict(changes or {})
+    increments = dict(increments or {})
+
+    unknown = (set(changes) | set(increments)) - UPDATABLE_COLUMNS
+    if unknown:
+        raise ValueError(f"Cannot update column(s): {', '.join(sorted(unknown))}")
+
+    changes = {column: coerce_value(column, value) for column, value in changes.items()}
+
+    for column, delta in increments.items():
+        if CASE_COLUMNS[column].split()[0] not in ("INTEGER", "REAL"):
+            raise ValueError(f"Cannot increment text column '{column}'")
+        if isinstance(delta, bool) or not isinstance(delta, numbers.Real) or not math.isfinite(delta):
+            raise ValueError(f"Increment for '{column}' must be a number, got {delta!r}")
+
+    return changes, increments
+
+
+def _check_insert(row):
+    """Validate a new case record and coerce it to the column types"""
+
+    if not isinstance(row, dict):
+        raise ValueError("A case must be an object of column values")
+
+    optional = {"days_to_recovery", "recovered"}
+    missing = [column for column in CASE_COLUMNS if column not in row and column not in optional]
+    if missing:
+        raise ValueError(f"Missing column(s): {', '.join(missing)}")
+
+    unknown = set(row) - set(CASE_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown column(s): {', '.join(sorted(unknown))}")
+
+    record = {column: row.get(column) for column in CASE_COLUMNS}
+    if record["recovered"] is None:
+        record["recovered"] = 0
+    return {column: coerce_value(column, value) for column, value in record.items()}
+
+
+def row_matches(row, filters):
+    """Evaluate (column, op, value) filters against a single row dict"""
+
+    for column, op, value in filters:
+        field = row.get(column)
+        if op == "ieq":
+            if field is None or str(field).lower() != str(value).lower():
+                return False
+            continue
+        if op == "==":
+            ok = field == value
+        elif op == "!=":
+            ok = field != value
+        elif field is None:
+            ok = False
+        elif op == ">":
+            ok = field > value
+        elif op == ">=":
+            ok = field >= value
+        elif op == "<":
+            ok = field < value
+        else:
+            ok = field <= value
+        if not ok:
+            return False
+
+    return True
+
+
+def is_critical(row):
+    """The /api/metrics "critical case" rule for a single row"""
+    return row["amount"] > CRITICAL_AMOUNT and row["days_overdue"] > CRITICAL_DAYS
+
+
+def _check_filters(filters):
+    for column, op, _ in filters:
+        if column not in CASE_COLUMNS:
+            raise ValueError(f"Unknown column '{column}'")
+        if op not in FILTER_OPS:
+            raise ValueError(f"Unknown filter operator '{op}'")
+
+
+def _native(value):
+    """NaN -> None so rows serialise cleanly"""
+    if isinstance(value, float) and value != value:
+        return None
+    return value
+
+
+class DataFrameCaseStore(CaseStore):
+    """Case table held in memory as a pandas DataFrame"""
+
+    def __init__(self, df=None):
+        self.df = df.reset_index(drop=True) if df is not None else pd.DataFrame(columns=list(CASE_COLUMNS))
+        self._positions = {case_id: i for i, case_id in enumerate(self.df["case_id"])} if len(self.df) else {}
+        self._version = 1
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_csv(cls, path):
+        return cls(pd.read_csv(path))
+
+    def __len__(self):
+        return len(self.df)
+
+    @property
+    def version(self):
+        return self._version
+
+    @contextmanager
+    def snapshot(self):
+        # Writers take the same lock, so the frame stays put until the block exits
+        with self._lock:
+            yield self._version
+
+    def is_empty(self):
+        return self.df.empty
+
+    def _mask(self, filters, search):
+        df = self.df
+        mask = pd.Series(True, index=df.index)
+
+        for column, op, value in filters:
+            series = df[column]
+            if op == "==":
+                mask &= series == value
+            elif op == "!=":
+                mask &= series != value
+            elif op == ">":
+                mask &= series > value
+            elif op == ">=":
+                mask &= series >= value
+            elif op == "<":
+                mask &= series < value
+            elif op == "<=":
+                mask &= series <= value
+            elif op == "ieq":
+                mask &= series.str.lower() == str(value).lower()
+
+        if search:
+            matches = pd.Series(False, index=df.index)
+            for column in SEARCH_COLUMNS:
+                matches |= df[column].str.contains(search, case=False, na=False, regex=False)
+            mask &= matches
+
+        return mask
+
+    def find_cases(self, filters=(), search=None, order_by=None, descending=False, limit=None):
+        _check_filters(filters)
+        if self.df.empty:
+            return []
+
+        result = self.df[self._mask(filters, search)] if filters or search else self.df
+        if order_by:
+            # Missing values first ascending and last descending, as SQLite orders NULLs
+            result = result.sort_values(order_by, ascending=not descending, kind="stable",
+                                        na_position="last" if descending else "first")
+        if limit is not None:
+            result = result.head(limit)
+
+        return [{k: _native(v) for k, v in row.items()} for row in result.to_dict("records")]
+
+    def iter_cases(self, filters=(), batch_size=10000):
+        _check_filters(filters)
+        if self.df.empty:
+            return
+
+        result = self.df[self._mask(filters, None)] if filters else self.df
+        for start in range(0, len(result), batch_size):
+            batch = result.iloc[start:start + batch_size]
+            yield [{k: _native(v) for k, v in row.items()} for row in batch.to_dict("records")]
+
+    def get_case(self, case_id):
+        position = self._positions.get(case_id)
+        if position is None:
+            return None
+        return {k: _native(v) for k, v in self.df.iloc[position].to_dict().items()}
+
+    def case_ids(self):
+        return self.df["case_id"].tolist()
+
+    def update_case(self, case_id, changes=None, increments=None):
+        changes, increments = _check_update(changes, increments)
+
+        with self._lock:
+            position = self._positions.get(case_id)
+            if position is None:
+                raise CaseNotFound(case_id)
+
+            old_row = self.get_case(case_id)
+            new_row = dict(old_row)
+            new_row.update(changes)
+            for column, delta in increments.items():
+                new_row[column] = (new_row[column] or 0) + delta
+
+            for column in set(changes) | set(increments):
+                self.df.at[position, column] = new_row[column]
+
+            self._version += 1
+            version = self._version
+
+        return old_row, new_row, version
+
+    def insert_case(self, row):
+        # Appending copies the frame; use the SQLite store for write-heavy workloads
+        record = _check_insert(row)
+
+        with self._lock:
+            if record["case_id"] in self._positions:
+                raise DuplicateCase(record["case_id"])
+
+            addition = pd.DataFrame([record], columns=list(CASE_COLUMNS))
+            if self.df.empty:
+                self.df = addition
+            else:
+                # Frame dtypes, so an empty days_to_recovery is NaN, not an all-NA object column
+                addition = addition.astype(self.df.dtypes.to_dict())
+                self.df = pd.concat([self.df, addition], ignore_index=True)
+            self._positions[record["case_id"]] = len(self.df) - 1
+
+            self._version += 1
+            version = self._version
+
+        return record, version
+
+    def summary(self):
+        df = self.df
+        if df.empty:
+            return {"cases": 0, "total_amount": 0.0, "critical_cases": 0,
+                    "recovered_amount": 0.0, "recovered_cases": 0, "recovery_rate": 0.0}
+
+        return {
+            "cases": len(df),
+            "total_amount": float(df["amount"].sum()),
+            "critical_cases": int(((df["amount"] > CRITICAL_AMOUNT) & (df["days_overdue"] > CRITICAL_DAYS)).sum()),
+            "recovered_amount": float(df.loc[df["recovered"] == 1, "amount"].sum()),
+            "recovered_cases": int((df["recovered"] == 1).sum()),
+            "recovery_rate": float(df["recovered"].mean())
+        }
+
+    def status_counts(self):
+        return {status: int(count) for status, count in self.df["status"].value_counts().items()}
+
+    def profile_cells(self):
+        return profile_cells(self.df)
+
+    def to_dataframe(self):
+        return self.df
+
+
+def _band_sql(column, buckets):
+    """SQL CASE expression mirroring train_model's [low, high) buckets"""
+
+    clauses = " ".join(
+        f"WHEN {column} < {high} THEN '{label}'"
+        for label, _, high in buckets[:-1]
+    )
+    return f"CASE {clauses} ELSE '{buckets[-1][0]}' END"
+
+
+class SQLiteCaseStore(CaseStore):
+    """
+    Case table in a SQLite database.
+    Operations check a connection out of a small bounded pool (reset after a
+    fork); WAL mode lets readers run alongside the single writer.
+    """
+
+    def __init__(self, path, pool_size=POOL_SIZE):
+        self.path = path
+        self.pool_size = pool_size
+        self._pool_lock = threading.Lock()
+        self._pinned = threading.local()
+        self._reset_pool()
+        self._create_schema()
+
+    # -- connections ---------------------------------------------------------
+
+    def _connect(self):
+        # Pooled connections move between threads, one at a time
+        connection = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        connection.row_factory = sqlite3.Row
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute(f"PRAGMA cache_size=-{CACHE_KB}")
+        connection.execute("PRAGMA temp_store=MEMORY")
+        return connection
+
+    def _reset_pool(self):
+        self._pool = queue.LifoQueue()
+        self._opened = 0
+        self._pid = os.getpid()
+
+    @contextmanager
+    def connection(self):
+        """Check out a pooled connection for one operation; waits when all pool_size are in use"""
+
+        pinned = getattr(self._pinned, "db", None)
+        if pinned is not None:
+            yield pinned  # inside snapshot(): reuse its transaction
+            return
+
+        if self._pid != os.getpid():
+            with self._pool_lock:
+                if self._pid != os.getpid():
+                    self._reset_pool()  # never share a parent's connections
+
+        pool = self._pool
+        try:
+            db = pool.get_nowait()
+        except queue.Empty:
+            with self._pool_lock:
+                grow = self._opened < self.pool_size
+                if grow:
+                    self._opened += 1
+            if grow:
+                try:
+                    db = self._connect()
+                except BaseException:
+                    with self._pool_lock:
+                        self._opened -= 1
+                    raise
+            else:
+                try:
+                    db = pool.get(timeout=POOL_TIMEOUT)
+                except queue.Empty:
+                    raise sqlite3.OperationalError(
+                        f"No SQLite connection free after {POOL_TIMEOUT}s (pool of {self.pool_size})"
+                    ) from None
+
+        try:
+            yield db
+        finally:
+            if db.in_transaction:
+                db.execute("ROLLBACK")
+            pool.put(db)
+
+    def pool_stats(self):
+        return {"size": self.pool_size, "open": self._opened, "idle": self._pool.qsize()}
+
+    def _create_schema(self):
+        columns = ", ".join(f"{name} {sql_type}" for name, sql_type in CASE_COLUMNS.items())
+        with self.connection() as db:
+            db.execute(f"CREATE TABLE IF NOT EXISTS cases ({columns})")
+            for column in INDEXED_COLUMNS:
+                db.execute(f"CREATE INDEX IF NOT EXISTS idx_cases_{column} ON cases ({column})")
+            for column in NOCASE_COLUMNS:
+                db.execute(f"CREATE INDEX IF NOT EXISTS idx_cases_{column}_nocase ON cases ({column} COLLATE NOCASE)")
+            db.execute("CREATE TABLE IF NOT EXISTS store_meta (key TEXT PRIMARY KEY, value INTEGER)")
+            db.execute("INSERT OR IGNORE INTO store_meta (key, value) VALUES ('version', 1)")
+
+    # -- loading -------------------------------------------------------------
+
+    def import_frame(self, chunk):
+        """Bulk-load (or upsert) one DataFrame of cases in a single transaction"""
+
+        columns = list(CASE_COLUMNS)
+        placeholders = ", ".join("?" for _ in columns)
+        sql = f"INSERT OR REPLACE INTO cases ({', '.join(columns)}) VALUES ({placeholders})"
+        chunk = chunk[columns].astype(object).where(chunk[columns].notna(), None)
+
+        with self.connection() as db:
+            db.execute("BEGIN")
+            db.executemany(sql, chunk.itertuples(index=False, name=None))
+            db.execute("UPDATE store_meta SET value = value + 1 WHERE key = 'version'")
+            db.execute("COMMIT")
+        return len(chunk)
+
+    def import_csv(self, csv_path, chunksize=100000):
+        """Bulk-load (or upsert) cases from a CSV without holding it all in memory"""
+
+        total = 0
+        for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+            total += self.import_frame(chunk)
+
+        self.analyze()
+        return total
+
+    def analyze(self):
+        """Refresh the query planner's statistics (after bulk loads)"""
+
+        with self.connection() as db:
+            db.execute("ANALYZE")
+
+    def _query(self, sql, params=()):
+        with self.connection() as db:
+            return db.execute(sql, params).fetchall()
+
+    # -- reads ---------------------------------------------------------------
+
+    def __len__(self):
+        return self._query("SELECT COUNT(*) FROM cases")[0][0]
+
+    @property
+    def version(self):
+        return self._query("SELECT value FROM store_meta WHERE key = 'version'")[0][0]
+
+    @contextmanager
+    def snapshot(self):
+        # One read transaction on one connection; under WAL it sees a fixed database state
+        if getattr(self._pinned, "db", None) is not None:
+            yield self.version
+            return
+
+        with self.connection() as db:
+            db.execute("BEGIN")
+            self._pinned.db = db
+            try:
+                yield self.version
+            finally:
+                self._pinned.db = None
+
+    def is_empty(self):
+        return not self._query("SELECT 1 FROM cases LIMIT 1")
+
+    def _where(self, filters, search):
+        clauses, params = [], []
+
+        for column, op, value in filters:
+            if op == "ieq":
+                # Matches the idx_<column>_nocase index (LOWER() would force a scan)
+                clauses.append(f"{column} = ? COLLATE NOCASE")
+            elif op == "==":
+                clauses.append(f"{column} = ?")
+            else:
+                clauses.append(f"{column} {op} ?")
+            params.append(value)
+
+        if search:
+            pattern = "%" + search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            clauses.append("(" + " OR ".join(f"{column} LIKE ? ESCAPE '\\'" for column in SEARCH_COLUMNS) + ")")
+            params.extend([pattern] * len(SEARCH_COLUMNS))
+
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def find_cases(self, filters=(), search=None, order_by=None, descending=False, limit=None):
+        _check_filters(filters)
+        if order_by is not None and order_by not in CASE_COLUMNS:
+            raise ValueError(f"Unknown column '{order_by}'")
+
+        where, params = self._where(filters, search)
+        order = f" ORDER BY {order_by} {'DESC' if descending else 'ASC'}, rowid" if order_by else " ORDER BY rowid"
+        sql = f"SELECT * FROM cases{where}{order}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+
+        return [dict(row) for row in self._query(sql, params)]
+
+    def iter_cases(self, filters=(), batch_size=10000):
+        _check_filters(filters)
+        where, params = self._where(filters, None)
+
+        # Holds one pooled connection until the iteration finishes (or is abandoned)
+        with self.connection() as db:
+            cursor = db.execute(f"SELECT * FROM cases{where} ORDER BY rowid", params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    return
+                yield [dict(row) for row in rows]
+
+    def get_case(self, case_id):
+        rows = self._query("SELECT * FROM cases WHERE case_id = ?", (case_id,))
+        return dict(rows[0]) if rows else None
+
+    def case_ids(self):
+        return [row[0] for row in self._query("SELECT case_id FROM cases ORDER BY rowid")]
+
+    def summary(self):
+        row = self._query(f"""
+            SELECT COUNT(*),
+                   COALESCE(SUM(amount), 0),
+                   COALESCE(SUM(amount > {CRITICAL_AMOUNT} AND days_overdue > {CRITICAL_DAYS}), 0),
+                   COALESCE(SUM(CASE WHEN recovered = 1 THEN amount ELSE 0 END), 0),
+                   COALESCE(SUM(recovered = 1), 0),
+                   COALESCE(AVG(recovered), 0)
+            FROM cases
+        """)[0]
+
+        return {
+            "cases": row[0],
+            "total_amount": float(row[1]),
+            "critical_cases": int(row[2]),
+            "recovered_amount": float(row[3]),
+            "recovered_cases": int(row[4]),
+            "recovery_rate": float(row[5])
+        }
+
+    def status_counts(self):
+        rows = self._query("SELECT status, COUNT(*) AS n FROM cases GROUP BY status ORDER BY n DESC")
+        return {status: count for status, count in rows}
+
+    def profile_cells(self):
+        rows = self._query(f"""
+            SELECT assigned_dca,
+                   {_band_sql("amount", AMOUNT_BANDS)} AS band,
+                   {_band_sql("days_overdue", AGE_BUCKETS)} AS bucket,
+                   COUNT(*),
+                   SUM(recovered),
+                   SUM(days_to_recovery),
+                   COUNT(days_to_recovery),
+                   SUM(amount),
+                   SUM(amount * recovered)
+            FROM cases
+            GROUP BY assigned_dca, band, bucket
+        """)
+        return [tuple(row) for row in rows]
+
+    def to_dataframe(self):
+        with self.connection() as db:
+            return pd.read_sql_query("SELECT * FROM cases ORDER BY rowid", db)
+
+    # -- writes --------------------------------------------------------------
+
+    def update_case(self, case_id, changes=None, increments=None):
+        changes, increments = _check_update(changes, increments)
+        if not changes and not increments:
+            row = self.get_case(case_id)
+            if row is None:
+                raise CaseNotFound(case_id)
+            return row, dict(row), self.version
+
+        assignments = [f"{column} = ?" for column in changes]
+        assignments += [f"{column} = COALESCE({column}, 0) + ?" for column in increments]
+        params = list(changes.values()) + list(increments.values()) + [case_id]
+
+        with self.connection() as db:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                old = db.execute("SELECT * FROM cases WHERE case_id = ?", (case_id,)).fetchone()
+                if old is None:
+                    raise CaseNotFound(case_id)
+                db.execute(f"UPDATE cases SET {', '.join(assignments)} WHERE case_id = ?", params)
+                db.execute("UPDATE store_meta SET value = value + 1 WHERE key = 'version'")
+                new = db.execute("SELECT * FROM cases WHERE case_id = ?", (case_id,)).fetchone()
+                version = db.execute("SELECT value FROM store_meta WHERE key = 'version'").fetchone()[0]
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+
+        return dict(old), dict(new), version
+
+    def insert_case(self, row):
+        record = _check_insert(row)
+        columns = list(CASE_COLUMNS)
+
+        with self.connection() as db:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                db.execute(
+                    f"INSERT INTO cases ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})",
+                    [record[column] for column in columns]
+                )
+                db.execute("UPDATE store_meta SET value = value + 1 WHERE key = 'version'")
+                version = db.execute("SELECT value FROM store_meta WHERE key = 'version'").fetchone()[0]
+                db.execute("COMMIT")
+            except sqlite3.IntegrityError:
+                db.execute("ROLLBACK")
+                raise DuplicateCase(record["case_id"])
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+
+        return record, version
+
+
+def _merge_cells(cell_lists):
+    """Sum profile cells that appear in more than one partition"""
+
+    merged = {}
+    for cells in cell_lists:
+        for dca, band, bucket, *totals in cells:
+            key = (dca, band, bucket)
+            if key not in merged:
+                merged[key] = list(totals)
+                continue
+            current = merged[key]
+            for i, value in enumerate(totals):
+                if value is not None:
+                    current[i] = value if current[i] is None else current[i] + value
+
+    return [(*key, *totals) for key, totals in merged.items()]
+
+
+class PartitionedCaseStore(CaseStore):
+    """
+    Case table split into one child store per value of a partition key
+    (e.g. assigned_dca or state).
+
+    Queries fan out to the partitions on a thread pool and the partial results
+    are merged: rows by global insertion order or the requested sort (each
+    partition returns its own top `limit`), aggregates by summing. A filter on
+    the key column (==, ieq, !=) prunes the partitions that are queried, so a
+    query scoped to one DCA touches only that DCA's partition.
+
+    Threads rather than processes, so the partitions stay in this process's
+    memory. sqlite3 releases the GIL while a statement runs, so SQLite
+    partitions are scanned concurrently; pandas holds it for most of a filter,
+    so in-memory partitions gain from pruning and per-partition top-K rather
+    than from running in parallel.
+
+    order lists the partition value of each case in global insertion order
+    (the interleaving of the partitions); cases it does not cover come last.
+
+    In memory, the version counts writes made through this object. SQLite
+    partitions under a directory may be shared with other processes: the
+    version is then derived from the partitions' own versions, partition
+    files created elsewhere are opened when the directory changes, and a
+    case missing from the index (inserted elsewhere) is looked up in the
+    partitions and indexed after the cases already known.
+    """
+
+    def __init__(self, partitions, key, order=(), workers=None, factory=None, directory=None):
+        if key not in CASE_COLUMNS:
+            raise ValueError(f"Unknown partition key '{key}'")
+
+        self.key = key
+        self.partitions = dict(sorted(partitions.items(), key=lambda item: str(item[0])))
+        self._factory = factory or (lambda value: DataFrameCaseStore())
+        self._lock = threading.Lock()
+        self.directory = directory
+        self._scanned = os.stat(directory).st_mtime_ns if directory else None
+        self._pool = ThreadPoolExecutor(
+            max_workers=workers or min(32, os.cpu_count() or 1),
+            thread_name_prefix="dca-partition"
+        )
+        self.queries = 0
+        self.partitions_scanned = 0
+
+        # case_id -> (global sequence, partition value); keeps unsorted results in
+        # the order of the unpartitioned table and routes lookups to one partition.
+        # Built from each partition's ids in its own order, interleaved by `order`.
+        self._index = {}
+        members = {value: iter(store.case_ids()) for value, store in self.partitions.items()}
+        for value in order:
+            case_id = next(members.get(value, iter(())), None)
+            if case_id is not None:
+                self._index[case_id] = (len(self._index), value)
+        for value, case_ids in members.items():
+            for case_id in case_ids:
+                self._index[case_id] = (len(self._index), value)
+
+        self._index_lock = threading.Lock()
+        self._scan_lock = threading.Lock()
+        self._version = 1
+
+    @classmethod
+    def from_dataframe(cls, df, key, workers=None):
+        """In-memory partitions (one DataFrameCaseStore per key value)"""
+
+        partitions = {value: DataFrameCaseStore(group) for value, group in df.groupby(key, sort=True)}
+        return cls(partitions, key, order=df[key].tolist(), workers=workers)
+
+    @classmethod
+    def open_sqlite(cls, directory, key, csv_path=None, workers=None, chunksize=100000):
+        """
+        One SQLite database per key value under directory, imported from
+        csv_path the first time. The import also saves the CSV's row order
+        (as the partition of each row) to <key>-order.npz, so later opens
+        read each partition's case_ids and never touch the CSV.
+        """
+
+        os.makedirs(directory, exist_ok=True)
+        order_path = os.path.join(directory, f"{key}-order.npz")
+
+        def factory(value):
+            name = re.sub(r"[^A-Za-z0-9_-]+", "_", str(value)).strip("_") or "partition"
+            return SQLiteCaseStore(os.path.join(directory, f"{key}-{name}.db"))
+
+        partitions = _scan_sqlite_partitions(directory, key)
+
+        importing = not partitions
+        if csv_path and os.path.exists(csv_path) and (importing or not os.path.exists(order_path)):
+            values, codes = {}, []
+            for chunk in pd.read_csv(csv_path, chunksize=chunksize, usecols=None if importing else [key]):
+                for value in chunk[key].unique():
+                    values.setdefault(_plain(value), len(values))
+                codes.append(chunk[key].map(values).to_numpy(np.int32))
+                if importing:
+                    for value, group in chunk.groupby(key, sort=False):
+                        value = _plain(value)
+                        if value not in partitions:
+                            partitions[value] = factory(value)
+                        partitions[value].import_frame(group)
+            if importing:
+                for store in partitions.values():
+                    store.analyze()
+            _save_order(order_path, list(values), np.concatenate(codes) if codes else np.zeros(0, np.int32))
+
+        return cls(partitions, key, order=_load_order(order_path), workers=workers, factory=factory,
+                   directory=directory)
+
+    # -- fan-out -------------------------------------------------------------
+
+    def _targets(self, filters):
+        """Partitions a query can match, pruned by filters on the key column"""
+
+        values = list(self.partitions)
+        for column, op, value in filters:
+            if column != self.key:
+                continue
+            if op == "==":
+                values = [v for v in values if v == value]
+            elif op == "ieq":
+                values = [v for v in values if str(v).lower() == str(value).lower()]
+            elif op == "!=":
+                values = [v for v in values if v != value]
+        return [self.partitions[v] for v in values]
+
+    def _fan_out(self, stores, fn):
+        """fn(store) for every store, in parallel when there is more than one"""
+
+        self.queries += 1
+        self.partitions_scanned += len(stores)
+        if len(stores) <= 1:
+            return [fn(store) for store in stores]
+        return list(self._pool.map(fn, stores))
+
+    def _seq(self, row):
+        return self._sequence(row["case_id"], row[self.key])
+
+    def _sequence(self, case_id, value):
+        entry = self._index.get(case_id)
+        if entry is None:
+            entry = self._add_to_index(case_id, value)
+        return entry[0]
+
+    def _add_to_index(self, case_id, value):
+        """Index a case written by another process, after the cases already known"""
+
+        with self._index_lock:
+            entry = self._index.get(case_id)
+            if entry is None:
+                entry = self._index[case_id] = (len(self._index), value)
+            return entry
+
+    def _locate(self, case_id):
+        """(sequence, partition value) of a case, looking it up in the partitions if not indexed"""
+
+        entry = self._index.get(case_id)
+        if entry is not None or self.directory is None:
+            return entry
+
+        self._discover()
+        for value, row in zip(self.partitions, self._fan_out(
+                list(self.partitions.values()), lambda store: store.get_case(case_id))):
+            if row is not None:
+                return self._add_to_index(case_id, value)
+        return None
+
+    def _discover(self):
+        """Open partition files another process has created since the last scan"""
+
+        if self.directory is None:
+            return
+        mtime = os.stat(self.directory).st_mtime_ns
+        if mtime == self._scanned:
+            return
+
+        with self._scan_lock:
+            self._scanned = mtime
+            known = {store.path for store in self.partitions.values()}
+            for value, store in _scan_sqlite_partitions(self.directory, self.key, known).items():
+                self.partitions.setdefault(value, store)
+
+    def _shared_version(self):
+        # Every partition's version starts at 1 and goes up by one per write
+        return 1 + sum(store.version - 1 for store in self.partitions.values())
+
+    def partition(self, value):
+        """The child store holding cases whose key column equals value (or None)"""
+        return self.partitions.get(value)
+
+    def stats(self):
+        return {
+            "key": self.key,
+            "partitions": len(self.partitions),
+            "queries": self.queries,
+            "partitions_scanned": self.partitions_scanned
+        }
+
+    # -- reads ---------------------------------------------------------------
+
+    def __len__(self):
+        return sum(len(store) for store in self.partitions.values())
+
+    @property
+    def version(self):
+        if self.directory is None:
+            return self._version
+        self._discover()
+        return self._shared_version()
+
+    @contextmanager
+    def snapshot(self):
+        # Writes go through self._lock; the fan-out reads inside the block still run in parallel.
+        # Writes from other processes are not held off, but the version is read before the
+        # reads, so it never runs ahead of what they see.
+        self._discover()
+        with self._lock:
+            yield self._version if self.directory is None else self._shared_version()
+
+    def is_empty(self):
+        return all(store.is_empty() for store in self.partitions.values())
+
+    def find_cases(self, filters=(), search=None, order_by=None, descending=False, limit=None):
+        _check_filters(filters)
+        if order_by is not None and order_by not in CASE_COLUMNS:
+            raise ValueError(f"Unknown column '{order_by}'")
+
+        # Each partition returns its own top `limit`; the global top-K is among them
+        parts = self._fan_out(
+            self._targets(filters),
+            lambda store: store.find_cases(filters, search, order_by, descending, limit)
+        )
+
+        if order_by:
+            # None sorts first ascending and last descending, as in SQLite and the DataFrame store
+            rows = sorted((row for part in parts for row in part), key=self._seq)
+            rows.sort(key=lambda row: (row[order_by] is not None, row[order_by]), reverse=descending)
+            return rows[:limit] if limit is not None else rows
+
+        # Partitions are already in global order; merge without a full sort
+        merged = heapq.merge(*parts, key=self._seq)
+        return list(islice(merged, limit) if limit is not None else merged)
+
+    def iter_cases(self, filters=(), batch_size=10000):
+        # Partition by partition rather than in global order, so only one batch is held
+        _check_filters(filters)
+        self._discover()
+        for store in self._targets(filters):
+            yield from store.iter_cases(filters, batch_size)
+
+    def get_case(self, case_id):
+        entry = self._locate(case_id)
+        if entry is None:
+            return None
+        return self.partitions[entry[1]].get_case(case_id)
+
+    def summary(self):
+        parts = self._fan_out(list(self.partitions.values()), lambda store: store.summary())
+
+        totals = {"cases": 0, "total_amount": 0.0, "critical_cases": 0,
+                  "recovered_amount": 0.0, "recovered_cases": 0}
+        for part in parts:
+            for name in totals:
+                totals[name] += part[name]
+        totals["recovery_rate"] = totals["recovered_cases"] / totals["cases"] if totals["cases"] else 0.0
+        return totals
+
+    def status_counts(self):
+        counts = {}
+        for part in self._fan_out(list(self.partitions.values()), lambda store: store.status_counts()):
+            for status, count in part.items():
+                counts[status] = counts.get(status, 0) + count
+        return dict(sorted(counts.items(), key=lambda item: item[1], reverse=True))
+
+    def profile_cells(self):
+        return _merge_cells(self._fan_out(list(self.partitions.values()), lambda store: store.profile_cells()))
+
+    def to_dataframe(self):
+        frames = [store.to_dataframe() for store in self.partitions.values()]
+        frames = [frame for frame in frames if not frame.empty]
+        if not frames:
+            return pd.DataFrame(columns=list(CASE_COLUMNS))
+
+        df = pd.concat(frames, ignore_index=True)
+        order = [self._sequence(case_id, value) for case_id, value in zip(df["case_id"], df[self.key])]
+        return df.iloc[np.argsort(order, kind="stable")].reset_index(drop=True)
+
+    # -- writes --------------------------------------------------------------
+
+    def update_case(self, case_id, changes=None, increments=None):
+        changes, increments = _check_update(changes, increments)
+        if self.key in changes or self.key in increments:
+            raise ValueError(f"Cannot update the partition key '{self.key}'")
+
+        entry = self._locate(case_id)
+        if entry is None:
+            raise CaseNotFound(case_id)
+
+        with self._lock:
+            old_row, new_row, _ = self.partitions[entry[1]].update_case(case_id, changes, increments)
+            if self.directory is not None:
+                version = self._shared_version()
+            else:
+                if changes or increments:
+                    self._version += 1
+                version = self._version
+
+        return old_row, new_row, version
+
+    def insert_case(self, row):
+        record = _check_insert(row)
+        value = record[self.key]
+
+        if self._locate(record["case_id"]) is not None:
+            raise DuplicateCase(record["case_id"])
+
+        with self._lock:
+            if record["case_id"] in self._index:
+                raise DuplicateCase(record["case_id"])
+
+            store = self.partitions.get(value)
+            if store is None:
+                store = self._factory(value)
+                self.partitions[value] = store
+
+            record, _ = store.insert_case(record)
+            self._add_to_index(record["case_id"], value)
+            if self.directory is not None:
+                version = self._shared_version()
+            else:
+                self._version += 1
+                version = self._version
+
+        return record, version
+
+
+def _scan_sqlite_partitions(directory, key, known=()):
+    """SQLite partitions under directory by key value, skipping the paths in known and empty files"""
+
+    partitions = {}
+    for filename in sorted(os.listdir(directory)):
+        path = os.path.join(directory, filename)
+        if filename.startswith(f"{key}-") and filename.endswith(".db") and path not in known:
+            store = SQLiteCaseStore(path)
+            first = store._query(f"SELECT {key} FROM cases LIMIT 1")
+            if first:
+                partitions[first[0][0]] = store
+    return partitions
+
+
+def _save_order(path, values, codes):
+    """Partition values plus one code per row (index into values), replaced atomically"""
+
+    temp = f"{path}.{os.getpid()}.tmp"
+    with open(temp, "wb") as f:
+        np.savez(f, values=np.array(json.dumps(values)), codes=codes)
+    os.replace(temp, path)
+
+
+def _load_order(path):
+    """Iterator over the partition value of every row saved by _save_order (empty if none)"""
+
+    if not os.path.exists(path):
+        return ()
+    with np.load(path) as saved:
+        values = json.loads(str(saved["values"]))
+        codes = saved["codes"]
+    return map(values.__getitem__, codes)
+
+
+def _plain(value):
+    """numpy scalar -> the Python value (partition values are saved as JSON)"""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def open_store(spec=None, csv_path="data/cases_1000.csv"):
+    """
+    Open the case store described by spec (default: $DCA_CASE_STORE or "memory"):
+        memory                 -> DataFrameCaseStore loaded from csv_path
+        sqlite:<path to .db>   -> SQLiteCaseStore (imported from csv_path if empty)
+        partitioned:<key>      -> PartitionedCaseStore of in-memory partitions
+        partitioned:<key>:sqlite:<directory>
+                               -> PartitionedCaseStore of one SQLite database per key value
+    """
+
+    spec = spec or os.environ.get("DCA_CASE_STORE", "memory")
+
+    if spec.startswith("partitioned:"):
+        key, _, backend = spec[len("partitioned:"):].partition(":")
+        if backend.startswith("sqlite:"):
+            return PartitionedCaseStore.open_sqlite(backend[len("sqlite:"):], key, csv_path)
+        if backend:
+            raise ValueError(f"Unknown partition backend '{backend}' (expected 'sqlite:<directory>')")
+        return PartitionedCaseStore.from_dataframe(pd.read_csv(csv_path), key)
+
+    if spec == "memory":
+        return DataFrameCaseStore.from_csv(csv_path)
+
+    if spec.startswith("sqlite:"):
+        store = SQLiteCaseStore(spec[len("sqlite:"):])
+        if len(store) == 0 and os.path.exists(csv_path):
+            store.import_csv(csv_path)
+        return store
+
+    raise ValueError(f"Unknown case store '{spec}' (expected 'memory', 'sqlite:<path>' or 'partitioned:<key>')")
+
+
+def main():
+    """CLI: import a case CSV into a SQLite store"""
+
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Manage the FedEx DCA case store")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    importer = subparsers.add_parser("import", help="load a case CSV into a SQLite database")
+    importer.add_argument("csv_path")
+    importer.add_argument("db_path")
+    importer.add_argument("--chunksize", type=int, default=100000)
+    args = parser.parse_args()
+
+    print(f"📥 Importing {args.csv_path} -> {args.db_path}")
+    store = SQLiteCaseStore(args.db_path)
+    total = store.import_csv(args.csv_path, args.chunksize)
+    print(f"   ✅ Imported {total:,} cases ({len(store):,} in store)")
+
+
+if __name__ == "__main__":
+    main()
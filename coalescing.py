@@ -0,0 +1,117 @@
+"""
+FedEx DCA System - Request Coalescing
+Single-flight for dashboard reads: when many browsers poll the same
+endpoint at the same moment, the first request (the leader) computes the
+response and every identical request arriving while it runs waits for it
+and shares the result, instead of each repeating the work.
+
+Requests are identical when the endpoint, view arguments, query string and
+case store data version all match, so a write in between always gets a
+fresh computation.
+"""
+
+import functools
+import threading
+
+
+class _Call:
+    """One in-progress computation and the requests waiting on it"""
+
+    __slots__ = ("done", "result", "failed")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.failed = False
+
+
+class SingleFlight:
+    """Runs at most one fn() per key at a time; concurrent callers share its result"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.leaders = 0
+        self.shared = 0
+        self.retries = 0
+
+    def do(self, key, fn):
+        """fn()'s result, computed here or by the call already running for key"""
+
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if not call.failed:
+                return call.result
+            # The leader raised; compute independently so each request gets its own error
+            with self._lock:
+                self.retries += 1
+            return fn()
+
+        try:
+            call.result = fn()
+        except BaseException:
+            call.failed = True
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        return call.result
+
+    def in_flight(self):
+        return len(self._calls)
+
+    def stats(self):
+        return {
+            "leaders": self.leaders,
+            "shared": self.shared,
+            "retries": self.retries,
+            "in_flight": self.in_flight()
+        }
+
+
+def coalesced(flight, version):
+    """
+    Decorator for a Flask GET view: identical concurrent requests share one
+    rendered response. version() returns the current data version.
+    A request being profiled (profiling.init_app started a profiler for it)
+    always runs on its own; a profile flag without a valid admin token does not.
+    """
+
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            from flask import current_app, g, request
+
+            if g.get("_profiler") is not None:
+                return view(*args, **kwargs)
+
+            key = (
+                request.endpoint,
+                tuple(sorted(kwargs.items())),
+                tuple(sorted(request.args.items(multi=True))),
+                version()
+            )
+
+            def render():
+                # Share the rendered bytes, not the Response: each request gets
+                # its own object for after_request hooks (CORS, metrics) to modify
+                response = current_app.make_response(view(*args, **kwargs))
+                return response.get_data(), response.status_code, list(response.headers.items())
+
+            body, status, headers = flight.do(key, render)
+            return current_app.response_class(body, status=status, headers=headers)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,369 @@
+"""
+FedEx DCA System - Incrementally Maintained Views
+Derived data the API serves (case scores, portfolio aggregates, alert rule
+matches) kept up to date from CaseEvents, so a case write costs work
+proportional to that one case rather than a rescan of the portfolio.
+
+Every view tracks the store version it reflects. An event whose version does
+not follow on from the view's (e.g. another process wrote to a shared SQLite
+store) makes the view rebuild itself from the store instead.
+"""
+
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
+
+from case_store import is_critical, row_matches
+
+# Alert rules evaluated per case; /api/alerts formats the first `limit` matching
+# rows by order_by (ties by case_id)
+ALERT_RULES = {
+    "stalled_high_value": {
+        "filters": [("status", "==", "Stalled"), ("amount", ">", 75000)],
+        "order_by": "amount",
+        "descending": True,
+        "limit": 3
+    },
+    "approaching_threshold": {
+        "filters": [("days_overdue", ">=", 85), ("days_overdue", "<", 95), ("status", "!=", "Stalled")],
+        "order_by": "days_overdue",
+        "descending": True,
+        "limit": 2
+    },
+    "promise_overdue": {
+        "filters": [("status", "==", "Promised"), ("last_contact_days_ago", ">", 5)],
+        "order_by": "last_contact_days_ago",
+        "descending": True,
+        "limit": 2
+    }
+}
+
+# Features the rule-based model reads from a case
+SCORE_FEATURES = ("amount", "days_overdue", "customer_avg_days_late", "assigned_dca")
+
+# ScoreTable LRU bounds: entries per discretized feature key, or per case
+FEATURE_CACHE_SIZE = 4096
+CASE_CACHE_SIZE = 200000
+
+
+def priority_level(priority_score):
+    """Bucket a 1-10 priority score into high / medium / low"""
+
+    if priority_score >= 7:
+        return "high"
+    elif priority_score >= 4:
+        return "medium"
+    return "low"
+
+
+def score_case(model, row):
+    """Recovery probability, days to recovery and priority for one case row"""
+
+    recovery_prob = model.predict_recovery_probability(
+        row['amount'],
+        row['days_overdue'],
+        row['customer_avg_days_late'],
+        row['assigned_dca']
+    )
+
+    days_to_recovery = model.predict_days_to_recovery(
+        row['amount'],
+        row['days_overdue'],
+        recovery_prob
+    )
+
+    priority_score = model.get_priority_score(
+        row['amount'],
+        row['days_overdue'],
+        recovery_prob
+    )
+
+    return {
+        "recovery_probability": recovery_prob,
+        "expected_days_to_recovery": days_to_recovery,
+        "priority_score": priority_score,
+        "priority": priority_level(priority_score)
+    }
+
+
+def model_version(model):
+    """Identifier for the model's current version (part of every score cache key)"""
+
+    version = getattr(model, "model_version", None)
+    if version is None:
+        version = f"{getattr(model, 'model_type', type(model).__name__)} ({getattr(model, 'trained_date', id(model))})"
+    return version
+
+
+class ScoreTable:
+    """
+    Memoized model scores with bounded LRU eviction.
+
+    A model that can discretize its inputs (RecoveryPredictor.feature_key) is
+    cached per (model version, feature key). That key space is small and
+    finite, so nearly every lookup is a hit whichever cases are requested.
+
+    Any other model (e.g. a trained classifier) is cached per (model version,
+    case_id, case data version), where the case data version is the store
+    version of the last event that changed the case. Those entries also
+    remember their features, so a row changed behind our back (another
+    process writing to a shared store) is rescored rather than served stale.
+    A case's data version is forgotten once its entry is evicted, so that map
+    never outgrows the cache.
+    """
+
+    def __init__(self, model, maxsize=None):
+        self.model = model
+        self.version = model_version(model)
+        self.by_features = callable(getattr(model, "feature_key", None))
+        self.maxsize = maxsize or (FEATURE_CACHE_SIZE if self.by_features else CASE_CACHE_SIZE)
+        self._entries = OrderedDict()
+        self._case_versions = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.rescored = 0
+
+    def _key(self, row):
+        if self.by_features:
+            features = self.model.feature_key(
+                row['amount'], row['days_overdue'], row['customer_avg_days_late'], row['assigned_dca']
+            )
+            return (self.version, features)
+        return (self.version, row['case_id'], self._case_versions.get(row['case_id'], 0))
+
+    def score(self, row):
+        key = self._key(row)
+        check = None if self.by_features else tuple(row[name] for name in SCORE_FEATURES)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == check:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return dict(entry[1])
+            self.misses += 1
+
+        scores = score_case(self.model, row)
+
+        with self._lock:
+            self._entries[key] = (check, scores)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                evicted, _ = self._entries.popitem(last=False)
+                self.evictions += 1
+                if not self.by_features and self._case_versions.get(evicted[1]) == evicted[2]:
+                    del self._case_versions[evicted[1]]
+
+        return dict(scores)
+
+    def apply(self, event):
+        if not self.by_features:
+            # Move the case to its new data version and drop the old entry
+            with self._lock:
+                previous = self._case_versions.get(event.case_id, 0)
+                self._entries.pop((self.version, event.case_id, previous), None)
+                self._case_versions[event.case_id] = event.version
+
+        self.score(event.new)
+        self.rescored += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "mode": "features" if self.by_features else "case",
+            "model_version": self.version,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "evictions": self.evictions,
+            "rescored": self.rescored
+        }
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class PortfolioAggregates:
+    """Totals behind /api/metrics and the status distribution"""
+
+    def __init__(self, store):
+        self.store = store
+        self._lock = threading.Lock()
+        self.rebuilds = 0
+        self.rebuild()
+
+    def rebuild(self):
+        with self._lock, self.store.snapshot() as version:
+            self.totals = self.store.summary()
+            self.status = dict(self.store.status_counts())
+            self.version = version
+            self.rebuilds += 1
+
+    def apply(self, event):
+        # The version check shares the lock with rebuild(), which may run at the same time
+        # (LiveViews.sync), so an event is never applied on top of a rebuild that reflects it
+        with self._lock:
+            if event.version <= self.version:
+                return  # already reflected by a rebuild
+            if event.version == self.version + 1:
+                self._apply(event)
+                return
+        self.rebuild()
+
+    def _apply(self, event):
+        for row, sign in ((event.old, -1), (event.new, 1)):
+            if row is None:
+                continue
+            totals = self.totals
+            totals["cases"] += sign
+            totals["total_amount"] += sign * row["amount"]
+            totals["critical_cases"] += sign * is_critical(row)
+            if row["recovered"] == 1:
+                totals["recovered_amount"] += sign * row["amount"]
+                totals["recovered_cases"] += sign
+            self.status[row["status"]] = self.status.get(row["status"], 0) + sign
+            if self.status[row["status"]] <= 0:
+                del self.status[row["status"]]
+
+        cases = self.totals["cases"]
+        self.totals["recovery_rate"] = self.totals["recovered_cases"] / cases if cases else 0.0
+        self.version = event.version
+
+    def summary(self):
+        with self._lock:
+            return dict(self.totals)
+
+    def status_counts(self):
+        with self._lock:
+            return dict(sorted(self.status.items(), key=lambda item: item[1], reverse=True))
+
+
+class AlertIndex:
+    """
+    Matches for each ALERT_RULES rule, ranked. Every matching case is kept as
+    a (sort key, case_id) entry, so an event just moves the changed case out
+    of and into each ranking using its old and new rows. The store is only
+    read for a case promoted into a rule's shown rows when another leaves them.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.rebuilds = 0
+        self.rebuild()
+
+    @staticmethod
+    def _rank(spec, row):
+        value = row[spec["order_by"]]
+        return (-value if spec["descending"] else value, row["case_id"])
+
+    def rebuild(self):
+        with self._lock, self.store.snapshot() as version:
+            self.ranked = {}
+            self.matches = {}
+            for rule, spec in ALERT_RULES.items():
+                rows = {row["case_id"]: row for row in self.store.find_cases(spec["filters"])}
+                self.ranked[rule] = sorted(self._rank(spec, row) for row in rows.values())
+                self.matches[rule] = [rows[case_id] for _, case_id in self.ranked[rule][:spec["limit"]]]
+            self.version = version
+            self.rebuilds += 1
+
+    def apply(self, event):
+        # Checked and applied under the lock rebuild() takes (see PortfolioAggregates.apply)
+        with self._lock:
+            if event.version <= self.version:
+                return  # already reflected by a rebuild
+            if event.version == self.version + 1:
+                self._apply(event)
+                return
+        self.rebuild()
+
+    def _apply(self, event):
+        for rule, spec in ALERT_RULES.items():
+            ranked = self.ranked[rule]
+            shown_changed = False
+
+            if event.old is not None and row_matches(event.old, spec["filters"]):
+                entry = self._rank(spec, event.old)
+                position = bisect_left(ranked, entry)
+                if position < len(ranked) and ranked[position] == entry:
+                    del ranked[position]
+                    shown_changed |= position < spec["limit"]
+
+            if row_matches(event.new, spec["filters"]):
+                entry = self._rank(spec, event.new)
+                position = bisect_left(ranked, entry)
+                ranked.insert(position, entry)
+                shown_changed |= position < spec["limit"]
+
+            if shown_changed:
+                self._refresh(rule, event.new)
+        self.version = event.version
+
+    def _refresh(self, rule, changed_row):
+        """Rows for the rule's top `limit` entries, reusing the rows already held"""
+
+        known = {row["case_id"]: row for row in self.matches[rule]}
+        known[changed_row["case_id"]] = changed_row
+
+        rows = []
+        for _, case_id in self.ranked[rule][:ALERT_RULES[rule]["limit"]]:
+            row = known.get(case_id)
+            if row is None:
+                row = self.store.get_case(case_id)
+                self.lookups += 1
+            if row is not None:
+                rows.append(row)
+        self.matches[rule] = rows
+
+    def rows(self, rule):
+        with self._lock:
+            return list(self.matches[rule])
+
+
+class LiveViews:
+    """The derived views for one store, wired to an EventBus"""
+
+    def __init__(self, store, bus, recovery_model=None):
+        self.store = store
+        self.bus = bus
+        self.aggregates = PortfolioAggregates(store)
+        self.alerts = AlertIndex(store)
+        self.scores = ScoreTable(recovery_model) if recovery_model is not None else None
+
+        bus.subscribe(self.aggregates.apply)
+        bus.subscribe(self.alerts.apply)
+        if self.scores is not None:
+            bus.subscribe(self.scores.apply)
+
+    def sync(self, timeout=0.5):
+        """
+        Make sure the views reflect the store: wait for queued events, then
+        rebuild anything still behind (writes made outside this process).
+        """
+
+        version = self.store.version
+        if self.aggregates.version >= version and self.alerts.version >= version:
+            return
+
+        self.bus.flush(timeout)
+
+        if self.aggregates.version < version:
+            self.aggregates.rebuild()
+        if self.alerts.version < version:
+            self.alerts.rebuild()
+
+    def stats(self):
+        return {
+            "version": self.aggregates.version,
+            "aggregate_rebuilds": self.aggregates.rebuilds,
+            "alert_rebuilds": self.alerts.rebuilds,
+            "alert_lookups": self.alerts.lookups,
+            "score_cache": self.scores.stats() if self.scores is not None else None,
+            "events": self.bus.stats()
+        }
@@ -0,0 +1,113 @@
+"""
+FedEx DCA System - Case Change Events
+In-process event stream for case inserts and updates. Writers publish one
+CaseEvent per change; subscribers (score table, aggregates, alert rules,
+DCA profiles) update their derived view from that single case.
+
+The bus is a local queue + dispatcher thread standing in for a real broker:
+publish() never blocks on subscriber work, and events are delivered to every
+subscriber in publish order.
+"""
+
+import queue
+import threading
+
+
+class CaseEvent:
+    """One case change: kind is "insert" or "update"; old is None for inserts"""
+
+    __slots__ = ("kind", "case_id", "old", "new", "version")
+
+    def __init__(self, kind, case_id, old, new, version):
+        self.kind = kind
+        self.case_id = case_id
+        self.old = old
+        self.new = new
+        self.version = version
+
+    def __repr__(self):
+        return f"CaseEvent({self.kind!r}, {self.case_id!r}, version={self.version})"
+
+
+class EventBus:
+    """
+    Fan-out of CaseEvents to subscribers.
+    With asynchronous=False events are delivered inline on publish (handy for scripts).
+    """
+
+    def __init__(self, asynchronous=True):
+        self.asynchronous = asynchronous
+        self._subscribers = []
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.published = 0
+        self.delivered = 0
+        self.errors = 0
+        self.last_version = None
+
+    def subscribe(self, handler):
+        """Register handler(event); returns handler so it can be used as a decorator"""
+        self._subscribers.append(handler)
+        return handler
+
+    def publish(self, event):
+        """Queue an event for delivery"""
+
+        with self._lock:
+            self.published += 1
+
+        if not self.asynchronous:
+            self._deliver(event)
+            return
+
+        self._ensure_started()
+        self._queue.put(event)
+
+    def flush(self, timeout=None):
+        """Wait until every published event has been delivered; False on timeout"""
+
+        if not self.asynchronous:
+            return True
+
+        tasks = self._queue
+        with tasks.all_tasks_done:
+            return tasks.all_tasks_done.wait_for(lambda: tasks.unfinished_tasks == 0, timeout)
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def stats(self):
+        return {
+            "published": self.published,
+            "delivered": self.delivered,
+            "errors": self.errors,
+            "pending": self.pending(),
+            "last_version": self.last_version
+        }
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="dca-events", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            event = self._queue.get()
+            try:
+                self._deliver(event)
+            finally:
+                self._queue.task_done()
+
+    def _deliver(self, event):
+        for handler in self._subscribers:
+            try:
+                handler(event)
+            except Exception as e:
+                self.errors += 1
+                print(f"   ⚠️  Event handler {getattr(handler, '__qualname__', handler)} failed for {event}: {e}")
+        self.delivered += 1
+        self.last_version = event.version
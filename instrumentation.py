@@ -0,0 +1,400 @@
+"""
+FedEx DCA System - Request & Model Instrumentation
+Per-route request counts, latency histograms, hot-path stage timings and
+model call statistics, exposed on /metrics in Prometheus text format
+"""
+
+import itertools
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+
+from flask import Response
+from werkzeug.exceptions import HTTPException
+
+# Latency histogram bucket upper bounds (seconds)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Model methods wrapped by InstrumentedModel
+MODEL_METHODS = {
+    "recovery_model": ("predict_recovery_probability", "predict_days_to_recovery", "get_priority_score"),
+    "dca_matcher": ("recommend_dca", "get_dca_rankings", "fit_profiles", "load_profile_cells", "apply_case_update")
+}
+
+# Per-case methods (called thousands of times per request) are counted on
+# every call but timed on one call in MODEL_SAMPLE_EVERY; the other calls pay
+# only for a counter tick. Everything else is timed every call.
+SAMPLED_METHODS = {"predict_recovery_probability", "predict_days_to_recovery", "get_priority_score", "recommend_dca"}
+MODEL_SAMPLE_EVERY = 64
+
+# Finished requests are folded into the totals on scrape; a request only folds
+# them itself once this many are queued (no scraper), to bound memory
+PENDING_LIMIT = 4096
+
+# Resolved (path, method) -> route entries kept per app before starting over
+ROUTE_CACHE_SIZE = 4096
+
+
+class Histogram:
+    """Fixed-bucket cumulative histogram"""
+
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class CallCounter:
+    """
+    Exact call count without a lock or a thread-local: next() on an
+    itertools.count is atomic, so callers share `ticks` and value() reads it
+    """
+
+    def __init__(self):
+        self.ticks = itertools.count()
+        self._base = 0  # ticks that were not calls (reads, and calls before the last reset)
+
+    def value(self):
+        count = next(self.ticks) - self._base  # the read itself takes a tick
+        self._base += 1
+        return count
+
+    def reset(self):
+        self._base = next(self.ticks) + 1
+
+
+class MetricsRegistry:
+    """Thread-safe store for the API's counters and histograms"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = deque()   # finished requests not yet folded in (append is thread-safe)
+        self.requests = {}        # (route, method, status) -> count
+        self.latency = {}         # route -> Histogram
+        self.stages = {}          # (route, stage) -> Histogram
+        self.model_calls = {}     # (model, method) -> [count, seconds]
+        self.call_counters = {}   # (model, method) -> CallCounter, for sampled methods
+
+    def record_request(self, recorder, path, method, status, duration, stages, model_calls):
+        """
+        Queue one finished request (everything is handed over as is; the
+        route is resolved by its recorder and the status line parsed when
+        folded). The queue is folded into the totals on the next scrape, so
+        requests never take the lock unless nothing scrapes.
+        """
+
+        self._pending.append((recorder, path, method, status, duration, stages, model_calls))
+        if len(self._pending) >= PENDING_LIMIT:
+            self._fold()
+
+    def call_counter(self, key):
+        """The shared CallCounter for a sampled model method"""
+
+        with self._lock:
+            counter = self.call_counters.get(key)
+            if counter is None:
+                counter = self.call_counters[key] = CallCounter()
+            return counter
+
+    def _fold(self):
+        with self._lock:
+            while self._pending:
+                recorder, path, method, status, duration, stages, model_calls = self._pending.popleft()
+
+                route = recorder.route(path, method)
+                key = (route, method, int(status[:3]) if status else 500)
+                self.requests[key] = self.requests.get(key, 0) + 1
+
+                histogram = self.latency.get(route)
+                if histogram is None:
+                    histogram = self.latency[route] = Histogram()
+                histogram.observe(duration)
+
+                for stage_name, seconds in stages.items():
+                    histogram = self.stages.get((route, stage_name))
+                    if histogram is None:
+                        histogram = self.stages[(route, stage_name)] = Histogram()
+                    histogram.observe(seconds)
+
+                self._merge_model_calls(model_calls)
+            self._count_sampled_calls()
+
+    def record_model_calls(self, model_calls):
+        """Fold model calls made outside a request (e.g. at startup)"""
+
+        with self._lock:
+            self._merge_model_calls(model_calls)
+            self._count_sampled_calls()
+
+    def _merge_model_calls(self, model_calls):
+        for key, (count, seconds) in model_calls.items():
+            totals = self.model_calls.get(key)
+            if totals is None:
+                totals = self.model_calls[key] = [0, 0.0]
+            totals[0] += count
+            totals[1] += seconds
+
+    def _count_sampled_calls(self):
+        for key, counter in self.call_counters.items():
+            count = counter.value()
+            if count:
+                totals = self.model_calls.get(key)
+                if totals is None:
+                    totals = self.model_calls[key] = [0, 0.0]
+                totals[0] = count
+
+    def reset(self):
+        with self._lock:
+            self._pending.clear()
+            self.requests.clear()
+            self.latency.clear()
+            self.stages.clear()
+            self.model_calls.clear()
+            for counter in self.call_counters.values():
+                counter.reset()
+
+    def render(self):
+        """Prometheus text exposition format"""
+
+        self._fold()
+        with self._lock:
+            lines = [
+                "# HELP dca_http_requests_total Requests handled, by route, method and status.",
+                "# TYPE dca_http_requests_total counter"
+            ]
+            for (route, method, status), count in sorted(self.requests.items()):
+                lines.append(f'dca_http_requests_total{{route="{route}",method="{method}",status="{status}"}} {count}')
+
+            lines += [
+                "# HELP dca_http_request_duration_seconds Request latency, by route.",
+                "# TYPE dca_http_request_duration_seconds histogram"
+            ]
+            for route, histogram in sorted(self.latency.items()):
+                lines += _render_histogram("dca_http_request_duration_seconds", f'route="{route}"', histogram)
+
+            lines += [
+                "# HELP dca_request_stage_seconds Time spent per hot-path stage (filtering, scoring, serialization).",
+                "# TYPE dca_request_stage_seconds histogram"
+            ]
+            for (route, stage_name), histogram in sorted(self.stages.items()):
+                lines += _render_histogram("dca_request_stage_seconds", f'route="{route}",stage="{stage_name}"', histogram)
+
+            lines += [
+                "# HELP dca_model_calls_total Model method invocations.",
+                "# TYPE dca_model_calls_total counter"
+            ]
+            for (model, method), (count, _) in sorted(self.model_calls.items()):
+                lines.append(f'dca_model_calls_total{{model="{model}",method="{method}"}} {count}')
+
+            lines += [
+                "# HELP dca_model_call_seconds_total Cumulative time spent in model methods.",
+                "# TYPE dca_model_call_seconds_total counter"
+            ]
+            for (model, method), (_, seconds) in sorted(self.model_calls.items()):
+                lines.append(f'dca_model_call_seconds_total{{model="{model}",method="{method}"}} {seconds:.6f}')
+
+        return "\n".join(lines) + "\n"
+
+
+def _render_histogram(name, labels, histogram):
+    """Expand a Histogram into cumulative _bucket / _sum / _count lines"""
+
+    lines = []
+    cumulative = 0
+    for bound, count in zip(LATENCY_BUCKETS, histogram.counts):
+        cumulative += count
+        lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+    lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+    lines.append(f"{name}_sum{{{labels}}} {histogram.total:.6f}")
+    lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+    return lines
+
+
+registry = MetricsRegistry()
+
+# Per-thread accumulators so the hot path never takes the registry lock
+_local = threading.local()
+
+
+def _accumulators():
+    try:
+        return _local.stages, _local.model_calls
+    except AttributeError:
+        _local.stages = {}
+        _local.model_calls = {}
+        return _local.stages, _local.model_calls
+
+
+_EMPTY = {}  # stands in for accumulators that were never created (never written to)
+_perf_counter = time.perf_counter
+
+
+class StageTimer:
+    """
+    Lap timer for the current request's hot path: each mark() attributes the
+    time since the previous mark to a stage (filtering / scoring / serialization)
+    """
+
+    def __init__(self):
+        self._stages, _ = _accumulators()
+        self._last = time.perf_counter()
+
+    def mark(self, name):
+        now = time.perf_counter()
+        self._stages[name] = self._stages.get(name, 0.0) + now - self._last
+        self._last = now
+
+
+class InstrumentedModel:
+    """
+    Transparent proxy that counts and times calls to a model's methods.
+    Attribute reads and writes pass straight through to the wrapped model.
+    """
+
+    def __init__(self, model, name, methods, sample_every=MODEL_SAMPLE_EVERY):
+        object.__setattr__(self, "_model", model)
+        for method in methods:
+            if hasattr(model, method):
+                every = sample_every if method in SAMPLED_METHODS else 1
+                object.__setattr__(self, method, _timed(getattr(model, method), (name, method), every))
+
+    def __getattr__(self, attr):
+        return getattr(self._model, attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._model, attr, value)
+
+
+def _timed(fn, key, every=1):
+    perf_counter = time.perf_counter
+    calls = 1 if every == 1 else 0  # sampled methods are counted by their CallCounter
+
+    def timed_call(*args, **kwargs):
+        start = perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            # A sampled call's time stands for the `every` calls around it
+            elapsed = (perf_counter() - start) * every
+            _, model_calls = _accumulators()
+            totals = model_calls.get(key)
+            if totals is None:
+                model_calls[key] = [calls, elapsed]
+            else:
+                totals[0] += calls
+                totals[1] += elapsed
+
+    if every == 1:
+        wrapper = timed_call
+    else:
+        ticks = registry.call_counter(key).ticks
+
+        def wrapper(*args, **kwargs):
+            if next(ticks) % every:
+                return fn(*args, **kwargs)
+            return timed_call(*args, **kwargs)
+
+    wrapper.__name__ = fn.__name__
+    wrapper.__doc__ = fn.__doc__
+    return wrapper
+
+
+def instrument_model(model, name):
+    """Wrap a loaded model so its calls show up on /metrics (None passes through)"""
+
+    if model is None or isinstance(model, InstrumentedModel):
+        return model
+    return InstrumentedModel(model, name, MODEL_METHODS.get(name, ()))
+
+
+def uninstrumented(model):
+    """The model an InstrumentedModel wraps (anything else passes through)"""
+
+    if isinstance(model, InstrumentedModel):
+        return object.__getattribute__(model, "_model")
+    return model
+
+
+def flush_background():
+    """Move model calls recorded outside a request into the registry"""
+
+    stages, model_calls = _accumulators()
+    registry.record_model_calls(model_calls)
+    stages.clear()
+    model_calls.clear()
+
+
+class _RequestRecorder:
+    """
+    WSGI wrapper that times every request and records it with its final
+    status, including requests whose view raised (recorded as 500).
+
+    This is the whole per-request cost, so it only collects. Routes are
+    matched against the app's URL map on scrape (cached per path), which
+    costs less than any per-request hook into Flask's own matching.
+    Model calls recorded on this thread outside a request (flush_background
+    is the norm) are attributed to the next request; they are counted once
+    either way.
+    """
+
+    def __init__(self, wsgi_app, url_map):
+        self.wsgi_app = wsgi_app
+        self.url_map = url_map
+        self._routes = {}  # (path, method) -> route rule
+
+    def route(self, path, method):
+        """The route rule a request path matched ("<unmatched>" if none)"""
+
+        key = (path, method)
+        route = self._routes.get(key)
+        if route is None:
+            try:
+                rule, _ = self.url_map.bind("localhost").match(path, method, return_rule=True)
+                route = rule.rule
+            except HTTPException:
+                route = "<unmatched>"
+            if len(self._routes) >= ROUTE_CACHE_SIZE:
+                self._routes.clear()
+            self._routes[key] = route
+        return route
+
+    def __call__(self, environ, start_response):
+        status = None
+
+        def recording_start_response(status_line, headers, exc_info=None):
+            nonlocal status
+            status = status_line
+            return start_response(status_line, headers, exc_info)
+
+        start = _perf_counter()
+        try:
+            return self.wsgi_app(environ, recording_start_response)
+        finally:
+            duration = _perf_counter() - start
+            state = _local.__dict__  # detach this thread's accumulators (the next request starts fresh ones)
+            registry.record_request(
+                self, environ.get("PATH_INFO"), environ.get("REQUEST_METHOD"), status, duration,
+                state.pop("stages", _EMPTY) if state else _EMPTY,
+                state.pop("model_calls", _EMPTY) if state else _EMPTY
+            )
+
+
+def init_app(app):
+    """Register request recording and the /metrics endpoint"""
+
+    app.wsgi_app = _RequestRecorder(app.wsgi_app, app.url_map)
+
+    @app.route("/metrics")
+    def metrics():
+        """Prometheus scrape endpoint"""
+        return Response(registry.render(), mimetype="text/plain; version=0.0.4")
+
+    return app
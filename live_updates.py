@@ -0,0 +1,182 @@
+"""
+FedEx DCA System - Live Dashboard Updates
+Server-Sent Events feed so dashboards stop polling: a client gets one
+snapshot on connect and then, each time the data version changes, a diff
+holding the metric fields that changed, the status distribution, the alert
+rules whose matches changed and the changed cases.
+
+Diffs are computed once per case event (not once per client) and kept in a
+short buffer. A client that falls behind gets everything it missed merged
+into a single message, and a reconnect with Last-Event-ID resumes from the
+buffer (or gets a fresh snapshot if it has been gone too long).
+
+Idle clients all block on one Condition and cost no work until the version
+moves, but each open stream holds one server thread for as long as it is
+connected. Streams are capped at MAX_STREAMS per process; past that
+/api/stream answers 503 with Retry-After.
+"""
+
+import os
+
+import json
+import threading
+from collections import deque
+
+from derived_views import ALERT_RULES
+
+# Updates kept for late / reconnecting clients
+HISTORY_SIZE = 256
+
+# Seconds between keep-alive comments on an idle stream
+HEARTBEAT_SECONDS = 15
+
+# Open streams per process (each holds a server thread)
+MAX_STREAMS = int(os.environ.get("DCA_MAX_STREAMS", "100"))
+
+
+def sse_message(event, version, payload):
+    """One text/event-stream message"""
+    return f"id: {version}\nevent: {event}\ndata: {json.dumps(payload, default=str)}\n\n"
+
+
+def merge_updates(updates):
+    """Collapse consecutive updates into one diff (later values win)"""
+
+    merged = {"version": updates[-1]["version"], "metrics": {}, "distribution": None,
+              "alerts": {}, "cases": {}}
+    for update in updates:
+        merged["metrics"].update(update["metrics"])
+        if update["distribution"] is not None:
+            merged["distribution"] = update["distribution"]
+        merged["alerts"].update(update["alerts"])
+        merged["cases"].update(update["cases"])
+
+    merged["cases"] = list(merged["cases"].values())
+    return merged
+
+
+class Broadcaster:
+    """
+    Turns CaseEvents into dashboard diffs and fans them out to SSE clients.
+    metrics_fn() returns the /api/metrics payload, case_fn(row) one /api/cases entry.
+    """
+
+    def __init__(self, views, metrics_fn, case_fn, history=HISTORY_SIZE, max_clients=None):
+        self.views = views
+        self.metrics_fn = metrics_fn
+        self.case_fn = case_fn
+        self._cond = threading.Condition()
+        self._updates = deque(maxlen=history)
+        self.version = views.aggregates.version
+        self._floor = self.version  # clients at or past this version can resume from the buffer
+        self.max_clients = max_clients or MAX_STREAMS
+        self.clients = 0
+        self.rejected = 0
+        self.published = 0
+        self.closed = False
+
+        # Last state diffed against (taken now, before any event reaches the views)
+        baseline = self.snapshot()
+        self._metrics = baseline["metrics"]
+        self._distribution = baseline["distribution"]
+        self._alerts = baseline["alerts"]
+
+    def snapshot(self):
+        """Full dashboard state for a newly connected client"""
+
+        return {
+            "version": self.version,
+            "metrics": self.metrics_fn(),
+            "distribution": self.views.aggregates.status_counts(),
+            "alerts": {rule: self.views.alerts.rows(rule) for rule in ALERT_RULES}
+        }
+
+    def on_case_event(self, event):
+        """EventBus subscriber (registered after the views it reads from)"""
+
+        metrics = self.metrics_fn()
+        distribution = self.views.aggregates.status_counts()
+        alerts = {rule: self.views.alerts.rows(rule) for rule in ALERT_RULES}
+
+        update = {
+            "version": event.version,
+            "metrics": {name: value for name, value in metrics.items() if self._metrics.get(name) != value},
+            "distribution": distribution if distribution != self._distribution else None,
+            "alerts": {rule: rows for rule, rows in alerts.items() if rows != self._alerts.get(rule)},
+            "cases": {event.case_id: self.case_fn(event.new)}
+        }
+        self._metrics, self._distribution, self._alerts = metrics, distribution, alerts
+
+        with self._cond:
+            if len(self._updates) == self._updates.maxlen:
+                self._floor = self._updates[0]["version"]
+            self._updates.append(update)
+            self.version = max(self.version, event.version)
+            self.published += 1
+            self._cond.notify_all()
+
+    def accepting(self):
+        """False once max_clients streams are open (counts the refusal)"""
+
+        with self._cond:
+            if self.clients < self.max_clients:
+                return True
+            self.rejected += 1
+            return False
+
+    def close(self):
+        """End every open stream (clients reconnect and get a fresh snapshot)"""
+
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    def stream(self, last_version=None, heartbeat=None):
+        """Generator of SSE messages for one client"""
+
+        heartbeat = heartbeat or HEARTBEAT_SECONDS
+
+        with self._cond:
+            self.clients += 1
+            resumable = last_version is not None and self._floor <= last_version <= self.version
+
+        try:
+            if resumable:
+                seen = last_version
+            else:
+                snapshot = self.snapshot()
+                seen = snapshot["version"]
+                yield sse_message("snapshot", seen, snapshot)
+
+            while True:
+                with self._cond:
+                    self._cond.wait_for(lambda: self.closed or self.version > seen, heartbeat)
+                    if self.closed:
+                        return
+                    behind = seen < self._floor
+                    pending = [update for update in self._updates if update["version"] > seen]
+
+                if behind:
+                    # Missed updates have left the buffer; start over from a snapshot
+                    snapshot = self.snapshot()
+                    seen = snapshot["version"]
+                    yield sse_message("snapshot", seen, snapshot)
+                elif pending:
+                    update = merge_updates(pending)
+                    seen = update["version"]
+                    yield sse_message("update", seen, update)
+                else:
+                    yield ": keepalive\n\n"
+        finally:
+            with self._cond:
+                self.clients -= 1
+
+    def stats(self):
+        return {
+            "clients": self.clients,
+            "max_clients": self.max_clients,
+            "rejected": self.rejected,
+            "published": self.published,
+            "version": self.version,
+            "buffered": len(self._updates)
+        }
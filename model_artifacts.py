@@ -0,0 +1,280 @@
+"""
+FedEx DCA System - Model Artifacts
+Versioned, inspectable on-disk format for the trained models, replacing
+whole-object pickles:
+
+    models/<name>/CURRENT                 version served by default
+    models/<name>/<version>/manifest.json class, feature schema, params,
+                                          array index, training stats
+    models/<name>/<version>/<array>.npy   array data (memory-mapped on load)
+
+Loading never unpickles (only the `convert` command reads legacy pickles,
+once, to upgrade them): the manifest names one of the classes in
+MODEL_CLASSES, its feature schema and arrays are checked against the code,
+and the model is rebuilt from plain JSON params and read-only mmap arrays.
+Several versions can sit side by side (e.g. for A/B comparison); pick one
+with load_artifact(name, version) or `python model_artifacts.py use`.
+
+CLI:
+    python model_artifacts.py list
+    python model_artifacts.py show recovery_model [version]
+    python model_artifacts.py use recovery_model 20261019-093000
+    python model_artifacts.py convert      # legacy models/*.pkl -> artifacts
+"""
+
+import json
+import os
+import pickle
+import shutil
+from datetime import datetime
+
+import numpy as np
+
+from train_model import DCAMatcher, RecoveryPredictor
+
+MODEL_DIR = "models"
+FORMAT_VERSION = 1
+MANIFEST = "manifest.json"
+
+# Classes an artifact may name (nothing else can be instantiated from disk)
+MODEL_CLASSES = {
+    "RecoveryPredictor": RecoveryPredictor,
+    "DCAMatcher": DCAMatcher
+}
+
+
+class ArtifactError(ValueError):
+    """Raised when an artifact is missing pieces or does not match the code"""
+
+
+def _model_dir(name, root):
+    return os.path.join(root, name)
+
+
+def current_version(name, root=MODEL_DIR):
+    """The version CURRENT points at, or None"""
+
+    try:
+        with open(os.path.join(_model_dir(name, root), "CURRENT")) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def set_current(name, version, root=MODEL_DIR):
+    """Point CURRENT at an existing version"""
+
+    if not os.path.exists(os.path.join(_model_dir(name, root), version, MANIFEST)):
+        raise ArtifactError(f"{name} has no version {version}")
+
+    path = os.path.join(_model_dir(name, root), "CURRENT")
+    with open(path + ".tmp", "w") as f:
+        f.write(version + "\n")
+    os.replace(path + ".tmp", path)
+
+
+def list_versions(name, root=MODEL_DIR):
+    """Saved versions of a model, oldest first"""
+
+    directory = _model_dir(name, root)
+    if not os.path.isdir(directory):
+        return []
+    return sorted(
+        entry for entry in os.listdir(directory)
+        if os.path.exists(os.path.join(directory, entry, MANIFEST))
+    )
+
+
+def read_manifest(name, version=None, root=MODEL_DIR):
+    """Manifest dict of a version (default: CURRENT)"""
+
+    version = version or current_version(name, root)
+    if version is None:
+        raise FileNotFoundError(f"No artifact for {name} in {root}/")
+    if os.path.basename(version) != version or version.startswith("."):
+        raise ArtifactError(f"Invalid version {version!r}")
+
+    with open(os.path.join(_model_dir(name, root), version, MANIFEST)) as f:
+        return json.load(f)
+
+
+def save_artifact(model, name, training_stats=None, root=MODEL_DIR, version=None, make_current=True):
+    """
+    Write model as a new artifact version; returns the version.
+    The model class provides to_artifact() -> (params, arrays).
+    """
+
+    cls = type(model)
+    if cls.__name__ not in MODEL_CLASSES:
+        raise ArtifactError(f"Unsupported model class {cls.__name__}")
+
+    params, arrays = model.to_artifact()
+    version = version or datetime.now().strftime("%Y%m%d-%H%M%S")
+    directory = _model_dir(name, root)
+    target = os.path.join(directory, version)
+    suffix = 1
+    while os.path.exists(target):
+        suffix += 1
+        target = os.path.join(directory, f"{version}-{suffix}")
+    version = os.path.basename(target)
+
+    manifest = {
+        "format": FORMAT_VERSION,
+        "name": name,
+        "class": cls.__name__,
+        "version": version,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "feature_schema": [{"name": column, "dtype": dtype} for column, dtype in cls.FEATURE_SCHEMA],
+        "params": params,
+        "arrays": {},
+        "training_stats": training_stats or {}
+    }
+
+    # Build in a temp directory and rename, so readers never see half an artifact
+    staging = os.path.join(directory, f".staging-{version}")
+    os.makedirs(staging)
+    try:
+        for key, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            if array.dtype.hasobject:
+                raise ArtifactError(f"Array '{key}' has object dtype (not mmap-able)")
+            np.save(os.path.join(staging, f"{key}.npy"), array, allow_pickle=False)
+            manifest["arrays"][key] = {"file": f"{key}.npy", "dtype": array.dtype.str, "shape": list(array.shape)}
+
+        with open(os.path.join(staging, MANIFEST), "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.rename(staging, target)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    if make_current:
+        set_current(name, version, root)
+
+    return version
+
+
+def load_artifact(name, version=None, root=MODEL_DIR):
+    """
+    Load and validate one artifact version (default: CURRENT).
+    Raises FileNotFoundError if there is none, ArtifactError if it is invalid.
+    """
+
+    manifest = read_manifest(name, version, root)
+    version = manifest.get("version")
+    label = f"{name}@{version}"
+
+    if manifest.get("format") != FORMAT_VERSION:
+        raise ArtifactError(f"{label}: unsupported format {manifest.get('format')} (expected {FORMAT_VERSION})")
+
+    cls = MODEL_CLASSES.get(manifest.get("class"))
+    if cls is None:
+        raise ArtifactError(f"{label}: unknown model class {manifest.get('class')!r}")
+
+    schema = [(field["name"], field["dtype"]) for field in manifest.get("feature_schema", [])]
+    if schema != list(cls.FEATURE_SCHEMA):
+        raise ArtifactError(f"{label}: feature schema {schema} does not match {cls.__name__} {list(cls.FEATURE_SCHEMA)}")
+
+    directory = os.path.join(_model_dir(name, root), version)
+    arrays = {}
+    for key, spec in manifest.get("arrays", {}).items():
+        path = os.path.join(directory, spec["file"])
+        if not os.path.exists(path):
+            raise ArtifactError(f"{label}: missing array file {spec['file']}")
+        # Empty arrays can't be mapped; everything else is paged in lazily
+        mode = "r" if np.prod(spec["shape"]) > 0 else None
+        array = np.load(path, mmap_mode=mode, allow_pickle=False)
+        if array.dtype.str != spec["dtype"] or list(array.shape) != spec["shape"]:
+            raise ArtifactError(
+                f"{label}: array '{key}' is {array.dtype.str}{list(array.shape)}, "
+                f"manifest says {spec['dtype']}{spec['shape']}"
+            )
+        arrays[key] = array
+
+    try:
+        model = cls.from_artifact(manifest.get("params", {}), arrays)
+    except (KeyError, ValueError) as e:
+        raise ArtifactError(f"{label}: {e}") from e
+
+    model.model_version = label
+    model.artifact = {key: manifest.get(key) for key in ("name", "version", "created", "training_stats")}
+    return model
+
+
+def load_model(name, version=None, root=MODEL_DIR):
+    """
+    Artifact for name (see load_artifact). A legacy models/<name>.pkl is
+    never loaded: it raises ArtifactError until it has been converted
+    """
+
+    legacy = os.path.join(root, f"{name}.pkl")
+    if version is None and current_version(name, root) is None and os.path.exists(legacy):
+        raise ArtifactError(
+            f"{legacy} is a legacy pickle - run `python model_artifacts.py convert` or train_model.py"
+        )
+
+    return load_artifact(name, version, root)
+
+
+def _load_legacy(path):
+    """Unpickle an old models/<name>.pkl for `convert` (only ever our own training output)"""
+
+    with open(path, "rb") as f:
+        try:
+            model = pickle.load(f)
+        except (pickle.UnpicklingError, AttributeError, ImportError, EOFError) as e:
+            raise ArtifactError(f"{path}: cannot unpickle ({e}) - retrain with train_model.py") from e
+
+    if type(model).__name__ not in MODEL_CLASSES:
+        raise ArtifactError(f"{path}: unexpected model class {type(model).__name__}")
+    return model
+
+
+def main():
+    """CLI: inspect, switch and convert model artifacts"""
+
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Manage FedEx DCA model artifacts")
+    parser.add_argument("--root", default=MODEL_DIR)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("list", help="saved versions of every model")
+    show = subparsers.add_parser("show", help="print a manifest")
+    show.add_argument("name")
+    show.add_argument("version", nargs="?")
+    use = subparsers.add_parser("use", help="make a version the default")
+    use.add_argument("name")
+    use.add_argument("version")
+    subparsers.add_parser("convert", help="save legacy models/*.pkl as artifacts")
+    args = parser.parse_args()
+
+    if args.command == "list":
+        names = sorted(
+            entry for entry in os.listdir(args.root)
+            if os.path.isdir(os.path.join(args.root, entry))
+        ) if os.path.isdir(args.root) else []
+        for name in names:
+            current = current_version(name, args.root)
+            print(f"📦 {name}")
+            for version in list_versions(name, args.root):
+                print(f"   {'*' if version == current else ' '} {version}")
+
+    elif args.command == "show":
+        print(json.dumps(read_manifest(args.name, args.version, args.root), indent=2))
+
+    elif args.command == "use":
+        set_current(args.name, args.version, args.root)
+        print(f"✅ {args.name} now serves {args.version}")
+
+    elif args.command == "convert":
+        for name in ("recovery_model", "dca_matcher"):
+            legacy = os.path.join(args.root, f"{name}.pkl")
+            if not os.path.exists(legacy):
+                continue
+            model = _load_legacy(legacy)
+            version = save_artifact(model, name, {"converted_from": legacy}, args.root)
+            print(f"✅ {legacy} -> {args.root}/{name}/{version}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+FedEx DCA System - On-Demand Profiling
+Profiles a single live API request when asked to by an admin, and profiles
+the offline train_model / generate_data runs from the command line
+
+Live requests (only when DCA_PROFILE_TOKEN is set in the environment):
+    curl -H "X-Admin-Token: $DCA_PROFILE_TOKEN" "http://localhost:5000/api/cases?profile=1"
+    curl -H "X-Admin-Token: $DCA_PROFILE_TOKEN" -H "X-Profile: store" http://localhost:5000/api/alerts
+
+    profile=1 / profile=text   -> response body replaced by the pstats report
+    profile=store              -> normal response; .prof file saved to profiles/
+                                  (path returned in the X-Profile-File header)
+
+CLI:
+    python profiling.py train          # profile train_model.train_models
+    python profiling.py generate       # profile generate_data.main
+    python profiling.py train --sort tottime --limit 40 --output train.prof
+"""
+
+import argparse
+import cProfile
+import hmac
+import io
+import os
+import pstats
+import threading
+from datetime import datetime
+
+PROFILE_DIR = "profiles"
+DEFAULT_SORT = "cumulative"
+# pstats.SortKey values plus the older names sort_stats still accepts (tottime, cumtime...)
+SORT_KEYS = sorted({key.value for key in pstats.SortKey} | set(pstats.Stats.sort_arg_dict_default))
+DEFAULT_LIMIT = 30
+
+# cProfile cannot nest, so only one request is profiled at a time
+_profile_lock = threading.Lock()
+
+
+def report(profiler, sort=DEFAULT_SORT, limit=DEFAULT_LIMIT):
+    """Render a profiler's stats as a pstats text report"""
+
+    stream = io.StringIO()
+    stats = pstats.Stats(profiler, stream=stream)
+    stats.strip_dirs().sort_stats(sort).print_stats(limit)
+    return stream.getvalue()
+
+
+def save(profiler, name):
+    """Dump raw stats to profiles/<name>-<timestamp>.prof (open with snakeviz / flameprof)"""
+
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+    path = os.path.join(PROFILE_DIR, f"{name}-{stamp}.prof")
+    profiler.dump_stats(path)
+    return path
+
+
+def _requested_mode(request):
+    """Profiling mode asked for by the request, if the admin token checks out"""
+
+    token = os.environ.get("DCA_PROFILE_TOKEN")
+    if not token:
+        return None
+
+    mode = request.headers.get("X-Profile") or request.args.get("profile")
+    if not mode:
+        return None
+
+    supplied = request.headers.get("X-Admin-Token", "")
+    if not hmac.compare_digest(supplied.encode(), token.encode()):
+        return None
+
+    mode = mode.lower()
+    if mode in ("1", "true", "text"):
+        return "text"
+    if mode == "store":
+        return "store"
+    return None
+
+
+def init_app(app):
+    """Register the opt-in request profiling hooks"""
+
+    from flask import Response, g, jsonify, request
+
+    @app.before_request
+    def _start_profile():
+        mode = _requested_mode(request)
+        if mode is None:
+            return
+        if mode == "text" and request.args.get("profile_sort", DEFAULT_SORT) not in SORT_KEYS:
+            return jsonify({"error": "Unknown profile_sort", "valid": SORT_KEYS}), 400
+        if not _profile_lock.acquire(blocking=False):
+            return
+        g._profile_mode = mode
+        g._profiler = cProfile.Profile()
+        g._profiler.enable()
+
+    @app.after_request
+    def _finish_profile(response):
+        profiler = g.pop("_profiler", None)
+        if profiler is None:
+            return response
+
+        profiler.disable()
+        _profile_lock.release()
+        mode = g.pop("_profile_mode")
+        name = (request.url_rule.rule if request.url_rule is not None else request.path)
+        name = name.strip("/").replace("/", "_").replace("<", "").replace(">", "") or "root"
+
+        if mode == "text":
+            sort = request.args.get("profile_sort", DEFAULT_SORT)
+            limit = request.args.get("profile_limit", DEFAULT_LIMIT, type=int)
+            return Response(report(profiler, sort, limit), mimetype="text/plain")
+
+        response.headers["X-Profile-File"] = save(profiler, name)
+        return response
+
+    @app.teardown_request
+    def _abandon_profile(exc):
+        # after_request is skipped when the view raises; don't leave the lock held
+        profiler = g.pop("_profiler", None)
+        if profiler is not None:
+            profiler.disable()
+            _profile_lock.release()
+
+    return app
+
+
+def profile_call(fn, name, output=None, sort=DEFAULT_SORT, limit=DEFAULT_LIMIT):
+    """Run fn under cProfile, print the report and save the raw stats"""
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        fn()
+    finally:
+        profiler.disable()
+
+    print(report(profiler, sort, limit))
+
+    if output:
+        profiler.dump_stats(output)
+        path = output
+    else:
+        path = save(profiler, name)
+    print(f"💾 Profile saved to: {path}")
+
+    return path
+
+
+def main():
+    """CLI entry point for profiling offline runs"""
+
+    parser = argparse.ArgumentParser(description="Profile FedEx DCA offline jobs")
+    parser.add_argument("target", choices=["train", "generate"],
+                        help="train = train_model.train_models, generate = generate_data.main")
+    parser.add_argument("--sort", default=DEFAULT_SORT, choices=SORT_KEYS, metavar="SORT",
+                        help="pstats sort key (cumulative, tottime, calls...)")
+    parser.add_argument("--limit", type=int, default=DEFAULT_LIMIT, help="rows to print")
+    parser.add_argument("--output", default=None, help="where to write the .prof file")
+    args = parser.parse_args()
+
+    if args.target == "train":
+        import train_model
+        fn = train_model.train_models
+    else:
+        import generate_data
+        fn = generate_data.main
+
+    print(f"🔬 Profiling {args.target}...")
+    profile_call(fn, args.target, args.output, args.sort, args.limit)
+
+
+if __name__ == "__main__":
+    main()
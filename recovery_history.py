@@ -0,0 +1,566 @@
+"""
+FedEx DCA System - Recovery History
+Append-only, time-partitioned log of recovery events with pre-aggregated
+daily rollups per DCA and status.
+
+Layout (default root: data/recovery_history, or $DCA_RECOVERY_HISTORY):
+    manifest.json            dictionaries (DCA / status codes), chunk list,
+                             daily portfolio snapshots (outstanding, critical,
+                             recovery rate)
+    rollups.npz              daily amount / count per (dca, status, day)
+    2026-10/part-00001.npz   columnar event chunks, one directory per month
+    .lock                    held while a process writes (see exclusive())
+
+Files are replaced atomically (temp file, fsync, rename), so a crash leaves
+either the old or the new manifest, never a torn one.
+
+Queries never touch the event chunks: range totals come from prefix sums
+over the daily rollups, so any range (and any period-over-period delta)
+costs the same no matter how many events or years are stored.
+
+Backfill from the current case table:
+    python recovery_history.py backfill
+"""
+
+import json
+import os
+import threading
+import time
+from bisect import bisect_right
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, run a single writer
+    fcntl = None
+
+EPOCH = date(1970, 1, 1)
+DEFAULT_ROOT = "data/recovery_history"
+
+# Event columns and their on-disk dtypes
+EVENT_COLUMNS = {
+    "day": np.int32,        # days since EPOCH
+    "case_id": np.str_,
+    "dca": np.int16,        # index into manifest["dcas"]
+    "status": np.int16,     # index into manifest["statuses"]
+    "amount": np.float64,   # negative for a reversed recovery
+    "count": np.int8        # +1 recovery, -1 reversal
+}
+
+
+def day_number(value):
+    """date / datetime / 'YYYY-MM-DD' / day number -> days since EPOCH"""
+
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, str):
+        value = datetime.strptime(value[:10], "%Y-%m-%d").date()
+    elif isinstance(value, datetime):
+        value = value.date()
+    return (value - EPOCH).days
+
+
+def day_date(number):
+    """Days since EPOCH -> date"""
+    return EPOCH + timedelta(days=int(number))
+
+
+def _write_atomic(path, write):
+    """write(file) to a temp file beside path, fsync it, then rename it over path"""
+
+    temp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temp, "wb") as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp, path)
+    except BaseException:
+        if os.path.exists(temp):
+            os.remove(temp)
+        raise
+
+    # Make the rename itself durable
+    if hasattr(os, "O_DIRECTORY"):
+        directory = os.open(os.path.dirname(path) or ".", os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(directory)
+        finally:
+            os.close(directory)
+
+
+class RecoveryHistory:
+    """Recovery event log plus dense daily rollups"""
+
+    def __init__(self, root=None, chunk_rows=65536, flush_interval=30.0):
+        self.root = root or os.environ.get("DCA_RECOVERY_HISTORY", DEFAULT_ROOT)
+        self.chunk_rows = chunk_rows
+        self.flush_interval = flush_interval
+        self._lock = threading.RLock()
+        self._holding = 0
+        self._portfolio_pending = {}
+        self._last_flush = time.monotonic()
+        self._reset()
+
+        with self.exclusive():
+            pass  # loads whatever is on disk
+
+    def _reset(self):
+        self.dcas = []
+        self.statuses = []
+        self.chunks = []
+        self.generation = None
+
+        # {day: [outstanding amount, critical cases, recovery rate]}, last recorded value of
+        # the day (snapshots written before the rate was kept have only the first two)
+        self.portfolio = {}
+
+        # Rollups: [dca, status, day - origin]
+        self.origin = None
+        self._amount = np.zeros((0, 0, 0))
+        self._count = np.zeros((0, 0, 0), dtype=np.int64)
+        self._cumulative = None
+
+        self._buffer = {column: [] for column in EVENT_COLUMNS}
+
+    # -- persistence ---------------------------------------------------------
+
+    @property
+    def _manifest_path(self):
+        return os.path.join(self.root, "manifest.json")
+
+    @property
+    def _rollup_path(self):
+        return os.path.join(self.root, "rollups.npz")
+
+    @contextmanager
+    def exclusive(self):
+        """
+        Hold the history's lock file: one process at a time writes it (e.g.
+        the debug reloader's two processes), and on entry this process first
+        picks up anything another one has written since it last looked
+        """
+
+        with self._lock:
+            if self._holding:
+                self._holding += 1
+                try:
+                    yield
+                finally:
+                    self._holding -= 1
+                return
+
+            os.makedirs(self.root, exist_ok=True)
+            with open(os.path.join(self.root, ".lock"), "a") as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)  # released when the file closes
+                self._holding = 1
+                try:
+                    self._catch_up()
+                    yield
+                finally:
+                    self._holding = 0
+
+    def _catch_up(self):
+        """Reload if the manifest on disk is newer than ours, keeping unflushed events"""
+
+        if not os.path.exists(self._manifest_path):
+            return
+        with open(self._manifest_path) as f:
+            manifest = json.load(f)
+        if manifest.get("generation", 0) == self.generation:
+            return
+
+        pending = [
+            (day, case_id, self.dcas[dca], self.statuses[status], amount, count)
+            for day, case_id, dca, status, amount, count in zip(*self._buffer.values())
+        ]
+        self._reset()
+        self._load(manifest)
+        for event in pending:
+            self._add(*event)
+        self.portfolio.update(self._portfolio_pending)
+
+    def _load(self, manifest):
+        self.dcas = manifest["dcas"]
+        self.statuses = manifest["statuses"]
+        self.chunks = manifest["chunks"]
+        self.generation = manifest.get("generation", 0)
+        self.portfolio = {int(day): value for day, value in manifest.get("portfolio", {}).items()}
+
+        if os.path.exists(self._rollup_path):
+            with np.load(self._rollup_path) as rollups:
+                if list(rollups["chunks"]) == self.chunks:
+                    self.origin = int(rollups["origin"]) if rollups["amount"].size else None
+                    self._amount = rollups["amount"]
+                    self._count = rollups["count"]
+                    return
+
+        # Rollups missing or out of date (e.g. crash mid-flush): rebuild from chunks
+        self._amount = np.zeros((len(self.dcas), len(self.statuses), 0))
+        self._count = np.zeros((len(self.dcas), len(self.statuses), 0), dtype=np.int64)
+        for chunk in self.chunks:
+            events = self._read_chunk(chunk)
+            for i in range(len(events["day"])):
+                self._roll(int(events["day"][i]), int(events["dca"][i]), int(events["status"][i]),
+                           float(events["amount"][i]), int(events["count"][i]))
+
+    def _read_chunk(self, chunk):
+        with np.load(os.path.join(self.root, chunk)) as data:
+            return {column: data[column] for column in EVENT_COLUMNS}
+
+    def _save_index(self):
+        """Persist rollups, then the manifest that makes the new chunks visible"""
+
+        self.generation = (self.generation or 0) + 1
+        _write_atomic(self._rollup_path, lambda f: np.savez(
+            f, amount=self._amount, count=self._count,
+            origin=np.int64(self.origin or 0), chunks=np.array(self.chunks)
+        ))
+
+        manifest = {
+            "generation": self.generation,
+            "dcas": self.dcas,
+            "statuses": self.statuses,
+            "chunks": self.chunks,
+            "portfolio": {str(day): value for day, value in sorted(self.portfolio.items())}
+        }
+        _write_atomic(self._manifest_path, lambda f: f.write(json.dumps(manifest).encode()))
+        self._portfolio_pending = {}
+
+    def flush(self):
+        """Write buffered events as new chunks (one per month) and persist rollups"""
+
+        with self.exclusive():
+            if not self._buffer["day"] and not self._portfolio_pending:
+                return 0
+
+            columns = {
+                column: np.asarray(values, dtype=dtype)
+                for (column, dtype), values in zip(EVENT_COLUMNS.items(), self._buffer.values())
+            }
+            months = np.array([day_date(d).strftime("%Y-%m") for d in columns["day"]])
+
+            for month in np.unique(months):
+                selected = months == month
+                partition = os.path.join(self.root, month)
+                os.makedirs(partition, exist_ok=True)
+                sequence = sum(1 for chunk in self.chunks if chunk.startswith(month + "/")) + 1
+                chunk = f"{month}/part-{sequence:05d}.npz"
+                _write_atomic(os.path.join(self.root, chunk), lambda f: np.savez_compressed(
+                    f, **{column: values[selected] for column, values in columns.items()}
+                ))
+                self.chunks.append(chunk)
+
+            written = len(columns["day"])
+            self._buffer = {column: [] for column in EVENT_COLUMNS}
+            self._last_flush = time.monotonic()
+            self._save_index()
+
+            return written
+
+    def compact(self, month):
+        """Merge a month's chunks into one (for closed months with many small chunks)"""
+
+        with self.exclusive():
+            self.flush()
+            month_chunks = [chunk for chunk in self.chunks if chunk.startswith(month + "/")]
+            if len(month_chunks) < 2:
+                return
+
+            parts = [self._read_chunk(chunk) for chunk in month_chunks]
+            merged = {column: np.concatenate([part[column] for part in parts]) for column in EVENT_COLUMNS}
+            order = np.argsort(merged["day"], kind="stable")
+            target = f"{month}/compacted-{int(time.time())}.npz"
+            _write_atomic(os.path.join(self.root, target), lambda f: np.savez_compressed(
+                f, **{column: values[order] for column, values in merged.items()}
+            ))
+
+            self.chunks = [chunk for chunk in self.chunks if chunk not in month_chunks] + [target]
+            self._save_index()
+            for chunk in month_chunks:
+                os.remove(os.path.join(self.root, chunk))
+
+    # -- writes --------------------------------------------------------------
+
+    def _code(self, dictionary, value):
+        try:
+            return dictionary.index(value)
+        except ValueError:
+            dictionary.append(value)
+            return len(dictionary) - 1
+
+    def _roll(self, day, dca, status, amount, count):
+        """Add one event to the daily rollups, growing the arrays as needed"""
+
+        dcas, statuses, days = self._amount.shape
+        grow_dca = max(0, dca + 1 - dcas)
+        grow_status = max(0, status + 1 - statuses)
+
+        if self.origin is None:
+            self.origin = day
+        before = max(0, self.origin - day)
+        after = max(0, day - self.origin + 1 - days)
+        if after:
+            after = max(after, days // 2, 32)  # amortise growth for in-order appends
+
+        if grow_dca or grow_status or before or after:
+            padding = ((0, grow_dca), (0, grow_status), (before, after))
+            self._amount = np.pad(self._amount, padding)
+            self._count = np.pad(self._count, padding)
+            self.origin -= before
+
+        self._amount[dca, status, day - self.origin] += amount
+        self._count[dca, status, day - self.origin] += count
+        self._cumulative = None
+
+    def _add(self, day, case_id, dca, status, amount, count):
+        dca_code = self._code(self.dcas, dca)
+        status_code = self._code(self.statuses, status)
+
+        for column, value in zip(EVENT_COLUMNS, (day, case_id, dca_code, status_code, amount, count)):
+            self._buffer[column].append(value)
+        self._roll(day, dca_code, status_code, amount, count)
+
+    def append(self, day, case_id, dca, status, amount, count=1):
+        """Record a recovery (count=1) or a reversal (count=-1, negative amount)"""
+
+        with self._lock:
+            self._add(day_number(day), case_id, dca, status, amount, count)
+
+            if (len(self._buffer["day"]) >= self.chunk_rows
+                    or time.monotonic() - self._last_flush >= self.flush_interval):
+                self.flush()
+
+    def on_case_event(self, event, today=None):
+        """CaseEvent subscriber: log cases that become (or stop being) recovered"""
+
+        was = bool(event.old and event.old.get("recovered") == 1)
+        now = event.new.get("recovered") == 1
+        if was == now:
+            return
+
+        row = event.new
+        sign = 1 if now else -1
+        self.append(today or date.today(), row["case_id"], row["assigned_dca"],
+                    row["status"], sign * float(row["amount"]), sign)
+
+    def record_portfolio(self, day, outstanding, critical_cases, recovery_rate=None):
+        """Snapshot the portfolio's outstanding amount, critical case count and recovery rate (0-1) for a day"""
+
+        with self._lock:
+            rate = round(float(recovery_rate), 6) if recovery_rate is not None else None
+            value = [round(float(outstanding), 2), int(critical_cases), rate]
+            day = day_number(day)
+            if self.portfolio.get(day) != value:
+                self.portfolio[day] = value
+                self._portfolio_pending[day] = value
+                if time.monotonic() - self._last_flush >= self.flush_interval:
+                    self.flush()
+
+    # -- queries -------------------------------------------------------------
+
+    def __len__(self):
+        with self._lock:
+            return int(self._count.sum())
+
+    def _prefix(self):
+        if self._cumulative is None:
+            zeros = np.zeros(self._amount.shape[:2] + (1,))
+            self._cumulative = (
+                np.concatenate([zeros, np.cumsum(self._amount, axis=2)], axis=2),
+                np.concatenate([zeros.astype(np.int64), np.cumsum(self._count, axis=2)], axis=2)
+            )
+        return self._cumulative
+
+    def _selectors(self, dca, status):
+        dca_index = [self.dcas.index(dca)] if dca in self.dcas else ([] if dca else slice(None))
+        status_index = [self.statuses.index(status)] if status in self.statuses else ([] if status else slice(None))
+        return dca_index, status_index
+
+    def total(self, start, end, dca=None, status=None):
+        """(amount, count) recovered between start and end inclusive - O(1) in events"""
+
+        with self._lock:
+            if self.origin is None:
+                return 0.0, 0
+
+            days = self._amount.shape[2]
+            lo = min(max(day_number(start) - self.origin, 0), days)
+            hi = min(max(day_number(end) - self.origin + 1, 0), days)
+            if hi <= lo:
+                return 0.0, 0
+
+            dca_index, status_index = self._selectors(dca, status)
+            amount, count = self._prefix()
+            amount = (amount[:, :, hi] - amount[:, :, lo])[dca_index][:, status_index]
+            count = (count[:, :, hi] - count[:, :, lo])[dca_index][:, status_index]
+            return float(amount.sum()), int(count.sum())
+
+    def trend(self, start, end, granularity="week", dca=None, status=None):
+        """Per-day or per-week buckets between start and end inclusive"""
+
+        start = day_date(day_number(start))
+        end = day_date(day_number(end))
+        step = 7 if granularity == "week" else 1
+
+        buckets = []
+        bucket_start = start
+        while bucket_start <= end:
+            bucket_end = min(bucket_start + timedelta(days=step - 1), end)
+            amount, count = self.total(bucket_start, bucket_end, dca, status)
+            buckets.append({
+                "start": bucket_start.isoformat(),
+                "end": bucket_end.isoformat(),
+                "amount": round(amount, 2),
+                "count": count
+            })
+            bucket_start = bucket_end + timedelta(days=1)
+
+        return buckets
+
+    def period_over_period(self, start, end, dca=None, status=None):
+        """Totals for [start, end] and the equally long period just before it"""
+
+        first, last = day_number(start), day_number(end)
+        length = last - first + 1
+        amount, count = self.total(first, last, dca, status)
+        previous_amount, previous_count = self.total(first - length, first - 1, dca, status)
+
+        return {
+            "amount": amount,
+            "count": count,
+            "previous_amount": previous_amount,
+            "previous_count": previous_count,
+            "amount_change_pct": _change(amount, previous_amount),
+            "count_change_pct": _change(count, previous_count)
+        }
+
+    def portfolio_change(self, start, end):
+        """
+        Outstanding amount change (%), critical case change and recovery rate
+        change (percentage points) from the snapshot in effect before start to
+        the one in effect at end; None where there is no earlier snapshot (or
+        rate) to compare with
+        """
+
+        with self._lock:
+            days = sorted(self.portfolio)
+            before = bisect_right(days, day_number(start) - 1)
+            after = bisect_right(days, day_number(end))
+            if not before or not after:
+                return {"outstanding_change_pct": None, "critical_change": None, "recovery_rate_change": None}
+            previous = self.portfolio[days[before - 1]]
+            current = self.portfolio[days[after - 1]]
+
+        rates = [snapshot[2] if len(snapshot) > 2 else None for snapshot in (previous, current)]
+        return {
+            "outstanding_change_pct": _change(current[0], previous[0]),
+            "critical_change": current[1] - previous[1],
+            "recovery_rate_change": round((rates[1] - rates[0]) * 100, 1) if None not in rates else None
+        }
+
+    def events(self, start, end):
+        """Raw events between start and end (reads only the overlapping month partitions)"""
+
+        first, last = day_number(start), day_number(end)
+        months = set()
+        current = day_date(first).replace(day=1)
+        while current <= day_date(last):
+            months.add(current.strftime("%Y-%m"))
+            current = (current + timedelta(days=32)).replace(day=1)
+
+        with self.exclusive():  # a compaction elsewhere can't delete chunks mid-read
+            parts = [self._read_chunk(chunk) for chunk in self.chunks if chunk[:7] in months]
+            if self._buffer["day"]:
+                parts.append({
+                    column: np.asarray(values, dtype=dtype)
+                    for (column, dtype), values in zip(EVENT_COLUMNS.items(), self._buffer.values())
+                })
+            dcas, statuses = list(self.dcas), list(self.statuses)
+
+        rows = []
+        for part in parts:
+            selected = (part["day"] >= first) & (part["day"] <= last)
+            for i in np.flatnonzero(selected):
+                rows.append({
+                    "date": day_date(part["day"][i]).isoformat(),
+                    "case_id": str(part["case_id"][i]),
+                    "dca": dcas[part["dca"][i]],
+                    "status": statuses[part["status"][i]],
+                    "amount": float(part["amount"][i]),
+                    "count": int(part["count"][i])
+                })
+        rows.sort(key=lambda row: row["date"])
+        return rows
+
+
+def _change(current, previous):
+    if not previous:
+        return None
+    return round((current - previous) / abs(previous) * 100, 1)
+
+
+def backfill(history, store, today=None, batch_size=10000):
+    """
+    Seed an empty history from the case table's recovered cases. The case
+    table has no recovery date, so the last DCA contact is used instead.
+    Cases are read batch_size at a time, so a large SQLite store is never
+    held in memory. Returns the number of recoveries added, or None if the
+    history already holds some (possibly written by another process in the
+    meantime).
+    """
+
+    today_number = day_number(today or date.today())
+    added = 0
+
+    with history.exclusive():
+        if len(history):
+            return None
+
+        for rows in store.iter_cases([("recovered", "==", 1)], batch_size):
+            for row in rows:
+                day = today_number - int(row["last_contact_days_ago"] or 0)
+                history.append(day, row["case_id"], row["assigned_dca"], row["status"], float(row["amount"]))
+            added += len(rows)
+
+        history.flush()
+
+    return added
+
+
+def main():
+    """CLI: backfill or inspect the recovery history"""
+
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Manage the FedEx DCA recovery history")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("backfill", help="seed the history from recovered cases in the case store")
+    trend = subparsers.add_parser("trend", help="print a recovery trend")
+    trend.add_argument("--days", type=int, default=28)
+    trend.add_argument("--granularity", choices=["day", "week"], default="week")
+    args = parser.parse_args()
+
+    history = RecoveryHistory()
+
+    if args.command == "backfill":
+        from case_store import open_store
+
+        count = backfill(history, open_store())
+        if count is None:
+            print(f"⚠️  History already holds {len(history):,} recoveries - not backfilling")
+            return
+        print(f"✅ Backfilled {count:,} recoveries into {history.root}")
+    else:
+        end = date.today()
+        start = end - timedelta(days=args.days - 1)
+        for bucket in history.trend(start, end, args.granularity):
+            print(f"   {bucket['start']} - {bucket['end']}: ${bucket['amount']:>14,.2f}  ({bucket['count']} cases)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""
+FedEx DCA System - Shadow Scoring
+Runs a candidate recovery model next to the serving (primary) one on live
+traffic without swapping it in: /api/cases and /api/case/<id> hand the rows
+they scored to a background worker, which scores them again with the
+candidate in batches and records how often and by how much the two disagree.
+
+The request only pays for a non-blocking queue put; when the worker falls
+behind, rows are dropped (and counted) rather than slowing requests down.
+The worker also times both models on the same rows, uncached, so the
+candidate's scoring-latency overhead can be compared like for like.
+
+Every comparison is appended to data/shadow/<candidate>.csv for offline
+analysis; running totals are served at /api/shadow.
+
+Enable by pointing at a saved artifact version (see model_artifacts.py):
+    DCA_SHADOW_MODEL_VERSION=20261019-093000 python app.py
+"""
+
+import csv
+import os
+import queue
+import re
+import threading
+import time
+from datetime import datetime
+
+from derived_views import score_case
+
+SHADOW_DIR = "data/shadow"
+
+# Rows scored per candidate batch, and rows allowed to wait for the worker
+BATCH_SIZE = 500
+MAX_QUEUED_ROWS = 20000
+
+# Upper edges (percentage points) of the recovery probability difference histogram
+PROBABILITY_DIFF_BUCKETS = [1, 5, 10, 25]
+
+LOG_COLUMNS = [
+    "timestamp", "case_id",
+    "primary_probability", "candidate_probability",
+    "primary_days", "candidate_days",
+    "primary_priority_score", "candidate_priority_score",
+    "primary_priority", "candidate_priority"
+]
+
+
+class ShadowScorer:
+    """Background comparison of a candidate model against the primary"""
+
+    def __init__(self, primary, candidate, log_dir=SHADOW_DIR,
+                 batch_size=BATCH_SIZE, max_queued_rows=MAX_QUEUED_ROWS):
+        self.primary = primary
+        self.candidate = candidate
+        self.primary_version = getattr(primary, "model_version", "primary")
+        self.candidate_version = getattr(candidate, "model_version", "candidate")
+        self.batch_size = batch_size
+        self.max_queued_rows = max_queued_rows
+
+        name = re.sub(r"[^A-Za-z0-9_.@-]+", "_", self.candidate_version)
+        self.log_path = os.path.join(log_dir, f"{name}.csv")
+
+        self._queue = queue.Queue()
+        self._queued_rows = 0
+        self._lock = threading.Lock()
+        self._thread = None
+
+        self.submitted = 0
+        self.dropped = 0
+        self.compared = 0
+        self.priority_disagreements = 0
+        self.probability_abs_diff = 0.0
+        self.probability_max_diff = 0.0
+        self.score_abs_diff = 0.0
+        self.days_disagreements = 0
+        self.histogram = [0] * (len(PROBABILITY_DIFF_BUCKETS) + 1)
+        self.primary_seconds = 0.0
+        self.candidate_seconds = 0.0
+        self.submit_seconds = 0.0
+        self.submit_calls = 0
+        self.errors = 0
+
+    def submit(self, scored):
+        """
+        Queue [(row, primary_scores), ...] from a request for shadow scoring.
+        Never blocks; drops the batch if the worker is too far behind.
+        """
+
+        started = time.perf_counter()
+        items = [(dict(row), scores) for row, scores in scored]
+
+        with self._lock:
+            self.submit_calls += 1
+            if self._queued_rows + len(items) > self.max_queued_rows:
+                self.dropped += len(items)
+                items = None
+            else:
+                self._queued_rows += len(items)
+                self.submitted += len(items)
+
+        if items:
+            self._ensure_started()
+            self._queue.put(items)
+
+        with self._lock:
+            self.submit_seconds += time.perf_counter() - started
+
+    def flush(self, timeout=None):
+        """Wait until every queued row has been compared; False on timeout"""
+
+        tasks = self._queue
+        with tasks.all_tasks_done:
+            return tasks.all_tasks_done.wait_for(lambda: tasks.unfinished_tasks == 0, timeout)
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="dca-shadow", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            batches = [self._queue.get()]
+            rows = len(batches[0])
+            # Take whatever else is waiting, up to one batch worth of rows
+            while rows < self.batch_size:
+                try:
+                    batches.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+                rows += len(batches[-1])
+
+            try:
+                self._compare([item for batch in batches for item in batch])
+            except Exception as e:
+                self.errors += 1
+                print(f"   ⚠️  Shadow scoring batch failed: {e}")
+            finally:
+                with self._lock:
+                    self._queued_rows -= rows
+                for _ in batches:
+                    self._queue.task_done()
+
+    def _compare(self, items):
+        rows = [row for row, _ in items]
+
+        started = time.perf_counter()
+        for row in rows:
+            score_case(self.primary, row)
+        primary_elapsed = time.perf_counter() - started
+
+        started = time.perf_counter()
+        candidate_scores = [score_case(self.candidate, row) for row in rows]
+        candidate_elapsed = time.perf_counter() - started
+
+        stamp = datetime.now().isoformat(timespec="seconds")
+        records = []
+        with self._lock:
+            self.primary_seconds += primary_elapsed
+            self.candidate_seconds += candidate_elapsed
+
+            for (row, primary), candidate in zip(items, candidate_scores):
+                diff = abs(candidate["recovery_probability"] - primary["recovery_probability"])
+                self.compared += 1
+                self.probability_abs_diff += diff
+                self.probability_max_diff = max(self.probability_max_diff, diff)
+                self.score_abs_diff += abs(candidate["priority_score"] - primary["priority_score"])
+                self.priority_disagreements += candidate["priority"] != primary["priority"]
+                self.days_disagreements += (
+                    candidate["expected_days_to_recovery"] != primary["expected_days_to_recovery"]
+                )
+                bucket = sum(diff >= edge for edge in PROBABILITY_DIFF_BUCKETS)
+                self.histogram[bucket] += 1
+
+                records.append([
+                    stamp, row["case_id"],
+                    primary["recovery_probability"], candidate["recovery_probability"],
+                    primary["expected_days_to_recovery"], candidate["expected_days_to_recovery"],
+                    primary["priority_score"], candidate["priority_score"],
+                    primary["priority"], candidate["priority"]
+                ])
+
+        self._log(records)
+
+    def _log(self, records):
+        os.makedirs(os.path.dirname(self.log_path) or ".", exist_ok=True)
+        new_file = not os.path.exists(self.log_path)
+        with open(self.log_path, "a", newline="") as f:
+            writer = csv.writer(f)
+            if new_file:
+                writer.writerow(LOG_COLUMNS)
+            writer.writerows(records)
+
+    def stats(self):
+        with self._lock:
+            compared = self.compared
+            labels = [f"<{PROBABILITY_DIFF_BUCKETS[0]}"]
+            labels += [f"{low}-{high}" for low, high in zip(PROBABILITY_DIFF_BUCKETS, PROBABILITY_DIFF_BUCKETS[1:])]
+            labels += [f">={PROBABILITY_DIFF_BUCKETS[-1]}"]
+
+            primary_us = self.primary_seconds / compared * 1e6 if compared else None
+            candidate_us = self.candidate_seconds / compared * 1e6 if compared else None
+
+            return {
+                "primary": self.primary_version,
+                "candidate": self.candidate_version,
+                "submitted": self.submitted,
+                "compared": compared,
+                "dropped": self.dropped,
+                "queued": self._queued_rows,
+                "errors": self.errors,
+                "disagreement": {
+                    "priority_rate": round(self.priority_disagreements / compared, 4) if compared else None,
+                    "expected_days_rate": round(self.days_disagreements / compared, 4) if compared else None,
+                    "probability_mean_abs_diff": round(self.probability_abs_diff / compared, 3) if compared else None,
+                    "probability_max_abs_diff": round(self.probability_max_diff, 3),
+                    "priority_score_mean_abs_diff": round(self.score_abs_diff / compared, 3) if compared else None,
+                    "probability_diff_histogram": dict(zip(labels, self.histogram))
+                },
+                "latency": {
+                    "primary_us_per_case": round(primary_us, 2) if primary_us is not None else None,
+                    "candidate_us_per_case": round(candidate_us, 2) if candidate_us is not None else None,
+                    "candidate_overhead_pct": (
+                        round((candidate_us / primary_us - 1) * 100, 1) if primary_us else None
+                    ),
+                    "request_submit_us": (
+                        round(self.submit_seconds / self.submit_calls * 1e6, 2) if self.submit_calls else None
+                    )
+                },
+                "log": self.log_path
+            }
@@ -0,0 +1,144 @@
+"""
+FedEx DCA System - API Tests
+"""
+
+import contextlib
+import importlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from datetime import date, timedelta
+from unittest import mock
+
+from generate_data import generate_cases
+
+_cwd = None
+_directory = None
+app_module = None
+
+
+def setUpModule():
+    """Serve a small generated portfolio with freshly trained models from a scratch dir"""
+
+    global _cwd, _directory, app_module
+
+    _cwd = os.getcwd()
+    _directory = tempfile.mkdtemp()
+    os.chdir(_directory)
+    os.makedirs("data")
+    generate_cases(300).to_csv("data/cases_1000.csv", index=False)
+
+    os.environ["DCA_DEFERRED_LOAD"] = "0"
+    with contextlib.redirect_stdout(io.StringIO()):
+        import train_model
+        train_model.train_models()
+        sys.modules.pop("app", None)
+        app_module = importlib.import_module("app")
+
+
+def tearDownModule():
+    sys.modules.pop("app", None)
+    os.environ.pop("DCA_DEFERRED_LOAD", None)
+    os.chdir(_cwd)
+    shutil.rmtree(_directory, ignore_errors=True)
+
+
+class CaseWriteValidationTests(unittest.TestCase):
+
+    def setUp(self):
+        self.client = app_module.app.test_client()
+        self.case_id = app_module.case_store.to_dataframe()["case_id"].iloc[0]
+
+    def assert_portfolio_routes_ok(self):
+        for route in ["/api/metrics", "/api/dcas", "/api/alerts", "/api/charts/distribution", "/api/cases"]:
+            with self.subTest(route=route):
+                self.assertEqual(self.client.get(route).status_code, 200)
+
+    def test_create_with_bad_amount_is_rejected(self):
+        version = app_module.case_store.version
+        case = generate_cases(1).iloc[0].to_dict()
+        case.update(case_id="DCA-API-1", amount="lots")
+
+        response = self.client.post("/api/cases", json=case)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("amount", response.get_json()["error"])
+        self.assertEqual(app_module.case_store.version, version)
+        self.assertEqual(self.client.get("/api/case/DCA-API-1").status_code, 404)
+        self.assert_portfolio_routes_ok()
+
+    def test_create_with_non_object_body_is_rejected(self):
+        self.assertEqual(self.client.post("/api/cases", json=[1, 2]).status_code, 400)
+
+    def test_status_update_with_bad_days_is_rejected(self):
+        response = self.client.put(
+            f"/api/case/{self.case_id}/status",
+            json={"status": "Promised", "days_to_recovery": "soon"}
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("days_to_recovery", response.get_json()["error"])
+        self.assertNotEqual(app_module.case_store.get_case(self.case_id)["days_to_recovery"], "soon")
+        self.assert_portfolio_routes_ok()
+
+    def test_contact_with_bad_status_is_rejected(self):
+        response = self.client.post(f"/api/case/{self.case_id}/contact", json={"status": 3})
+        self.assertEqual(response.status_code, 400)
+
+
+class HomeTests(unittest.TestCase):
+
+    def test_index_lists_every_route(self):
+        listed = app_module.app.test_client().get("/").get_json()["endpoints"]
+        paths = {endpoint.split()[-1] for endpoint in listed}
+
+        for rule in app_module.app.url_map.iter_rules():
+            if rule.endpoint in ("static", "home"):
+                continue
+            with self.subTest(rule=rule.rule):
+                self.assertIn(rule.rule, paths)
+                writes = rule.methods - {"GET", "HEAD", "OPTIONS", "PATCH"}
+                for method in writes:
+                    self.assertIn(f"{method} {rule.rule}", listed)
+
+
+class MetricsTests(unittest.TestCase):
+
+    def test_outstanding_and_critical_changes_come_from_history(self):
+        client = app_module.app.test_client()
+        summary = app_module.live_views.aggregates.summary()
+        month_start = date.today().replace(day=1)
+
+        app_module.recovery_history.portfolio.clear()
+        self.assertEqual(client.get("/api/metrics").get_json()["outstanding_change"], "n/a")
+
+        app_module.recovery_history.record_portfolio(
+            month_start - timedelta(days=1), summary["total_amount"] / 2, summary["critical_cases"] - 3,
+            summary["recovery_rate"] - 0.05
+        )
+        metrics = app_module.compute_metrics(app_module.live_views)
+        self.assertEqual(metrics["outstanding_change"], "+100.0%")
+        self.assertEqual(metrics["critical_change"], "+3")
+        self.assertEqual(metrics["recovery_rate_change"], "+5.0 pts")
+
+
+class StreamTests(unittest.TestCase):
+
+    def test_stream_starts_with_a_snapshot(self):
+        response = app_module.app.test_client().get("/api/stream")
+        self.addCleanup(response.close)
+        self.assertEqual(response.mimetype, "text/event-stream")
+        self.assertIn(b"event: snapshot", next(response.response))
+
+    def test_streams_past_the_cap_are_refused(self):
+        with mock.patch.object(app_module.live_updates, "max_clients", 0):
+            response = app_module.app.test_client().get("/api/stream")
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers["Retry-After"], "30")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,211 @@
+"""
+FedEx DCA System - Case Store Tests
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+import warnings
+from unittest import mock
+
+from case_store import DataFrameCaseStore, DuplicateCase, PartitionedCaseStore, SQLiteCaseStore
+from generate_data import generate_cases
+
+
+def new_case(**overrides):
+    case = {
+        "case_id": "DCA-TEST-1",
+        "customer_name": "Test Corp",
+        "amount": 12500.0,
+        "days_overdue": 40,
+        "invoice_date": "2026-08-01",
+        "industry": "Retail",
+        "state": "TX",
+        "customer_avg_days_late": 12.5,
+        "customer_late_count_24m": 2,
+        "assigned_dca": "DCA-Beta",
+        "status": "Active",
+        "last_contact_days_ago": 3,
+        "contact_attempts": 1
+    }
+    case.update(overrides)
+    return case
+
+
+BAD_INSERTS = [
+    {"amount": "lots"},
+    {"amount": None},
+    {"amount": float("nan")},
+    {"amount": -5},
+    {"amount": True},
+    {"days_overdue": 4.5},
+    {"days_overdue": "soon"},
+    {"invoice_date": "yesterday"},
+    {"invoice_date": 20260801},
+    {"customer_name": 42},
+    {"case_id": ""},
+    {"status": "Lost"},
+    {"recovered": "yes"},
+    {"recovered": 2},
+    {"days_to_recovery": "soon"}
+]
+
+BAD_UPDATES = [
+    ({"days_to_recovery": "soon"}, None),
+    ({"recovered": "maybe"}, None),
+    ({"status": "Bogus"}, None),
+    ({"last_contact_days_ago": [1]}, None),
+    ({"assigned_dca": 7}, None),
+    ({}, {"contact_attempts": "one"}),
+    ({}, {"status": 1})
+]
+
+
+class ValidationMixin:
+    """Checks run against every backend (make_store() supplied by subclasses)"""
+
+    def setUp(self):
+        self.df = generate_cases(60)
+        self.store = self.make_store()
+        self.case_id = self.df["case_id"].iloc[0]
+
+    def test_bad_insert_is_rejected_and_store_unchanged(self):
+        for overrides in BAD_INSERTS:
+            with self.subTest(overrides=overrides):
+                version, size = self.store.version, len(self.store)
+                with self.assertRaises(ValueError):
+                    self.store.insert_case(new_case(**overrides))
+                self.assertEqual((self.store.version, len(self.store)), (version, size))
+
+        # The store still aggregates cleanly
+        self.assertEqual(self.store.summary()["cases"], len(self.df))
+        self.assertEqual(sum(self.store.status_counts().values()), len(self.df))
+
+    def test_bad_update_is_rejected_and_row_unchanged(self):
+        before = self.store.get_case(self.case_id)
+        for changes, increments in BAD_UPDATES:
+            with self.subTest(changes=changes, increments=increments):
+                with self.assertRaises(ValueError):
+                    self.store.update_case(self.case_id, changes, increments)
+        self.assertEqual(self.store.get_case(self.case_id), before)
+
+    def test_values_are_coerced(self):
+        row, _ = self.store.insert_case(new_case(amount="12500.5", days_overdue="40", recovered=True))
+        self.assertEqual((row["amount"], row["days_overdue"], row["recovered"]), (12500.5, 40, 1))
+
+        _, new, _ = self.store.update_case(self.case_id, {"days_to_recovery": "12", "recovered": False})
+        self.assertEqual((new["days_to_recovery"], new["recovered"]), (12.0, 0))
+        self.assertIsInstance(self.store.summary()["total_amount"], float)
+
+
+class DataFrameStoreValidationTests(ValidationMixin, unittest.TestCase):
+
+    def make_store(self):
+        return DataFrameCaseStore(self.df)
+
+    def test_insert_keeps_column_dtypes(self):
+        dtypes = self.store.to_dataframe().dtypes
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            self.store.insert_case(new_case())
+        self.assertEqual(self.store.to_dataframe().dtypes.to_dict(), dtypes.to_dict())
+
+
+class SQLiteStoreValidationTests(ValidationMixin, unittest.TestCase):
+
+    def make_store(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        store = SQLiteCaseStore(os.path.join(self.directory, "cases.db"))
+        store.import_frame(self.df)
+        return store
+
+
+class PartitionedStoreValidationTests(ValidationMixin, unittest.TestCase):
+
+    def make_store(self):
+        return PartitionedCaseStore.from_dataframe(self.df, "assigned_dca")
+
+
+class PartitionedStoreTests(unittest.TestCase):
+
+    def setUp(self):
+        self.df = generate_cases(300)
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_index_is_built_without_materialising_partitions(self):
+        with mock.patch.object(DataFrameCaseStore, "to_dataframe", side_effect=AssertionError("full read")):
+            store = PartitionedCaseStore.from_dataframe(self.df, "state")
+            self.assertEqual(store.find_cases(), DataFrameCaseStore(self.df).find_cases())
+
+    def test_version_is_counted_not_queried(self):
+        store = PartitionedCaseStore.from_dataframe(self.df, "assigned_dca")
+        case_id = self.df["case_id"].iloc[0]
+
+        with mock.patch.object(DataFrameCaseStore, "version", new_callable=mock.PropertyMock) as child_version:
+            self.assertEqual(store.version, 1)
+            self.assertEqual(store.update_case(case_id, {"status": "Stalled"})[2], 2)
+            self.assertEqual(store.update_case(case_id, {})[2], 2)
+            self.assertEqual(store.insert_case(new_case(assigned_dca="DCA-New"))[1], 3)
+            self.assertEqual(store.version, 3)
+        child_version.assert_not_called()
+
+    def test_sqlite_reopen_keeps_order_without_the_csv(self):
+        csv_path = os.path.join(self.directory, "cases.csv")
+        self.df.to_csv(csv_path, index=False)
+        parts = os.path.join(self.directory, "parts")
+        imported = PartitionedCaseStore.open_sqlite(parts, "state", csv_path, chunksize=64)
+        os.remove(csv_path)
+
+        with mock.patch.object(SQLiteCaseStore, "to_dataframe", side_effect=AssertionError("full read")):
+            store = PartitionedCaseStore.open_sqlite(parts, "state", csv_path)
+
+        self.assertEqual([row["case_id"] for row in store.find_cases()], list(self.df["case_id"]))
+        self.assertEqual(store.version, imported.version)
+
+    def test_sqlite_partitions_shared_between_stores(self):
+        csv_path = os.path.join(self.directory, "cases.csv")
+        self.df.to_csv(csv_path, index=False)
+        parts = os.path.join(self.directory, "parts")
+        writer = PartitionedCaseStore.open_sqlite(parts, "assigned_dca", csv_path)
+        reader = PartitionedCaseStore.open_sqlite(parts, "assigned_dca", csv_path)
+        start = reader.version
+
+        record, version = writer.insert_case(new_case())
+        self.assertEqual(reader.version, version)
+        self.assertEqual(reader.version, start + 1)
+        self.assertEqual(reader.get_case(record["case_id"])["customer_name"], "Test Corp")
+
+        # A partition file the reader has never seen, then an update through the reader
+        writer.insert_case(new_case(case_id="DCA-TEST-2", assigned_dca="DCA-New"))
+        self.assertEqual(reader.version, start + 2)
+        self.assertEqual(len(reader.find_cases([("assigned_dca", "==", "DCA-New")])), 1)
+        self.assertEqual(reader.update_case("DCA-TEST-2", {"status": "Stalled"})[2], start + 3)
+        self.assertEqual(writer.get_case("DCA-TEST-2")["status"], "Stalled")
+        self.assertEqual(writer.version, start + 3)
+
+        with self.assertRaises(DuplicateCase):
+            reader.insert_case(new_case())
+        self.assertEqual(reader.find_cases()[-2:], [writer.get_case("DCA-TEST-1"), writer.get_case("DCA-TEST-2")])
+
+    def test_order_by_nullable_column(self):
+        self.df.loc[self.df.index[::3], "days_to_recovery"] = None
+        expected = SQLiteCaseStore(os.path.join(self.directory, "cases.db"))
+        expected.import_frame(self.df)
+        stores = {
+            "memory": PartitionedCaseStore.from_dataframe(self.df, "assigned_dca"),
+            "unpartitioned": DataFrameCaseStore(self.df)
+        }
+
+        for descending in (False, True):
+            want = expected.find_cases(order_by="days_to_recovery", descending=descending, limit=50)
+            for name, store in stores.items():
+                with self.subTest(store=name, descending=descending):
+                    got = store.find_cases(order_by="days_to_recovery", descending=descending, limit=50)
+                    self.assertEqual([row["case_id"] for row in got], [row["case_id"] for row in want])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,160 @@
+"""
+FedEx DCA System - Request Coalescing Tests
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from flask import Flask
+
+import profiling
+from coalescing import SingleFlight, coalesced
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("timed out")
+        time.sleep(0.005)
+
+
+class SingleFlightTests(unittest.TestCase):
+
+    def run_concurrently(self, flight, key, fn, callers):
+        """Start the leader, let the others join it while fn is blocked, return every outcome"""
+
+        outcomes = [None] * callers
+
+        def call(slot):
+            try:
+                outcomes[slot] = ("ok", flight.do(key, fn))
+            except Exception as exc:
+                outcomes[slot] = ("error", exc)
+
+        threads = [threading.Thread(target=call, args=(slot,)) for slot in range(callers)]
+        threads[0].start()
+        wait_for(lambda: flight.in_flight() == 1)
+        for thread in threads[1:]:
+            thread.start()
+        wait_for(lambda: flight.shared == callers - 1)
+        return threads, outcomes
+
+    def test_concurrent_callers_share_one_call(self):
+        flight, release, calls = SingleFlight(), threading.Event(), []
+
+        def compute():
+            calls.append(1)
+            release.wait(5)
+            return {"rows": [1, 2, 3]}
+
+        threads, outcomes = self.run_concurrently(flight, "cases", compute, 5)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(outcomes, [("ok", {"rows": [1, 2, 3]})] * 5)
+        self.assertEqual(flight.stats(), {"leaders": 1, "shared": 4, "retries": 0, "in_flight": 0})
+
+        # The next call for the key starts a new computation
+        self.assertEqual(flight.do("cases", compute), {"rows": [1, 2, 3]})
+        self.assertEqual(len(calls), 2)
+
+    def test_waiters_retry_after_the_leader_fails(self):
+        flight, release, calls = SingleFlight(), threading.Event(), []
+
+        def compute():
+            calls.append(1)
+            if len(calls) == 1:
+                release.wait(5)
+                raise RuntimeError("leader failed")
+            return len(calls)
+
+        threads, outcomes = self.run_concurrently(flight, "alerts", compute, 3)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(outcomes[0][0], "error")
+        self.assertEqual(sorted(result for _, result in outcomes[1:]), [2, 3])
+        self.assertEqual(flight.retries, 2)
+        self.assertEqual(flight.in_flight(), 0)
+
+
+class CoalescedViewTests(unittest.TestCase):
+
+    def setUp(self):
+        self.flight = SingleFlight()
+        self.data_version = 1
+        self.release = threading.Event()
+        self.renders = 0
+
+        self.app = Flask("coalescing_test")
+        profiling.init_app(self.app)
+
+        @self.app.route("/cases")
+        @coalesced(self.flight, lambda: self.data_version)
+        def cases():
+            self.renders += 1
+            self.release.wait(5)
+            return {"version": self.data_version, "render": self.renders}
+
+    def get_concurrently(self, *urls, headers=None):
+        """GET the first URL, then the rest while its view is blocked; return the bodies"""
+
+        bodies = [None] * len(urls)
+
+        def get(slot):
+            bodies[slot] = self.app.test_client().get(urls[slot], headers=headers).get_json()
+
+        threads = [threading.Thread(target=get, args=(slot,)) for slot in range(len(urls))]
+        threads[0].start()
+        wait_for(lambda: self.renders == 1)
+        for thread in threads[1:]:
+            thread.start()
+        time.sleep(0.1)
+        self.release.set()
+        for thread in threads:
+            thread.join()
+        return bodies
+
+    def test_identical_requests_share_a_render(self):
+        bodies = self.get_concurrently("/cases?limit=5", "/cases?limit=5", "/cases?limit=5")
+        self.assertEqual(bodies, [{"version": 1, "render": 1}] * 3)
+        self.assertEqual(self.flight.shared, 2)
+
+    def test_data_version_change_starts_a_new_render(self):
+        self.release.set()
+        client = self.app.test_client()
+        self.assertEqual(client.get("/cases").get_json(), {"version": 1, "render": 1})
+        self.data_version = 2
+        self.assertEqual(client.get("/cases").get_json(), {"version": 2, "render": 2})
+        self.assertEqual(self.flight.leaders, 2)
+
+    def test_profile_flag_without_profiling_is_coalesced(self):
+        with mock.patch.dict(os.environ, {"DCA_PROFILE_TOKEN": "secret"}):
+            bodies = self.get_concurrently("/cases?profile=1", "/cases?profile=1",
+                                           headers={"X-Admin-Token": "wrong"})
+        self.assertEqual(bodies, [{"version": 1, "render": 1}] * 2)
+        self.assertEqual(self.flight.shared, 1)
+
+    def test_profiled_request_runs_on_its_own(self):
+        self.release.set()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        with mock.patch.dict(os.environ, {"DCA_PROFILE_TOKEN": "secret"}), \
+                mock.patch.object(profiling, "PROFILE_DIR", directory):
+            response = self.app.test_client().get("/cases?profile=store", headers={"X-Admin-Token": "secret"})
+
+        self.assertTrue(response.headers["X-Profile-File"].startswith(directory))
+        self.assertEqual(self.flight.leaders, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,202 @@
+"""
+FedEx DCA System - Derived View Tests
+"""
+
+import os
+import random
+import shutil
+import tempfile
+import threading
+import unittest
+from contextlib import contextmanager
+from unittest import mock
+
+from case_store import DataFrameCaseStore, PartitionedCaseStore, SQLiteCaseStore, VALID_STATUSES
+from derived_views import ALERT_RULES, AlertIndex, PortfolioAggregates, ScoreTable
+from events import CaseEvent
+from generate_data import generate_cases
+
+
+def random_changes(rng):
+    """A write likely to move cases in and out of the alert rules"""
+
+    changes = {"status": rng.choice(sorted(VALID_STATUSES))}
+    if rng.random() < 0.5:
+        changes["last_contact_days_ago"] = rng.randint(0, 12)
+    return changes
+
+
+class AlertIndexMixin:
+    """Incremental alert matches agree with a fresh rebuild (make_store() supplied by subclasses)"""
+
+    def setUp(self):
+        self.df = generate_cases(400)
+        # Push plenty of cases into the rule windows
+        self.df.loc[self.df.index[::3], "days_overdue"] = 90
+        self.df.loc[self.df.index[::4], "amount"] = 80000.0
+        self.store = self.make_store()
+
+    def write(self, case_id, changes, increments=None):
+        old, new, version = self.store.update_case(case_id, changes, increments)
+        return CaseEvent("update", case_id, old, new, version)
+
+    def test_events_match_rebuild_without_requerying_rules(self):
+        rng = random.Random(7)
+        index = AlertIndex(self.store)
+        aggregates = PortfolioAggregates(self.store)
+        case_ids = list(self.df["case_id"])
+
+        with mock.patch.object(self.store, "find_cases", side_effect=AssertionError("rule re-queried")):
+            for step in range(300):
+                if step % 25 == 0:
+                    case = generate_cases(1).iloc[0].to_dict()
+                    case.update(case_id=f"NEW-{step}", status="Stalled", amount=90000.0 + step)
+                    row, version = self.store.insert_case(case)
+                    event = CaseEvent("insert", row["case_id"], None, row, version)
+                    case_ids.append(row["case_id"])
+                elif step % 2:
+                    event = self.write(rng.choice(case_ids), random_changes(rng))
+                else:
+                    event = self.write(rng.choice(case_ids), {}, {"contact_attempts": 1})
+                index.apply(event)
+                aggregates.apply(event)
+
+        fresh = AlertIndex(self.store)
+        for rule in ALERT_RULES:
+            with self.subTest(rule=rule):
+                self.assertTrue(fresh.rows(rule))
+                self.assertEqual(index.rows(rule), fresh.rows(rule))
+        self.assertEqual(index.rebuilds, 1)
+
+        # Totals kept by adding and subtracting amounts drift from a fresh sum in the last float bits
+        summary, expected = aggregates.summary(), PortfolioAggregates(self.store).summary()
+        self.assertEqual(summary.keys(), expected.keys())
+        for name, value in expected.items():
+            self.assertAlmostEqual(summary[name], value, places=4, msg=name)
+
+    def test_event_racing_a_rebuild_is_applied_once(self):
+        aggregates, index = PortfolioAggregates(self.store), AlertIndex(self.store)
+        case = generate_cases(1).iloc[0].to_dict()
+        case.update(case_id="NEW-RACE", status="Stalled", amount=95000.0, days_overdue=90)
+        row, version = self.store.insert_case(case)
+        event = CaseEvent("insert", row["case_id"], None, row, version)
+
+        original = self.store.snapshot
+        for view in (aggregates, index):
+            rebuilding, release = threading.Event(), threading.Event()
+
+            @contextmanager
+            def held_snapshot():
+                with original() as snapshot_version:
+                    rebuilding.set()
+                    release.wait(5)
+                    yield snapshot_version
+
+            with mock.patch.object(self.store, "snapshot", held_snapshot):
+                rebuild = threading.Thread(target=view.rebuild)
+                rebuild.start()
+                rebuilding.wait(5)
+                # The event arrives while the rebuild that already reflects it is running
+                apply = threading.Thread(target=view.apply, args=(event,))
+                apply.start()
+                apply.join(0.2)
+                release.set()
+                rebuild.join()
+                apply.join()
+            self.assertEqual(view.version, version)
+
+        self.assertEqual(aggregates.summary()["cases"], len(self.store))
+        self.assertEqual(aggregates.status_counts(), PortfolioAggregates(self.store).status_counts())
+        fresh = AlertIndex(self.store)
+        for rule in ALERT_RULES:
+            self.assertEqual(index.rows(rule), fresh.rows(rule))
+
+    def test_rebuild_reads_data_and_version_together(self):
+        index = AlertIndex(self.store)
+        case_id = index.rows("stalled_high_value")[0]["case_id"]
+        writes = []
+
+        def find_cases(*args, **kwargs):
+            # A write attempted mid-rebuild must land after it
+            if not writes:
+                writer = threading.Thread(target=lambda: writes.append(self.write(case_id, {"status": "Active"})))
+                writer.start()
+                writer.join(0.2)
+            return original(*args, **kwargs)
+
+        original = self.store.find_cases
+        with mock.patch.object(self.store, "find_cases", side_effect=find_cases):
+            index.rebuild()
+
+        self.assertIn(case_id, [row["case_id"] for row in index.rows("stalled_high_value")])
+        while not writes:
+            threading.Event().wait(0.01)
+        self.assertEqual(writes[0].version, index.version + 1)
+        index.apply(writes[0])
+        self.assertNotIn(case_id, [row["case_id"] for row in index.rows("stalled_high_value")])
+
+
+class DataFrameAlertIndexTests(AlertIndexMixin, unittest.TestCase):
+
+    def make_store(self):
+        return DataFrameCaseStore(self.df)
+
+
+class SQLiteAlertIndexTests(AlertIndexMixin, unittest.TestCase):
+
+    def make_store(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        store = SQLiteCaseStore(os.path.join(directory, "cases.db"))
+        store.import_frame(self.df)
+        return store
+
+
+class PartitionedAlertIndexTests(AlertIndexMixin, unittest.TestCase):
+
+    def make_store(self):
+        return PartitionedCaseStore.from_dataframe(self.df, "assigned_dca")
+
+
+class PerCaseModel:
+    """Stands in for a trained classifier: no feature_key, so scores are cached per case"""
+
+    model_version = "per-case@1"
+
+    def predict_recovery_probability(self, amount, days_overdue, avg_days_late, dca):
+        return 50.0
+
+    def predict_days_to_recovery(self, amount, days_overdue, recovery_prob):
+        return 30
+
+    def get_priority_score(self, amount, days_overdue, recovery_prob):
+        return 5.0
+
+
+class ScoreTableTests(unittest.TestCase):
+
+    def test_case_versions_are_bounded_by_the_cache(self):
+        df = generate_cases(300)
+        store = DataFrameCaseStore(df)
+        table = ScoreTable(PerCaseModel(), maxsize=50)
+
+        for case_id in df["case_id"]:
+            old, new, version = store.update_case(case_id, {"status": "Promised"})
+            table.apply(CaseEvent("update", case_id, old, new, version))
+
+        self.assertEqual(len(table), 50)
+        self.assertLessEqual(len(table._case_versions), 50)
+
+        # An evicted case that changes again is cached under its new version
+        case_id = df["case_id"].iloc[0]
+        self.assertNotIn(case_id, table._case_versions)
+        old, new, version = store.update_case(case_id, {"status": "Stalled"})
+        table.apply(CaseEvent("update", case_id, old, new, version))
+        self.assertEqual(table._case_versions[case_id], version)
+        hits = table.hits
+        table.score(store.get_case(case_id))
+        self.assertEqual(table.hits, hits + 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+"""
+FedEx DCA System - Instrumentation Tests
+"""
+
+import unittest
+
+from flask import Flask
+
+import instrumentation
+from train_model import RecoveryPredictor
+
+
+class RequestRecordingTests(unittest.TestCase):
+
+    def setUp(self):
+        instrumentation.registry.reset()
+        self.app = Flask("instrumentation_test")
+        instrumentation.init_app(self.app)
+
+        @self.app.route("/ok")
+        def ok():
+            return "ok"
+
+        @self.app.route("/items/<int:item_id>")
+        def item(item_id):
+            return str(item_id)
+
+        @self.app.route("/boom")
+        def boom():
+            raise RuntimeError("boom")
+
+        self.client = self.app.test_client()
+
+    def counts(self):
+        instrumentation.registry.render()
+        return instrumentation.registry.requests
+
+    def test_requests_are_recorded_with_status(self):
+        self.client.get("/ok")
+        self.client.get("/missing")
+        self.assertEqual(self.counts()[("/ok", "GET", 200)], 1)
+        self.assertEqual(self.counts()[("<unmatched>", "GET", 404)], 1)
+
+    def test_requests_are_recorded_by_route_rule(self):
+        for item_id in (1, 2, 3):
+            self.client.get(f"/items/{item_id}")
+        self.client.post("/ok")
+        self.assertEqual(self.counts()[("/items/<int:item_id>", "GET", 200)], 3)
+        self.assertEqual(self.counts()[("<unmatched>", "POST", 405)], 1)
+
+    def test_request_that_raises_is_recorded(self):
+        self.app.logger.disabled = True
+        self.assertEqual(self.client.get("/boom").status_code, 500)
+        self.assertEqual(self.counts()[("/boom", "GET", 500)], 1)
+
+        # With exceptions propagated (testing / debug) the request is still counted
+        self.app.testing = True
+        with self.assertRaises(RuntimeError):
+            self.client.get("/boom")
+        self.assertEqual(self.counts()[("/boom", "GET", 500)], 2)
+
+
+class ModelSamplingTests(unittest.TestCase):
+
+    def test_sampled_counts_track_calls(self):
+        instrumentation.registry.reset()
+        model = instrumentation.instrument_model(RecoveryPredictor(), "recovery_model")
+        calls = instrumentation.MODEL_SAMPLE_EVERY * 10
+        for _ in range(calls):
+            self.assertEqual(model.predict_recovery_probability(30000, 45, 20, "DCA-Alpha"), 95.0)
+        instrumentation.flush_background()
+
+        count, seconds = instrumentation.registry.model_calls[("recovery_model", "predict_recovery_probability")]
+        self.assertEqual(count, calls)
+        self.assertGreater(seconds, 0)
+        self.assertIsInstance(instrumentation.uninstrumented(model), RecoveryPredictor)
+
+    def test_sampled_counts_are_exact(self):
+        instrumentation.registry.reset()
+        model = instrumentation.instrument_model(RecoveryPredictor(), "recovery_model")
+        key = ("recovery_model", "predict_days_to_recovery")
+
+        model.predict_days_to_recovery(30000, 45, 95.0)
+        instrumentation.flush_background()
+        self.assertEqual(instrumentation.registry.model_calls[key][0], 1)
+
+        for _ in range(99):
+            model.predict_days_to_recovery(30000, 45, 95.0)
+        self.assertIn('dca_model_calls_total{model="recovery_model",method="predict_days_to_recovery"} 100',
+                      instrumentation.registry.render())
+
+        # A re-wrapped model (e.g. after a reload) keeps counting from the same total
+        model = instrumentation.instrument_model(RecoveryPredictor(), "recovery_model")
+        for _ in range(5):
+            model.predict_days_to_recovery(30000, 45, 95.0)
+        instrumentation.flush_background()
+        self.assertEqual(instrumentation.registry.model_calls[key][0], 105)
+
+
+if __name__ == "__main__":
+    unittest.main()
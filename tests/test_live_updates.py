@@ -0,0 +1,142 @@
+"""
+FedEx DCA System - Live Dashboard Update Tests
+"""
+
+import json
+import unittest
+
+from case_store import DataFrameCaseStore
+from derived_views import ALERT_RULES, LiveViews
+from events import CaseEvent, EventBus
+from generate_data import generate_cases
+from live_updates import Broadcaster
+
+
+def parse(message):
+    """(event, id, payload) of one SSE message"""
+
+    fields = dict(line.split(": ", 1) for line in message.strip().split("\n"))
+    return fields["event"], int(fields["id"]), json.loads(fields["data"])
+
+
+class BroadcasterTests(unittest.TestCase):
+
+    def setUp(self):
+        self.df = generate_cases(200)
+        self.df["status"] = "Active"
+        self.df["recovered"] = 0
+        self.store = DataFrameCaseStore(self.df)
+        self.bus = EventBus(asynchronous=False)
+        self.views = LiveViews(self.store, self.bus)
+        self.broadcaster = Broadcaster(
+            self.views, self.views.aggregates.summary,
+            lambda row: {"case_id": row["case_id"], "status": row["status"]},
+            history=4
+        )
+        self.bus.subscribe(self.broadcaster.on_case_event)
+        self.case_ids = list(self.df["case_id"])
+
+    def write(self, case_id, changes):
+        old, new, version = self.store.update_case(case_id, changes)
+        self.bus.publish(CaseEvent("update", case_id, old, new, version))
+        return version
+
+    def open_stream(self, last_version=None):
+        stream = self.broadcaster.stream(last_version, heartbeat=0.01)
+        self.addCleanup(stream.close)
+        return stream
+
+    def test_update_carries_only_what_changed(self):
+        stream = self.open_stream()
+        event, version, snapshot = parse(next(stream))
+        self.assertEqual((event, version), ("snapshot", self.store.version))
+        self.assertEqual(snapshot["distribution"], {"Active": 200})
+
+        case_id = self.case_ids[0]
+        version = self.write(case_id, {"status": "Promised", "recovered": 1})
+
+        event, update_version, update = parse(next(stream))
+        self.assertEqual((event, update_version, update["version"]), ("update", version, version))
+        self.assertEqual(update["distribution"], {"Active": 199, "Promised": 1})
+        self.assertEqual(update["cases"], [{"case_id": case_id, "status": "Promised"}])
+
+        # Only the totals the write moved, with their new values
+        summary = self.views.aggregates.summary()
+        self.assertEqual(update["metrics"], {name: summary[name] for name in
+                                             ("recovered_amount", "recovered_cases", "recovery_rate")})
+
+        # Alert rules are sent only when their matches changed
+        alerts = {rule: self.views.alerts.rows(rule) for rule in ALERT_RULES}
+        self.assertEqual(update["alerts"], {rule: rows for rule, rows in alerts.items()
+                                            if rows != snapshot["alerts"][rule]})
+
+        # A change that moves no total or status sends neither
+        self.write(self.case_ids[1], {"last_contact_days_ago": 3})
+        _, _, update = parse(next(stream))
+        self.assertIsNone(update["distribution"])
+        self.assertEqual(update["metrics"], {})
+
+    def test_missed_updates_are_merged(self):
+        stream = self.open_stream()
+        parse(next(stream))
+
+        first, second = self.case_ids[:2]
+        self.write(first, {"status": "Stalled"})
+        self.write(second, {"status": "Disputed"})
+        version = self.write(first, {"status": "Promised"})
+
+        event, update_version, update = parse(next(stream))
+        self.assertEqual((event, update_version, update["version"]), ("update", version, version))
+        self.assertEqual(sorted(update["cases"], key=lambda case: case["case_id"]), sorted([
+            {"case_id": first, "status": "Promised"},
+            {"case_id": second, "status": "Disputed"}
+        ], key=lambda case: case["case_id"]))
+        self.assertEqual(update["distribution"], {"Active": 198, "Disputed": 1, "Promised": 1})
+        self.assertEqual(self.broadcaster.published, 3)
+
+        # Nothing further pending: an idle stream only keeps alive
+        self.assertEqual(next(stream), ": keepalive\n\n")
+
+    def test_last_event_id_resumes_from_the_buffer(self):
+        start = self.store.version
+        self.write(self.case_ids[0], {"status": "Stalled"})
+        version = self.write(self.case_ids[1], {"status": "Stalled"})
+
+        # Seen the first update: only the second is sent, no snapshot
+        event, update_version, update = parse(next(self.open_stream(start + 1)))
+        self.assertEqual((event, update_version), ("update", version))
+        self.assertEqual(update["cases"], [{"case_id": self.case_ids[1], "status": "Stalled"}])
+
+        # Seen both: nothing to resend
+        self.assertEqual(next(self.open_stream(version)), ": keepalive\n\n")
+
+        # Gone longer than the buffer holds, or an id from another store: fresh snapshot
+        for case_id in self.case_ids[2:8]:
+            version = self.write(case_id, {"status": "Disputed"})
+        for last_version in (start, version + 10):
+            with self.subTest(last_version=last_version):
+                event, snapshot_version, snapshot = parse(next(self.open_stream(last_version)))
+                self.assertEqual((event, snapshot_version), ("snapshot", version))
+                self.assertEqual(snapshot["distribution"], {"Active": 192, "Disputed": 6, "Stalled": 2})
+
+    def test_open_streams_are_capped(self):
+        self.broadcaster.max_clients = 1
+        stream = self.open_stream()
+        next(stream)
+
+        self.assertFalse(self.broadcaster.accepting())
+        self.assertEqual(self.broadcaster.stats()["rejected"], 1)
+
+        stream.close()
+        self.assertTrue(self.broadcaster.accepting())
+        self.assertEqual(self.broadcaster.clients, 0)
+
+    def test_close_ends_open_streams(self):
+        stream = self.open_stream()
+        next(stream)
+        self.broadcaster.close()
+        self.assertEqual(list(stream), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+"""
+FedEx DCA System - Model Artifact Tests
+"""
+
+import contextlib
+import io
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import model_artifacts
+from model_artifacts import ArtifactError, load_model, save_artifact
+from train_model import RecoveryPredictor
+
+
+class ArtifactTests(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+
+    def test_cuts_are_saved_and_used(self):
+        model = RecoveryPredictor(amount_cuts=[10000, 20000, 40000], days_cuts=[20, 45, 70], late_cuts=[10, 30])
+        save_artifact(model, "recovery_model", root=self.root, version="wide")
+        save_artifact(RecoveryPredictor(), "recovery_model", root=self.root, version="default")
+
+        wide = load_model("recovery_model", "wide", self.root)
+        default = load_model("recovery_model", "default", self.root)
+        self.assertEqual(wide.amount_cuts, (10000.0, 20000.0, 40000.0))
+
+        case = (45000, 50, 20, "DCA-Beta")
+        self.assertEqual(default.predict_recovery_probability(*case), 80.0)
+        self.assertEqual(wide.predict_recovery_probability(*case), 50.0)
+        self.assertNotEqual(wide.feature_key(*case), default.feature_key(*case))
+        self.assertEqual(wide.get_priority_score(45000, 50, 60.0), 8.3)
+        self.assertEqual(default.get_priority_score(45000, 50, 60.0), 5.8)
+        self.assertEqual(wide.predict_days_to_recovery(45000, 50, 60.0), 45)
+        self.assertEqual(default.predict_days_to_recovery(45000, 50, 60.0), 20)
+
+    def test_bad_cuts_are_rejected(self):
+        model = RecoveryPredictor()
+        model.days_cuts = (90, 60, 30)
+        save_artifact(model, "recovery_model", root=self.root, version="bad")
+        with self.assertRaises(ArtifactError):
+            load_model("recovery_model", "bad", self.root)
+
+    def test_legacy_pickle_is_only_read_by_convert(self):
+        legacy = RecoveryPredictor()
+        for name in ("amount_cuts", "days_cuts", "late_cuts"):
+            delattr(legacy, name)  # pickled before the cuts lived on the model
+        with open(os.path.join(self.root, "recovery_model.pkl"), "wb") as f:
+            pickle.dump(legacy, f)
+
+        with mock.patch.object(model_artifacts.pickle, "load", side_effect=AssertionError("unpickled")):
+            with self.assertRaises(ArtifactError):
+                load_model("recovery_model", root=self.root)
+
+        argv = ["model_artifacts.py", "--root", self.root, "convert"]
+        with mock.patch.object(sys, "argv", argv), contextlib.redirect_stdout(io.StringIO()):
+            model_artifacts.main()
+
+        model = load_model("recovery_model", root=self.root)
+        self.assertEqual(model.days_cuts, (30.0, 60.0, 90.0))
+        self.assertEqual(model.predict_recovery_probability(30000, 45, 20, "DCA-Alpha"), 95.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+"""
+FedEx DCA System - Request Profiling Tests
+"""
+
+import os
+import unittest
+from unittest import mock
+
+from flask import Flask
+
+import profiling
+
+
+class RequestProfilingTests(unittest.TestCase):
+
+    def setUp(self):
+        app = Flask("profiling_test")
+        profiling.init_app(app)
+
+        @app.route("/cases")
+        def cases():
+            return {"rows": sorted(range(100), reverse=True)}
+
+        self.client = app.test_client()
+        patcher = mock.patch.dict(os.environ, {"DCA_PROFILE_TOKEN": "secret"})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def profile(self, sort):
+        return self.client.get(f"/cases?profile=1&profile_sort={sort}", headers={"X-Admin-Token": "secret"})
+
+    def test_report_is_sorted_by_the_requested_key(self):
+        for sort, heading in [("tottime", "internal time"), ("ncalls", "call count")]:
+            with self.subTest(sort=sort):
+                response = self.profile(sort)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.mimetype, "text/plain")
+                self.assertIn(f"Ordered by: {heading}", response.get_data(as_text=True))
+
+    def test_unknown_sort_key_is_rejected(self):
+        response = self.profile("bogus")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("cumulative", response.get_json()["valid"])
+
+        # Nothing was profiled, so the next request can be
+        self.assertEqual(self.profile("cumulative").status_code, 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
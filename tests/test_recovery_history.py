@@ -0,0 +1,108 @@
+"""
+FedEx DCA System - Recovery History Tests
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import date
+from unittest import mock
+
+import recovery_history
+from case_store import DataFrameCaseStore, SQLiteCaseStore
+from generate_data import generate_cases
+from recovery_history import RecoveryHistory, backfill
+
+
+class RecoveryHistoryTests(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+
+    def test_failed_manifest_write_keeps_previous_manifest(self):
+        history = RecoveryHistory(self.root)
+        history.append("2026-10-01", "DCA-1", "DCA-Alpha", "Active", 100.0)
+        history.flush()
+
+        history.append("2026-10-02", "DCA-2", "DCA-Beta", "Active", 50.0)
+        with mock.patch.object(recovery_history.os, "replace", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                history.flush()
+
+        with open(os.path.join(self.root, "manifest.json")) as f:
+            self.assertEqual(len(json.load(f)["chunks"]), 1)
+        leftovers = [name for _, _, names in os.walk(self.root) for name in names if name.endswith(".tmp")]
+        self.assertEqual(leftovers, [])
+        self.assertEqual(RecoveryHistory(self.root).total("2026-10-01", "2026-10-31"), (100.0, 1))
+
+    def test_writers_sharing_a_root_keep_each_others_events(self):
+        first = RecoveryHistory(self.root)
+        second = RecoveryHistory(self.root)
+
+        first.append("2026-10-01", "DCA-1", "DCA-Alpha", "Active", 100.0)
+        first.flush()
+        second.append("2026-10-02", "DCA-2", "DCA-Gamma", "Promised", 40.0)
+        second.flush()
+        first.append("2026-10-03", "DCA-3", "DCA-Beta", "Active", 10.0)
+        first.flush()
+
+        reopened = RecoveryHistory(self.root)
+        self.assertEqual(reopened.total("2026-10-01", "2026-10-31"), (150.0, 3))
+        self.assertEqual(reopened.total("2026-10-01", "2026-10-31", dca="DCA-Gamma"), (40.0, 1))
+        self.assertEqual(len(reopened.events("2026-10-01", "2026-10-31")), 3)
+
+    def test_backfill_runs_once_across_processes(self):
+        store = DataFrameCaseStore(generate_cases(200))
+        recovered = int((store.to_dataframe()["recovered"] == 1).sum())
+        first = RecoveryHistory(self.root)
+        second = RecoveryHistory(self.root)  # opened before the first backfill, like the reloader
+
+        self.assertEqual(backfill(first, store), recovered)
+        self.assertIsNone(backfill(second, store))
+        self.assertEqual(len(RecoveryHistory(self.root)), recovered)
+
+    def test_portfolio_change_compares_with_snapshot_before_period(self):
+        history = RecoveryHistory(self.root)
+        start, today = date(2026, 10, 1), date(2026, 10, 19)
+        self.assertEqual(history.portfolio_change(start, today),
+                         {"outstanding_change_pct": None, "critical_change": None, "recovery_rate_change": None})
+
+        history.record_portfolio("2026-09-28", 1000000.0, 40, 0.5)
+        history.record_portfolio("2026-09-30", 800000.0, 30, 0.7)
+        history.record_portfolio(today, 600000.0, 42, 0.745)
+        history.flush()
+
+        expected = {"outstanding_change_pct": -25.0, "critical_change": 12, "recovery_rate_change": 4.5}
+        self.assertEqual(history.portfolio_change(start, today), expected)
+        self.assertEqual(RecoveryHistory(self.root).portfolio_change(start, today), expected)
+
+        # A snapshot without a rate (recorded before rates were kept) has nothing to compare
+        history.portfolio[recovery_history.day_number("2026-09-30")] = [800000.0, 30]
+        self.assertIsNone(history.portfolio_change(start, today)["recovery_rate_change"])
+
+    def test_backfill_reads_the_store_in_batches(self):
+        df = generate_cases(200)
+        stores = {
+            "memory": DataFrameCaseStore(df),
+            "sqlite": SQLiteCaseStore(os.path.join(self.root, "cases.db"))
+        }
+        stores["sqlite"].import_frame(df)
+        recovered = int((df["recovered"] == 1).sum())
+
+        for name, store in stores.items():
+            with self.subTest(store=name), \
+                    mock.patch.object(store, "find_cases", side_effect=AssertionError("whole table read")):
+                batches = [len(rows) for rows in store.iter_cases([("recovered", "==", 1)], batch_size=32)]
+                self.assertEqual(sum(batches), recovered)
+                self.assertEqual(max(batches), 32)
+
+                history = RecoveryHistory(os.path.join(self.root, name))
+                self.assertEqual(backfill(history, store, batch_size=32), recovered)
+                self.assertEqual(len(history), recovered)
+
+
+if __name__ == "__main__":
+    unittest.main()
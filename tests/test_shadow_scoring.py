@@ -0,0 +1,59 @@
+"""
+FedEx DCA System - Shadow Scoring Tests
+"""
+
+import shutil
+import tempfile
+import unittest
+
+from derived_views import score_case
+from generate_data import generate_cases
+from model_artifacts import load_model, save_artifact
+from shadow_scoring import ShadowScorer
+from train_model import RecoveryPredictor
+
+
+class ShadowScorerTests(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.rows = generate_cases(400).to_dict("records")
+
+        save_artifact(RecoveryPredictor(), "recovery_model", root=self.root, version="primary")
+        save_artifact(RecoveryPredictor(), "recovery_model", root=self.root, version="same")
+        save_artifact(RecoveryPredictor(amount_cuts=[10000, 20000, 40000], days_cuts=[20, 45, 70]),
+                      "recovery_model", root=self.root, version="candidate")
+        self.primary = load_model("recovery_model", "primary", self.root)
+
+    def compare(self, version):
+        shadow = ShadowScorer(self.primary, load_model("recovery_model", version, self.root),
+                              log_dir=self.root, batch_size=64)
+        for start in range(0, len(self.rows), 50):
+            batch = self.rows[start:start + 50]
+            shadow.submit([(row, score_case(self.primary, row)) for row in batch])
+        self.assertTrue(shadow.flush(timeout=10))
+        return shadow.stats()
+
+    def test_candidate_with_different_cuts_disagrees(self):
+        stats = self.compare("candidate")
+
+        self.assertEqual((stats["compared"], stats["dropped"], stats["errors"]), (len(self.rows), 0, 0))
+        self.assertEqual(stats["candidate"], "recovery_model@candidate")
+        disagreement = stats["disagreement"]
+        self.assertGreater(disagreement["priority_rate"], 0)
+        self.assertGreater(disagreement["expected_days_rate"], 0)
+        self.assertGreater(disagreement["probability_mean_abs_diff"], 0)
+        self.assertGreater(sum(disagreement["probability_diff_histogram"].values())
+                           - disagreement["probability_diff_histogram"]["<1"], 0)
+
+    def test_identical_candidate_agrees(self):
+        stats = self.compare("same")
+
+        self.assertEqual(stats["compared"], len(self.rows))
+        self.assertEqual(stats["disagreement"]["priority_rate"], 0)
+        self.assertEqual(stats["disagreement"]["probability_max_abs_diff"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+"""
+FedEx DCA System - Model Tests
+Run from the repository root: python -m unittest discover tests
+"""
+
+import unittest
+
+from generate_data import generate_cases
+from train_model import DCAMatcher
+
+
+class DCAMatcherProfileTests(unittest.TestCase):
+
+    def setUp(self):
+        self.df = generate_cases(500)
+
+    def test_refit_without_dca_resets_its_profile(self):
+        matcher = DCAMatcher()
+        matcher.fit_profiles(self.df)
+        gamma_cases = int((self.df["assigned_dca"] == "DCA-Gamma").sum())
+        self.assertIn(("DCA-Gamma", gamma_cases),
+                      [(r["dca_name"], r["total_cases"]) for r in matcher.get_dca_rankings()])
+
+        matcher.fit_profiles(self.df[self.df["assigned_dca"] != "DCA-Gamma"])
+        rankings = {r["dca_name"]: r for r in matcher.get_dca_rankings()}
+        self.assertEqual(rankings["DCA-Gamma"]["total_cases"], 0)
+        self.assertEqual(rankings["DCA-Gamma"]["success_rate"], 0.0)
+        self.assertEqual(rankings["DCA-Gamma"]["segments"], {})
+        self.assertEqual(sum(r["total_cases"] for r in rankings.values()),
+                         int((self.df["assigned_dca"] != "DCA-Gamma").sum()))
+
+    def test_dca_only_known_from_data_is_dropped(self):
+        df = self.df.copy()
+        df.loc[df.index[:20], "assigned_dca"] = "DCA-New"
+        matcher = DCAMatcher()
+        matcher.fit_profiles(df)
+        self.assertIn("DCA-New", matcher.dca_profiles)
+
+        matcher.fit_profiles(df.iloc[20:])
+        self.assertNotIn("DCA-New", matcher.dca_profiles)
+        self.assertNotIn("DCA-New", [r["dca_name"] for r in matcher.get_dca_rankings()])
+
+    def test_last_case_removed_incrementally(self):
+        matcher = DCAMatcher()
+        one = self.df[self.df["assigned_dca"] == "DCA-Gamma"].iloc[:1]
+        matcher.fit_profiles(one)
+        matcher.apply_case_update(old_row=one.iloc[0].to_dict())
+        self.assertEqual(matcher.dca_profiles["DCA-Gamma"]["total_cases"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
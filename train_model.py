@@ -4,9 +4,9 @@ Phase 1: Creates "smart rule" models that simulate ML predictions
 Phase 2: Will use actual Random Forest / XGBoost models
 """
 
+import bisect
 import pandas as pd
 import numpy as np
-import pickle
 from datetime import datetime
 
 # For Phase 2, we'll import these:
@@ -14,42 +14,104 @@ from datetime import datetime
 # from sklearn.model_selection import train_test_split
 # from sklearn.metrics import classification_report
 
+# Default thresholds the RecoveryPredictor rules compare features against (an
+# artifact carries its own). Predictions are constant between cuts, so
+# feature_key() identifies each distinct result
+_AMOUNT_CUTS = [25000, 50000, 100000]   # amount > cut
+_DAYS_CUTS = [30, 60, 90]               # days_overdue < cut and > cut
+_LATE_CUTS = [15, 45]                   # avg_days_late < cut
+
+
 class RecoveryPredictor:
     """
     Phase 1: Rule-based predictor (looks like ML to judges)
     Phase 2: Replace with actual RandomForestClassifier
     """
     
-    def __init__(self):
+    # (column, dtype) inputs, checked against saved artifacts (model_artifacts.py)
+    FEATURE_SCHEMA = [
+        ("amount", "float"),
+        ("days_overdue", "int"),
+        ("customer_avg_days_late", "float"),
+        ("assigned_dca", "str")
+    ]
+    
+    def __init__(self, amount_cuts=_AMOUNT_CUTS, days_cuts=_DAYS_CUTS, late_cuts=_LATE_CUTS):
         self.model_type = "Smart Rules (Phase 1)"
         self.trained_date = datetime.now().strftime("%Y-%m-%d %H:%M")
         
+        # The rules branch on each of these cuts, in ascending order
+        for label, cuts, expected in (("amount_cuts", amount_cuts, len(_AMOUNT_CUTS)),
+                                      ("days_cuts", days_cuts, len(_DAYS_CUTS)),
+                                      ("late_cuts", late_cuts, len(_LATE_CUTS))):
+            if len(cuts) != expected or list(cuts) != sorted(cuts):
+                raise ValueError(f"{label} must be {expected} ascending values, got {list(cuts)}")
+        
+        self.amount_cuts = tuple(amount_cuts)
+        self.days_cuts = tuple(days_cuts)
+        self.late_cuts = tuple(late_cuts)
+        
+    def __setstate__(self, state):
+        # Legacy pickles (model_artifacts.py convert) predate per-model cuts
+        state.setdefault("amount_cuts", tuple(_AMOUNT_CUTS))
+        state.setdefault("days_cuts", tuple(_DAYS_CUTS))
+        state.setdefault("late_cuts", tuple(_LATE_CUTS))
+        self.__dict__.update(state)
+        
+    def to_artifact(self):
+        """(params, arrays) for model_artifacts.save_artifact"""
+        
+        params = {"model_type": self.model_type, "trained_date": self.trained_date}
+        arrays = {
+            "amount_cuts": np.array(self.amount_cuts, dtype=np.float64),
+            "days_cuts": np.array(self.days_cuts, dtype=np.float64),
+            "late_cuts": np.array(self.late_cuts, dtype=np.float64)
+        }
+        return params, arrays
+    
+    @classmethod
+    def from_artifact(cls, params, arrays):
+        """Rebuild from a saved artifact, rule thresholds included"""
+        
+        model = cls(
+            arrays["amount_cuts"].tolist(),
+            arrays["days_cuts"].tolist(),
+            arrays["late_cuts"].tolist()
+        )
+        model.model_type = params["model_type"]
+        model.trained_date = params["trained_date"]
+        return model
+    
     def predict_recovery_probability(self, amount, days_overdue, avg_days_late, dca):
         """Predicts probability of recovery (0-100%)"""
         
+        _, medium, large = self.amount_cuts
+        month, two_months, three_months = self.days_cuts
+        prompt, late = self.late_cuts
+        
         # Start with base probability
         prob = 0.70
         
         # Amount factor
-        if amount > 100000:
+        if amount > large:
             prob -= 0.10
-        elif amount > 50000:
+        elif amount > medium:
             prob -= 0.05
         
         # Days overdue (critical factor)
-        if days_overdue < 30:
+        if days_overdue < month:
             prob += 0.20
-        elif days_overdue < 60:
+        elif days_overdue < two_months:
             prob += 0.10
-        elif days_overdue < 90:
+        elif days_overdue < three_months:
             prob -= 0.10
         else:
             prob -= 0.30
         
         # Customer history
-        if avg_days_late < 15:
+        if avg_days_late < prompt:
             prob += 0.15
-        elif avg_days_late < 45:
+        elif avg_days_late < late:
             prob += 0.00
         else:
             prob -= 0.20
@@ -69,21 +131,38 @@ class RecoveryPredictor:
         
         return round(prob * 100, 1)  # Return as percentage
     
+    def feature_key(self, amount, days_overdue, avg_days_late, dca):
+        """
+        Discretized inputs: cases with equal keys get the same probability,
+        days to recovery and priority score (used to memoize scoring)
+        """
+        
+        return (
+            bisect.bisect_left(self.amount_cuts, amount),
+            bisect.bisect_right(self.days_cuts, days_overdue),
+            bisect.bisect_left(self.days_cuts, days_overdue),
+            bisect.bisect_right(self.late_cuts, avg_days_late),
+            dca
+        )
+    
     def predict_days_to_recovery(self, amount, days_overdue, recovery_prob):
         """Predicts expected days to recover the debt"""
         
+        _, medium, large = self.amount_cuts
+        _, two_months, three_months = self.days_cuts
+        
         # Base days
-        if amount > 100000:
+        if amount > large:
             base = 35
-        elif amount > 50000:
+        elif amount > medium:
             base = 25
         else:
             base = 20
         
         # Adjust for current age
-        if days_overdue > 90:
+        if days_overdue > three_months:
             base += 20
-        elif days_overdue > 60:
+        elif days_overdue > two_months:
             base += 10
         
         # Adjust for recovery probability
@@ -97,14 +176,17 @@ class RecoveryPredictor:
     def get_priority_score(self, amount, days_overdue, recovery_prob):
         """Calculate priority score (1-10 scale)"""
         
+        small, medium, large = self.amount_cuts
+        month, two_months, three_months = self.days_cuts
+        
         # Weighted formula: Value × Recovery Prob × Urgency
         
         # Value component (0-4 points)
-        if amount > 100000:
+        if amount > large:
             value_score = 4.0
-        elif amount > 50000:
+        elif amount > medium:
             value_score = 3.0
-        elif amount > 25000:
+        elif amount > small:
             value_score = 2.0
         else:
             value_score = 1.0
@@ -113,11 +195,11 @@ class RecoveryPredictor:
         prob_score = (recovery_prob / 100) * 3
         
         # Urgency component (0-3 points)
-        if days_overdue > 90:
+        if days_overdue > three_months:
             urgency_score = 3.0
-        elif days_overdue > 60:
+        elif days_overdue > two_months:
             urgency_score = 2.5
-        elif days_overdue > 30:
+        elif days_overdue > month:
             urgency_score = 2.0
         else:
             urgency_score = 1.0
@@ -130,6 +212,97 @@ class RecoveryPredictor:
         return round(priority, 1)
 
 
+# Segment boundaries used for per-DCA performance breakdowns
+AMOUNT_BANDS = [
+    ("low", 0, 25000),
+    ("medium", 25000, 75000),
+    ("high", 75000, 150000),
+    ("critical", 150000, float("inf"))
+]
+
+AGE_BUCKETS = [
+    ("0-30", 0, 30),
+    ("30-60", 30, 60),
+    ("60-90", 60, 90),
+    ("90+", 90, float("inf"))
+]
+
+
+def amount_band(amount):
+    """Return the amount band label for a single case amount"""
+    for label, low, high in AMOUNT_BANDS:
+        if low <= amount < high:
+            return label
+    return AMOUNT_BANDS[0][0]
+
+
+def age_bucket(days_overdue):
+    """Return the age bucket label for a single days_overdue value"""
+    for label, low, high in AGE_BUCKETS:
+        if low <= days_overdue < high:
+            return label
+    return AGE_BUCKETS[0][0]
+
+
+def _cut(series, buckets):
+    """Vectorised version of amount_band / age_bucket over a Series"""
+    edges = [low for _, low, _ in buckets] + [float("inf")]
+    labels = [label for label, _, _ in buckets]
+    return pd.cut(series.clip(lower=0), bins=edges, labels=labels, right=False).astype(str)
+
+
+# Running totals kept per (dca, amount band, age bucket) cell
+_CELL_FIELDS = ["cases", "recovered", "days_sum", "days_count", "amount", "recovered_amount"]
+
+
+def _case_contribution(row):
+    """Cell key and totals a single case adds to the profile statistics"""
+    recovered = int(row["recovered"])
+    days = row.get("days_to_recovery")
+    has_days = days is not None and not pd.isna(days)
+    key = (row["assigned_dca"], amount_band(row["amount"]), age_bucket(row["days_overdue"]))
+    values = [
+        1,
+        recovered,
+        float(days) if has_days else 0.0,
+        1 if has_days else 0,
+        float(row["amount"]),
+        float(row["amount"]) * recovered
+    ]
+    return key, values
+
+
+def profile_cells(df):
+    """Group a case DataFrame into (dca, amount band, age bucket) profile cells"""
+    
+    if df.empty:
+        return []
+    
+    cells = pd.DataFrame({
+        "dca": df["assigned_dca"],
+        "band": _cut(df["amount"], AMOUNT_BANDS),
+        "bucket": _cut(df["days_overdue"], AGE_BUCKETS),
+        "recovered": df["recovered"].astype(int),
+        "days": df["days_to_recovery"],
+        "amount": df["amount"],
+        "recovered_amount": df["amount"] * df["recovered"]
+    })
+    
+    grouped = cells.groupby(["dca", "band", "bucket"], observed=True).agg(
+        cases=("recovered", "size"),
+        recovered=("recovered", "sum"),
+        days_sum=("days", "sum"),
+        days_count=("days", "count"),
+        amount=("amount", "sum"),
+        recovered_amount=("recovered_amount", "sum")
+    )
+    
+    return [
+        (*key, *(getattr(row, field) for field in _CELL_FIELDS))
+        for key, row in zip(grouped.index, grouped.itertuples(index=False))
+    ]
+
+
 class DCAMatcher:
     """
     Matches cases to optimal DCA based on historical performance patterns
@@ -173,6 +346,57 @@ class DCAMatcher:
                 "strengths": ["< $25k", "high volume"]
             }
         }
+        
+        # Case-history statistics (filled in by fit_profiles)
+        self.cell_stats = {}
+        self.data_version = None
+        self._rankings = None
+    
+    # (column, dtype) inputs, checked against saved artifacts (model_artifacts.py)
+    FEATURE_SCHEMA = [
+        ("amount", "float"),
+        ("days_overdue", "int"),
+        ("customer_avg_days_late", "float")
+    ]
+    
+    def to_artifact(self):
+        """(params, arrays) for model_artifacts.save_artifact: profile cells as columns"""
+        
+        cells = sorted(self.cell_stats.items())
+        params = {
+            "model_type": self.model_type,
+            "cell_fields": _CELL_FIELDS,
+            "profiles": {
+                dca: {"best_for": profile["best_for"], "strengths": profile["strengths"]}
+                for dca, profile in self.dca_profiles.items()
+            }
+        }
+        arrays = {
+            "cell_dca": np.array([key[0] for key, _ in cells], dtype=str),
+            "cell_band": np.array([key[1] for key, _ in cells], dtype=str),
+            "cell_bucket": np.array([key[2] for key, _ in cells], dtype=str),
+            "cell_totals": np.array([values for _, values in cells], dtype=np.float64).reshape(len(cells), len(_CELL_FIELDS))
+        }
+        return params, arrays
+    
+    @classmethod
+    def from_artifact(cls, params, arrays):
+        """Rebuild from a saved artifact"""
+        
+        if params["cell_fields"] != _CELL_FIELDS:
+            raise ValueError(f"cell fields {params['cell_fields']} differ from {_CELL_FIELDS}")
+        
+        model = cls()
+        model.model_type = params["model_type"]
+        for dca, profile in params["profiles"].items():
+            # DCAs beyond the built-in ones are recreated from their cells
+            if dca in model.dca_profiles:
+                model.dca_profiles[dca].update(profile)
+        
+        cells = zip(arrays["cell_dca"].tolist(), arrays["cell_band"].tolist(),
+                    arrays["cell_bucket"].tolist(), arrays["cell_totals"].tolist())
+        model.load_profile_cells((dca, band, bucket, *totals) for dca, band, bucket, totals in cells)
+        return model
     
     def recommend_dca(self, amount, days_overdue, avg_days_late):
         """Recommend best DCA for this case"""
@@ -201,24 +425,139 @@ class DCAMatcher:
         else:
             return "DCA-Gamma"
     
+    def fit_profiles(self, df, data_version=None):
+        """
+        Compute DCA performance profiles from the case table.
+        Makes a single grouped pass over (dca, amount band, age bucket) cells;
+        the per-DCA and per-segment profiles are rolled up from those cells.
+        Does nothing if the profiles were already built for data_version.
+        """
+        
+        if data_version is not None and data_version == getattr(self, "data_version", None):
+            return self.dca_profiles
+        
+        return self.load_profile_cells(profile_cells(df), data_version)
+    
+    def load_profile_cells(self, cells, data_version=None):
+        """
+        Build the profiles from pre-aggregated cells, e.g. a SQL GROUP BY.
+        cells is an iterable of (dca, band, bucket, cases, recovered, days_sum,
+        days_count, amount, recovered_amount) tuples.
+        """
+        
+        self.cell_stats = {
+            (dca, band, bucket): [float(value or 0) for value in values]
+            for dca, band, bucket, *values in cells
+        }
+        self.data_version = data_version
+        self._rebuild_profiles()
+        
+        return self.dca_profiles
+    
+    def apply_case_update(self, old_row=None, new_row=None, data_version=None):
+        """
+        Incrementally refresh the profiles for one inserted, updated or removed case.
+        old_row / new_row are dict-like case records (None for insert / delete).
+        """
+        
+        if not hasattr(self, "cell_stats"):
+            self.cell_stats = {}
+        
+        for row, sign in ((old_row, -1), (new_row, 1)):
+            if row is None:
+                continue
+            key, values = _case_contribution(row)
+            cell = self.cell_stats.setdefault(key, [0.0] * len(_CELL_FIELDS))
+            for i, value in enumerate(values):
+                cell[i] += sign * value
+            if cell[0] <= 0:
+                del self.cell_stats[key]
+        
+        self.data_version = data_version
+        self._rebuild_profiles()
+    
+    def _rebuild_profiles(self):
+        """Roll the cell statistics up into per-DCA profiles"""
+        
+        totals = {}
+        segments = {}
+        
+        for (dca, band, bucket), cell in self.cell_stats.items():
+            total = totals.setdefault(dca, [0.0] * len(_CELL_FIELDS))
+            by_band = segments.setdefault(dca, {"amount_band": {}, "age_bucket": {}})
+            band_total = by_band["amount_band"].setdefault(band, [0.0] * len(_CELL_FIELDS))
+            bucket_total = by_band["age_bucket"].setdefault(bucket, [0.0] * len(_CELL_FIELDS))
+            for i, value in enumerate(cell):
+                total[i] += value
+                band_total[i] += value
+                bucket_total[i] += value
+        
+        for dca, total in totals.items():
+            profile = self.dca_profiles.setdefault(dca, {
+                "best_for": "unprofiled",
+                "strengths": []
+            })
+            profile.update(_summarise_cell(total))
+            profile["segments"] = {
+                kind: {
+                    label: _summarise_cell(values)
+                    for label, values in sorted(by_kind.items())
+                }
+                for kind, by_kind in segments[dca].items()
+            }
+        
+        # DCAs with no cases left: drop ones only known from the data, zero the built-in ones
+        for dca in [dca for dca in self.dca_profiles if dca not in totals]:
+            profile = self.dca_profiles[dca]
+            if profile["best_for"] == "unprofiled":
+                del self.dca_profiles[dca]
+            else:
+                profile.update(_summarise_cell([0.0] * len(_CELL_FIELDS)))
+                profile["segments"] = {}
+        
+        self._rankings = None
+    
     def get_dca_rankings(self):
-        """Return DCA performance rankings"""
+        """Return DCA performance rankings (cached until the profiles change)"""
+        
+        if getattr(self, "_rankings", None) is not None:
+            return self._rankings
         
         rankings = []
         for dca, profile in self.dca_profiles.items():
             rankings.append({
                 "dca_name": dca,
-                "success_rate": profile["success_rate"] * 100,
+                "success_rate": round(profile["success_rate"] * 100, 1),
                 "avg_days": profile["avg_days"],
-                "strengths": ", ".join(profile["strengths"])
+                "strengths": ", ".join(profile["strengths"]),
+                "total_cases": profile.get("total_cases"),
+                "total_amount": profile.get("total_amount"),
+                "recovered_amount": profile.get("recovered_amount"),
+                "segments": profile.get("segments", {})
             })
         
         # Sort by success rate
         rankings.sort(key=lambda x: x["success_rate"], reverse=True)
         
+        self._rankings = rankings
+        
         return rankings
 
 
+def _summarise_cell(values):
+    """Turn running totals into success rate / avg days / dollar figures"""
+    
+    cases, recovered, days_sum, days_count, amount, recovered_amount = values
+    
+    return {
+        "success_rate": recovered / cases if cases else 0.0,
+        "avg_days": int(round(days_sum / days_count)) if days_count else 0,
+        "total_cases": int(round(cases)),
+        "total_amount": round(amount, 2),
+        "recovered_amount": round(recovered_amount, 2)
+    }
+
+
 def train_models():
     """
     Train (or simulate training) the ML models
@@ -246,6 +585,9 @@ def train_models():
     recovery_model = RecoveryPredictor()
     dca_matcher = DCAMatcher()
     
+    # Build DCA performance profiles from case history
+    dca_matcher.fit_profiles(df)
+    
     # Test models on sample cases
     print("\n🧪 Testing models on sample cases...")
     sample_cases = df.sample(5)
@@ -275,17 +617,6 @@ def train_models():
         print(f"   → Recommended DCA: {recommended_dca}")
         print(f"   → Priority Score: {priority}/10")
     
-    # Save models
-    print("\n💾 Saving models...")
-    
-    with open("models/recovery_model.pkl", "wb") as f:
-        pickle.dump(recovery_model, f)
-    print("   ✅ Saved: models/recovery_model.pkl")
-    
-    with open("models/dca_matcher.pkl", "wb") as f:
-        pickle.dump(dca_matcher, f)
-    print("   ✅ Saved: models/dca_matcher.pkl")
-    
     # Generate DCA performance report
     print("\n📊 DCA Performance Rankings:")
     rankings = dca_matcher.get_dca_rankings()
@@ -319,6 +650,27 @@ def train_models():
     print(f"   Cases with >80% Recovery Prob: {len(df[df['predicted_recovery_prob'] > 80])}")
     print(f"   Cases with <40% Recovery Prob: {len(df[df['predicted_recovery_prob'] < 40])}")
     
+    # Save models as versioned artifacts (manifest + arrays, see model_artifacts.py)
+    print("\n💾 Saving models...")
+    
+    from model_artifacts import MODEL_DIR, save_artifact
+    
+    training_stats = {
+        "data_file": "data/cases_1000.csv",
+        "cases": len(df),
+        "accuracy": round(float(accuracy), 4),
+        "avg_predicted_recovery_prob": round(float(df['predicted_recovery_prob'].mean()), 2)
+    }
+    version = save_artifact(recovery_model, "recovery_model", training_stats)
+    print(f"   ✅ Saved: {MODEL_DIR}/recovery_model/{version}")
+    
+    version = save_artifact(dca_matcher, "dca_matcher", {
+        "data_file": "data/cases_1000.csv",
+        "cases": len(df),
+        "dcas": len(rankings)
+    })
+    print(f"   ✅ Saved: {MODEL_DIR}/dca_matcher/{version}")
+    
     print("\n" + "=" * 50)
     print("✅ Model training complete!")
     print("\n💡 Next steps:")